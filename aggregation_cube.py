@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""
+Grouping-Sets Aggregation Cube for the Departures Data
+"""
+
+import pandas as pd
+import numpy as np
+import warnings
+warnings.filterwarnings('ignore')
+
+DELAY_COLUMN = 'Departure delay (Minutes)'
+DELAY_TYPES = ['Delay Carrier (Minutes)', 'Delay Weather (Minutes)',
+               'Delay National Aviation System (Minutes)', 'Delay Security (Minutes)',
+               'Delay Late Aircraft Arrival (Minutes)']
+
+# Columns aggregated for every grouping set (non-null count, sum, sum of squares)
+EDA_MEASURES = [DELAY_COLUMN, 'Is_Significantly_Delayed', 'Schedule_Adherence',
+                'Time_Efficiency', 'Taxi-Out time (Minutes)', 'Flight Number'] + DELAY_TYPES
+
+# Grouping sets read by the comprehensive_eda panels. The first three are not read
+# directly: they are the finest sets the others roll up from, so the whole cube
+# costs a handful of scans. ('Carrier Code', 'Tail Number') also answers distinct
+# tail numbers per carrier.
+EDA_GROUPING_SETS = [
+    ('Year', 'Month', 'DayOfWeek_Name', 'Is_Weekend', 'Season_Name'),
+    ('Scheduled_Hour', 'Time_Period'),
+    ('Destination Airport', 'Carrier Code', 'Season_Name', 'Is_Weekend'),
+    (),
+    ('Year',),
+    ('Month',),
+    ('Year', 'Month'),
+    ('DayOfWeek_Name',),
+    ('Season_Name',),
+    ('Scheduled_Hour',),
+    ('Time_Period',),
+    ('Is_Weekend',),
+    ('Carrier Code',),
+    ('Year', 'Carrier Code'),
+    ('Carrier Code', 'Tail Number'),
+    ('Tail Number',),
+    ('Destination Airport',),
+    ('Season_Name', 'Destination Airport'),
+    ('Is_Weekend', 'Destination Airport'),
+    ('Destination Airport', 'Carrier Code'),
+]
+
+def encode_key(series):
+    """Dictionary-encode a key column into integer codes (-1 for missing) and sorted labels"""
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return series.cat.codes.to_numpy().astype(np.int64), pd.Index(series.cat.categories, name=series.name)
+    codes, labels = pd.factorize(series, sort=True)
+    return codes.astype(np.int64), pd.Index(labels, name=series.name)
+
+def _measure_arrays(series):
+    """Zero-filled values, their squares and a presence mask (None when complete)"""
+    values = series.to_numpy(dtype='float64', na_value=np.nan)
+    present = ~np.isnan(values)
+    if present.all():
+        return values, values * values, None
+    filled = np.where(present, values, 0.0)
+    return filled, filled * filled, present.astype('float64')
+
+def _scan(codes, shape, measures, rows):
+    """Aggregate one grouping set in a single pass of bincounts over its group ids"""
+    size = int(np.prod(shape))
+    if codes:
+        valid_keys = np.logical_and.reduce([c >= 0 for c in codes])
+        complete = valid_keys.all()
+        group_ids = np.ravel_multi_index(codes if complete else [np.where(valid_keys, c, 0) for c in codes], shape)
+        if not complete:
+            group_ids = group_ids[valid_keys]
+    else:
+        complete = True
+        group_ids = np.zeros(rows, dtype=np.int64)
+
+    def total(weights):
+        if not complete:
+            weights = weights[valid_keys]
+        return np.bincount(group_ids, weights=weights, minlength=size).reshape(shape)
+
+    count = np.bincount(group_ids, minlength=size).reshape(shape)
+    stats = {'count': count}
+    for name, (filled, squares, present) in measures.items():
+        stats[(name, 'n')] = count if present is None else total(present)
+        stats[(name, 'sum')] = total(filled)
+        stats[(name, 'sumsq')] = total(squares)
+    return stats
+
+def _roll_up(stats, keys, from_keys):
+    """Derive a coarser grouping set by summing a finer one over its extra keys"""
+    axes = tuple(i for i, key in enumerate(from_keys) if key not in keys)
+    return {stat: values.sum(axis=axes) for stat, values in stats.items()}
+
+def build_aggregation_cube(df, grouping_sets=EDA_GROUPING_SETS, measures=EDA_MEASURES):
+    """Compute count, sum and sum of squares for every grouping set over encoded keys"""
+    keys = sorted({key for grouping in grouping_sets for key in grouping})
+    measures = [m for m in measures if m in df.columns]
+
+    encoded = {key: encode_key(df[key]) for key in keys}
+    labels = {key: encoded[key][1] for key in keys}
+    missing = {key: encoded[key][0] < 0 for key in keys if (encoded[key][0] < 0).any()}
+    values = {m: _measure_arrays(df[m]) for m in measures}
+
+    def rolls_up_exactly(grouping, finer):
+        # groupby drops rows with a missing key, so the finer set must not have
+        # dropped any row the coarser set keeps
+        dropped = [missing[key] for key in finer if key not in grouping and key in missing]
+        if not dropped:
+            return True
+        kept = np.logical_and.reduce([~missing[key] for key in grouping if key in missing] or [True])
+        return not (np.logical_or.reduce(dropped) & kept).any()
+
+    # Finest sets first so coarser ones can be rolled up instead of rescanned
+    sets = {}
+    scanned = []
+    for grouping in sorted(set(map(tuple, grouping_sets)), key=len, reverse=True):
+        shape = tuple(len(labels[key]) for key in grouping)
+        sources = [finer for finer in sets
+                   if set(grouping) < set(finer) and rolls_up_exactly(grouping, finer)]
+        if sources:
+            finer = min(sources, key=lambda s: np.prod([len(labels[key]) for key in s]))
+            stats = _roll_up(sets[finer], grouping, finer)
+            order = [key for key in finer if key in grouping]
+            if order != list(grouping):
+                stats = {stat: np.transpose(v, [order.index(key) for key in grouping])
+                         for stat, v in stats.items()}
+        else:
+            stats = _scan([encoded[key][0] for key in grouping], shape, values, len(df))
+            scanned.append(grouping)
+        sets[grouping] = stats
+
+    print(f"Aggregation cube: {len(sets)} grouping sets from {len(scanned)} scans "
+          f"of {len(df):,} rows")
+    return {'labels': labels, 'sets': sets, 'measures': measures}
+
+def _index(cube, keys):
+    if not keys:
+        return None
+    if len(keys) == 1:
+        return cube['labels'][keys[0]]
+    return pd.MultiIndex.from_product([cube['labels'][key] for key in keys], names=list(keys))
+
+def _series(cube, keys, values, name=None):
+    """Series over the observed groups of a grouping set"""
+    keys = tuple(keys)
+    if not keys:
+        return values.item()
+    observed = cube['sets'][keys]['count'].ravel() > 0
+    return pd.Series(values.ravel()[observed], index=_index(cube, keys)[observed], name=name)
+
+def _per_measure(cube, keys, measures, func):
+    """Apply a statistic to one measure (Series) or a list of measures (DataFrame)"""
+    if isinstance(measures, str):
+        return _series(cube, keys, func(cube['sets'][tuple(keys)], measures), measures)
+    if not keys:
+        return pd.Series({m: func(cube['sets'][()], m).item() for m in measures})
+    return pd.DataFrame({m: _series(cube, keys, func(cube['sets'][tuple(keys)], m)) for m in measures})
+
+def cube_size(cube, keys):
+    """Rows per group, like df.groupby(keys).size()"""
+    return _series(cube, keys, cube['sets'][tuple(keys)]['count'])
+
+def cube_count(cube, keys, measures):
+    """Non-null values per group, like groupby(keys)[measures].count()"""
+    return _per_measure(cube, keys, measures, lambda stats, m: stats[(m, 'n')])
+
+def cube_sum(cube, keys, measures):
+    """Sum per group, like groupby(keys)[measures].sum()"""
+    return _per_measure(cube, keys, measures, lambda stats, m: stats[(m, 'sum')])
+
+def _mean(stats, m):
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(stats[(m, 'n')] > 0, stats[(m, 'sum')] / stats[(m, 'n')], np.nan)
+
+def _std(stats, m):
+    n, total, squares = stats[(m, 'n')], stats[(m, 'sum')], stats[(m, 'sumsq')]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        variance = (squares - total * total / n) / (n - 1)
+    return np.where(n > 1, np.sqrt(np.clip(variance, 0, None)), np.nan)
+
+def cube_mean(cube, keys, measures):
+    """Mean per group, like groupby(keys)[measures].mean()"""
+    return _per_measure(cube, keys, measures, _mean)
+
+def cube_std(cube, keys, measures):
+    """Sample standard deviation per group, like groupby(keys)[measures].std()"""
+    return _per_measure(cube, keys, measures, _std)
+
+def cube_nunique(cube, keys, column):
+    """Distinct values of `column` per group, rolled up from the (keys + column) set"""
+    keys = tuple(keys)
+    finer = keys + (column,)
+    present = (cube['sets'][finer]['count'] > 0).sum(axis=-1)
+    return _series(cube, keys, present, column)
+
+def grouped_histogram(df, group_column, value_column, edges):
+    """(group x bin) counts of a value from one bincount over encoded groups and bins"""
+    codes, labels = encode_key(df[group_column])
+    values = df[value_column].to_numpy(dtype='float64', na_value=np.nan)
+    edges = np.asarray(edges, dtype='float64')
+    bins = len(edges) - 1
+
+    # Bins are half-open except the last, which includes its right edge like np.histogram
+    inside = (codes >= 0) & (values >= edges[0]) & (values <= edges[-1])
+    bin_ids = np.minimum(np.searchsorted(edges, values[inside], side='right') - 1, bins - 1)
+    counts = np.bincount(codes[inside] * bins + bin_ids,
+                         minlength=len(labels) * bins).reshape(len(labels), bins)
+
+    observed = np.bincount(codes[codes >= 0], minlength=len(labels)) > 0
+    return pd.DataFrame(counts[observed], index=labels[observed],
+                        columns=pd.IntervalIndex.from_breaks(edges, closed='left'))
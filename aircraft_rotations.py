@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+Per-Aircraft Rotation Index and Delay-Propagation Analysis
+"""
+
+import pandas as pd
+import numpy as np
+from flight_data_loader import DEPARTURES_CSV, load_departures
+from feature_store import clock_minutes
+from aggregation_cube import encode_key
+import warnings
+warnings.filterwarnings('ignore')
+
+DATE_COLUMN = 'Date (MM/DD/YYYY)'
+TAIL_COLUMN = 'Tail Number'
+DELAY_COLUMN = 'Departure delay (Minutes)'
+ELAPSED_COLUMN = 'Actual elapsed time (Minutes)'
+LATE_AIRCRAFT_COLUMN = 'Delay Late Aircraft Arrival (Minutes)'
+
+# The data only holds IAD departures, so a rotation is one aircraft's IAD
+# departures on one calendar day: aircraft mostly overnight between them, and
+# links across days would mostly join unrelated operations
+MINUTES_PER_DAY = 24 * 60
+
+def _values(df, column):
+    return df[column].to_numpy(dtype='float64', na_value=np.nan)
+
+def _scheduled_departure_minutes(df):
+    """Scheduled departure as minutes since the epoch (NaN when date or time is missing)"""
+    dates = df[DATE_COLUMN].to_numpy().astype('datetime64[D]')
+    days = np.where(np.isnat(dates), np.nan, dates.astype('int64'))
+    if 'Scheduled_Minutes' in df.columns:
+        minutes = _values(df, 'Scheduled_Minutes')
+    else:
+        minutes = clock_minutes(df['Scheduled departure time']).to_numpy(dtype='float64', na_value=np.nan)
+    return days * MINUTES_PER_DAY + minutes
+
+def build_rotation_index(df):
+    """Flights sorted by tail and scheduled departure, with CSR offsets per tail"""
+    codes, tails = encode_key(df[TAIL_COLUMN])
+    scheduled = _scheduled_departure_minutes(df)
+    rows = np.flatnonzero((codes >= 0) & ~np.isnan(scheduled))
+
+    # One int64 sort key: tail code in the high part, departure minute in the low
+    # part. An unstable sort is ~3x faster; it only leaves one aircraft's
+    # duplicate departure times (data errors) in no particular order.
+    origin = scheduled[rows].min() if len(rows) else 0
+    span = int(scheduled[rows].max() - origin) + 1 if len(rows) else 1
+    key = codes[rows] * span + (scheduled[rows] - origin).astype(np.int64)
+    rows = rows[np.argsort(key)]
+
+    counts = np.bincount(codes[rows], minlength=len(tails))
+    return {
+        'tails': tails,
+        'offsets': np.concatenate([[0], np.cumsum(counts)]),
+        'rows': rows,
+        'tail_codes': codes[rows],
+        'scheduled': scheduled[rows],
+    }
+
+def tail_rows(index, tail):
+    """Row positions of one aircraft's flights in departure order"""
+    code = index['tails'].get_loc(tail)
+    return index['rows'][index['offsets'][code]:index['offsets'][code + 1]]
+
+def _previous(values, fill=np.nan):
+    """Values shifted one place down the rotation order"""
+    shifted = np.empty_like(values)
+    shifted[0:1] = fill
+    shifted[1:] = values[:-1]
+    return shifted
+
+def _segment_position(starts):
+    """1-based position of each element within the run that begins at the last True in starts"""
+    positions = np.arange(len(starts))
+    return positions - np.maximum.accumulate(np.where(starts, positions, 0)) + 1
+
+def rotation_metrics(df, index=None):
+    """Cycle gaps, upstream delay and late-aircraft chains per flight, aligned to df"""
+    if index is None:
+        index = build_rotation_index(df)
+    rows, codes, scheduled = index['rows'], index['tail_codes'], index['scheduled']
+    delay = _values(df, DELAY_COLUMN)[rows]
+    arrival = scheduled + delay + _values(df, ELAPSED_COLUMN)[rows]
+    late = _values(df, LATE_AIRCRAFT_COLUMN)[rows]
+
+    # A flight continues a rotation when the same aircraft already left IAD that day
+    day = scheduled // MINUTES_PER_DAY
+    continues = (codes == _previous(codes, -1)) & (day == _previous(day))
+
+    # Cycle gap: from the previous leg's arrival at its remote destination to
+    # this scheduled departure. It spans the ground time away, the unseen return
+    # leg and the ground time at IAD, so it is not a turnaround.
+    cycle_gap = np.where(continues, scheduled - _previous(arrival), np.nan)
+    upstream = np.where(continues, _previous(delay), np.nan)
+
+    # Late-aircraft chains: runs of consecutive legs in one rotation that each
+    # carry late-aircraft delay
+    propagated = late > 0
+    chain_starts = propagated & ~(continues & _previous(propagated, False))
+    chain = np.where(propagated, np.cumsum(chain_starts) - 1, -1).astype(np.int32)
+    chain_position = np.where(propagated, _segment_position(chain_starts), 0).astype(np.int32)
+
+    columns = {
+        'Rotation_Leg': (_segment_position(~continues).astype(np.int32), 0),
+        'Cycle_Gap_Minutes': (cycle_gap, np.nan),
+        'Upstream_Delay': (upstream, np.nan),
+        'Late_Aircraft_Chain': (chain, -1),
+        'Chain_Position': (chain_position, 0),
+    }
+    metrics = {}
+    for name, (values, missing) in columns.items():
+        aligned = np.full(len(df), missing, dtype=values.dtype)
+        aligned[rows] = values
+        metrics[name] = aligned
+    return pd.DataFrame(metrics, index=df.index)
+
+def propagation_chains(df, metrics):
+    """One row per late-aircraft chain: aircraft, first departure, legs and delay minutes"""
+    chain = metrics['Late_Aircraft_Chain'].to_numpy()
+    in_chain = np.flatnonzero(chain >= 0)
+    ids = chain[in_chain]
+    chains = ids.max() + 1 if len(ids) else 0
+
+    first = in_chain[metrics['Chain_Position'].to_numpy()[in_chain] == 1]
+    first = first[np.argsort(chain[first])]
+    starts = df.iloc[first]
+    return pd.DataFrame({
+        TAIL_COLUMN: starts[TAIL_COLUMN].to_numpy(),
+        'Start': pd.to_datetime(_scheduled_departure_minutes(starts), unit='m'),
+        'Legs': np.bincount(ids, minlength=chains),
+        'Late_Aircraft_Minutes': np.bincount(ids, weights=_values(df, LATE_AIRCRAFT_COLUMN)[in_chain],
+                                             minlength=chains),
+    })
+
+def daily_utilization(df, index=None):
+    """Departures, block minutes and active span per aircraft per day"""
+    if index is None:
+        index = build_rotation_index(df)
+    rows, codes, scheduled = index['rows'], index['tail_codes'], index['scheduled']
+    day = scheduled // MINUTES_PER_DAY
+
+    # Rows are sorted by tail then time, so every tail-day is a contiguous segment
+    boundary = np.ones(len(rows), dtype=bool)
+    boundary[1:] = (codes[1:] != codes[:-1]) | (day[1:] != day[:-1])
+    starts = np.flatnonzero(boundary)
+    ends = np.append(starts[1:], len(rows)) - 1
+
+    elapsed = _values(df, ELAPSED_COLUMN)[rows]
+    block = np.add.reduceat(np.nan_to_num(elapsed), starts) if len(starts) else np.zeros(0)
+    return pd.DataFrame({
+        TAIL_COLUMN: index['tails'][codes[starts]],
+        'Date': pd.to_datetime(day[starts], unit='D'),
+        'Departures': np.diff(np.append(starts, len(rows))),
+        'Block_Minutes': block,
+        'Active_Span_Hours': (scheduled[ends] - scheduled[starts]) / 60,
+    })
+
+def rotation_summary(df, index=None):
+    """Headline rotation and propagation figures for the reports"""
+    if index is None:
+        index = build_rotation_index(df)
+    metrics = rotation_metrics(df, index)
+    chains = propagation_chains(df, metrics)
+    utilization = daily_utilization(df, index)
+    late = _values(df, LATE_AIRCRAFT_COLUMN)
+    chained = metrics['Chain_Position'].to_numpy() > 1
+    return {
+        'aircraft': int((np.diff(index['offsets']) > 0).sum()),
+        'median_cycle_gap': metrics['Cycle_Gap_Minutes'].median(),
+        'chains': len(chains),
+        'longest_chain': int(chains['Legs'].max()) if len(chains) else 0,
+        'multi_leg_chains': int((chains['Legs'] > 1).sum()),
+        # Share of late-aircraft minutes on legs that inherited delay from an
+        # earlier late-aircraft leg of the same rotation
+        'chained_late_share': np.nansum(late[chained]) / np.nansum(late) * 100 if np.nansum(late) else 0.0,
+        'departures_per_day': utilization['Departures'].mean(),
+    }
+
+if __name__ == "__main__":
+    df = load_departures(DEPARTURES_CSV)
+    summary = rotation_summary(df)
+    print(f"Aircraft: {summary['aircraft']:,}")
+    print(f"Median cycle gap: {summary['median_cycle_gap']:.0f} minutes")
+    print(f"Late-aircraft chains: {summary['chains']:,} "
+          f"({summary['multi_leg_chains']:,} multi-leg, longest {summary['longest_chain']} legs)")
+    print(f"Late-aircraft minutes on chained legs: {summary['chained_late_share']:.1f}%")
+    print(f"Departures per aircraft per active day: {summary['departures_per_day']:.2f}")
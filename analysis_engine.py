@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Pluggable DataFrame Engine (pandas / Polars lazy) for the Analysis Layer
+"""
+
+import pandas as pd
+import numpy as np
+import operator
+import os
+from flight_data_loader import (DEPARTURES_CSV, CACHE_DIR, DEPARTURES_SCHEMA, DEPARTURES_DATE_FORMAT,
+                                _cache_paths, _cache_is_current, _read_cache_meta,
+                                apply_departures_schema, load_departures)
+import warnings
+warnings.filterwarnings('ignore')
+
+ENGINES = ('pandas', 'polars')
+ENGINE_ENV_VAR = 'IAD_ENGINE'
+DATE_COLUMN = 'Date (MM/DD/YYYY)'
+
+# Row filters use the pyarrow/read_parquet form: [(column, op, value), ...], ANDed
+FILTER_OPERATORS = {
+    '==': operator.eq,
+    '!=': operator.ne,
+    '<': operator.lt,
+    '<=': operator.le,
+    '>': operator.gt,
+    '>=': operator.ge,
+}
+
+def resolve_engine(engine=None):
+    """Pick the engine from the argument, then $IAD_ENGINE, falling back to pandas"""
+    engine = (engine or os.environ.get(ENGINE_ENV_VAR) or 'pandas').lower()
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown engine '{engine}' - expected one of {', '.join(ENGINES)}")
+
+    if engine == 'polars':
+        try:
+            import polars  # noqa: F401
+        except ImportError:
+            print("Polars not installed - using the pandas engine")
+            return 'pandas'
+    return engine
+
+def _current_cache(path, cache_dir):
+    """Path of the departures Parquet cache when it is current, else None"""
+    parquet_path, meta_path = _cache_paths(path, cache_dir)
+    is_current, _ = _cache_is_current(path, _read_cache_meta(meta_path))
+    return parquet_path if is_current and os.path.exists(parquet_path) else None
+
+def _pandas_mask(df, filters):
+    mask = np.ones(len(df), dtype=bool)
+    for column, op, value in filters:
+        if op == 'in':
+            mask &= df[column].isin(value).to_numpy()
+        elif op == 'not in':
+            mask &= ~df[column].isin(value).to_numpy()
+        else:
+            mask &= FILTER_OPERATORS[op](df[column], value).fillna(False).to_numpy(dtype=bool)
+    return mask
+
+def _polars_predicate(filters):
+    import polars as pl
+    predicates = []
+    for column, op, value in filters:
+        if op == 'in':
+            predicates.append(pl.col(column).is_in(list(value)))
+        elif op == 'not in':
+            predicates.append(~pl.col(column).is_in(list(value)))
+        else:
+            predicates.append(FILTER_OPERATORS[op](pl.col(column), value))
+    return pl.all_horizontal(predicates)
+
+def _scan_departures_polars(path, cache_dir):
+    import polars as pl
+    parquet_path = _current_cache(path, cache_dir)
+    if parquet_path is not None:
+        return pl.scan_parquet(parquet_path)
+
+    # No current cache: scan the CSV directly with the declared categorical columns
+    categories = {col: pl.Categorical for col, kind in DEPARTURES_SCHEMA.items() if kind == 'category'}
+    return (pl.scan_csv(path, schema_overrides=categories)
+              .with_columns(pl.col(DATE_COLUMN).str.strptime(pl.Datetime('us'), DEPARTURES_DATE_FORMAT)))
+
+def scan_departures(columns=None, filters=None, engine=None, path=DEPARTURES_CSV, cache_dir=CACHE_DIR):
+    """Departures with column projection and row filters pushed into the source"""
+    # pandas returns a DataFrame; Polars returns a LazyFrame that only runs
+    # (multi-threaded) when collect() is called
+    engine = resolve_engine(engine)
+    filters = list(filters or [])
+
+    if engine == 'polars':
+        lazy = _scan_departures_polars(path, cache_dir)
+        if filters:
+            lazy = lazy.filter(_polars_predicate(filters))
+        return lazy.select(columns) if columns is not None else lazy
+
+    parquet_path = _current_cache(path, cache_dir)
+    if parquet_path is not None:
+        try:
+            return pd.read_parquet(parquet_path, columns=columns, filters=filters or None)
+        except ImportError:
+            pass
+
+    df = load_departures(path, cache_dir)
+    if filters:
+        df = df[_pandas_mask(df, filters)].reset_index(drop=True)
+    return df[columns] if columns is not None else df
+
+def collect(frame):
+    """Materialize an engine frame as pandas - the plotting boundary"""
+    if isinstance(frame, pd.DataFrame):
+        return frame
+
+    df = frame.collect().to_pandas()
+
+    # Polars keeps categories in first-seen order; pandas sorts them, and the
+    # panels rely on that order
+    for col in df.select_dtypes('category').columns:
+        df[col] = df[col].cat.reorder_categories(sorted(df[col].cat.categories))
+
+    # Polars hands back plain float columns; restore the declared lean dtypes
+    return apply_departures_schema(df, report=False)
@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+Embedded SQLite Analytical Store for Ad-Hoc Flight Queries
+"""
+
+import pandas as pd
+import numpy as np
+import json
+import os
+import sqlite3
+import sys
+from contextlib import closing
+from flight_data_loader import (DEPARTURES_CSV, INTEGRATED_CSV, CACHE_DIR, file_fingerprint,
+                                load_departures, load_integrated_dataset)
+from integrated_store import INTEGRATED_STORE_DIR, integrated_dtypes, store_manifest_mtime
+import warnings
+warnings.filterwarnings('ignore')
+
+ANALYTICS_DB_PATH = os.path.join(CACHE_DIR, 'iad_analytics.sqlite')
+DB_FORMAT_VERSION = 1
+
+# Departures columns -> SQL column names
+DEPARTURE_COLUMNS = {
+    'Carrier Code': 'carrier',
+    'Flight Number': 'flight_number',
+    'Tail Number': 'tail_number',
+    'Destination Airport': 'destination',
+    'Scheduled departure time': 'scheduled_departure',
+    'Scheduled elapsed time (Minutes)': 'scheduled_elapsed',
+    'Actual elapsed time (Minutes)': 'actual_elapsed',
+    'Departure delay (Minutes)': 'departure_delay',
+    'Taxi-Out time (Minutes)': 'taxi_out',
+    'Delay Carrier (Minutes)': 'delay_carrier',
+    'Delay Weather (Minutes)': 'delay_weather',
+    'Delay National Aviation System (Minutes)': 'delay_nas',
+    'Delay Security (Minutes)': 'delay_security',
+    'Delay Late Aircraft Arrival (Minutes)': 'delay_late_aircraft',
+}
+
+# Rows are inserted in date order, so date ranges are also contiguous on disk.
+# The carrier index covers the usual carrier/destination/month questions.
+INDEXES = [
+    'CREATE INDEX idx_departures_date ON departures (date)',
+    'CREATE INDEX idx_departures_carrier ON departures (carrier, destination, year, month)',
+    'CREATE INDEX idx_departures_destination ON departures (destination, year, month)',
+    'CREATE INDEX idx_departures_tail ON departures (tail_number, date)',
+    'CREATE UNIQUE INDEX idx_daily_date ON daily (date)',
+]
+
+def _source_fingerprints():
+    """Cheap fingerprints (size, mtime) of the sources the database is built from"""
+    sources = {}
+    for path in (DEPARTURES_CSV, INTEGRATED_CSV):
+        if os.path.exists(path):
+            sources[path] = file_fingerprint(path, with_hash=False)
+    sources[INTEGRATED_STORE_DIR] = store_manifest_mtime(INTEGRATED_STORE_DIR)
+    return sources
+
+def _read_build_info(db_path):
+    """Build metadata stored in the database, or None when missing or unreadable"""
+    if not os.path.exists(db_path):
+        return None
+    try:
+        with closing(sqlite3.connect(db_path)) as conn:
+            row = conn.execute("SELECT value FROM build_info WHERE key = 'build'").fetchone()
+        return json.loads(row[0]) if row else None
+    except (sqlite3.Error, ValueError):
+        return None
+
+def _departures_table(df):
+    """Departures in SQL column names with ISO date and year/month keys, in date order"""
+    dates = df['Date (MM/DD/YYYY)']
+    table = pd.DataFrame({
+        'date': dates.dt.strftime('%Y-%m-%d'),
+        'year': dates.dt.year,
+        'month': dates.dt.month,
+    })
+    for source, column in DEPARTURE_COLUMNS.items():
+        if source in df.columns:
+            values = df[source]
+            table[column] = values.astype(object) if isinstance(values.dtype, pd.CategoricalDtype) else values
+    return table.sort_values('date', kind='stable')
+
+def build_analytics_db(db_path=ANALYTICS_DB_PATH):
+    """Build the SQLite store from the departures and integrated datasets"""
+    print(f"Building analytics database {db_path}...")
+    os.makedirs(os.path.dirname(db_path) or '.', exist_ok=True)
+    tmp_path = db_path + '.tmp'
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+
+    # closing() rather than the connection's own context manager, which only
+    # commits: the file must be closed before it replaces the database
+    with closing(sqlite3.connect(tmp_path)) as conn:
+        if os.path.exists(DEPARTURES_CSV):
+            departures = _departures_table(load_departures())
+            departures.to_sql('departures', conn, index=False, chunksize=100_000)
+            print(f"- departures: {len(departures):,} rows")
+        else:
+            conn.execute('CREATE TABLE departures (date TEXT, year INTEGER, month INTEGER, ' +
+                         ', '.join(DEPARTURE_COLUMNS.values()) + ')')
+
+        # sqlite3 binds neither Periods nor pd.NA; the store and the CSV both give plain types
+        daily = integrated_dtypes(load_integrated_dataset())
+        daily = daily.rename(columns={'Date': 'date'}).assign(
+            date=lambda d: d['date'].dt.strftime('%Y-%m-%d')).sort_values('date')
+        daily.to_sql('daily', conn, index=False)
+        print(f"- daily: {len(daily):,} rows")
+
+        for statement in INDEXES:
+            conn.execute(statement)
+        conn.execute('ANALYZE')
+        conn.execute('CREATE TABLE build_info (key TEXT PRIMARY KEY, value TEXT)')
+        conn.execute("INSERT INTO build_info VALUES ('build', ?)", (json.dumps({
+            'format_version': DB_FORMAT_VERSION,
+            'sources': _source_fingerprints(),
+        }),))
+        conn.commit()
+    os.replace(tmp_path, db_path)
+
+def connect_analytics_db(db_path=ANALYTICS_DB_PATH, rebuild=False):
+    """Open the analytics database, rebuilding it first when its sources have changed"""
+    info = _read_build_info(db_path)
+    if (rebuild or info is None or info.get('format_version') != DB_FORMAT_VERSION or
+            info.get('sources') != json.loads(json.dumps(_source_fingerprints()))):
+        build_analytics_db(db_path)
+
+    # The connection keeps compiled statements, so repeated parameterized
+    # queries skip parsing and planning
+    conn = sqlite3.connect(db_path, cached_statements=256)
+    conn.execute('PRAGMA query_only = ON')
+    return conn
+
+def _where(carrier=None, destination=None, years=None, months=None, start=None, end=None):
+    """WHERE clause with placeholders plus its parameters; values are never inlined"""
+    clauses, params = [], []
+    for column, value in (('carrier', carrier), ('destination', destination)):
+        if value is not None:
+            clauses.append(f'{column} = ?')
+            params.append(value)
+    for column, values in (('year', years), ('month', months)):
+        if values is not None:
+            values = [int(v) for v in np.atleast_1d(values)]
+            clauses.append(f"{column} IN ({', '.join('?' * len(values))})")
+            params.extend(values)
+    if start is not None:
+        clauses.append('date >= ?')
+        params.append(pd.Timestamp(start).strftime('%Y-%m-%d'))
+    if end is not None:
+        clauses.append('date <= ?')
+        params.append(pd.Timestamp(end).strftime('%Y-%m-%d'))
+    return (' WHERE ' + ' AND '.join(clauses)) if clauses else '', params
+
+def query(conn, sql, params=()):
+    """Run a parameterized query and return a DataFrame"""
+    return pd.read_sql_query(sql, conn, params=params)
+
+def delay_summary(conn, carrier=None, destination=None, years=None, months=None, start=None, end=None):
+    """Flights, average delay and on-time rate for any carrier/destination/period filter"""
+    where, params = _where(carrier, destination, years, months, start, end)
+    row = conn.execute(
+        'SELECT COUNT(*), AVG(departure_delay), '
+        'AVG(CASE WHEN departure_delay <= 15 THEN 100.0 WHEN departure_delay > 15 THEN 0.0 END) '
+        'FROM departures' + where, params).fetchone()
+    return {'flights': row[0], 'avg_delay': row[1], 'on_time_pct': row[2]}
+
+def delay_breakdown(conn, by, carrier=None, destination=None, years=None, months=None, start=None, end=None):
+    """delay_summary grouped by one or more departures columns"""
+    by = [by] if isinstance(by, str) else list(by)
+    unknown = set(by) - set(DEPARTURE_COLUMNS.values()) - {'date', 'year', 'month'}
+    if unknown:
+        raise ValueError(f"Cannot group by {', '.join(sorted(unknown))}")
+
+    where, params = _where(carrier, destination, years, months, start, end)
+    keys = ', '.join(by)
+    return query(conn,
+                 f'SELECT {keys}, COUNT(*) AS flights, AVG(departure_delay) AS avg_delay, '
+                 f'AVG(CASE WHEN departure_delay <= 15 THEN 100.0 WHEN departure_delay > 15 THEN 0.0 END) AS on_time_pct '
+                 f'FROM departures{where} GROUP BY {keys} ORDER BY {keys}', params)
+
+def tail_history(conn, tail_number, start=None, end=None):
+    """Every departure flown by one aircraft, in date and scheduled-time order"""
+    where, params = _where(start=start, end=end)
+    where = (where + ' AND' if where else ' WHERE') + ' tail_number = ?'
+    return query(conn, f'SELECT * FROM departures{where} ORDER BY date, scheduled_departure',
+                 params + [tail_number])
+
+def daily_metrics(conn, columns=None, start=None, end=None):
+    """Rows of the integrated daily dataset for a date range"""
+    available = [row[1] for row in conn.execute('PRAGMA table_info(daily)')]
+    columns = list(columns or available)
+    unknown = set(columns) - set(available)
+    if unknown:
+        raise ValueError(f"Unknown daily columns: {', '.join(sorted(unknown))}")
+
+    where, params = _where(start=start, end=end)
+    selected = ', '.join(f'"{c}"' for c in dict.fromkeys(['date'] + columns))
+    df = query(conn, f'SELECT {selected} FROM daily{where} ORDER BY date', params)
+    df['date'] = pd.to_datetime(df['date'])
+    return df
+
+if __name__ == "__main__":
+    conn = connect_analytics_db(rebuild='--rebuild' in sys.argv)
+    print("\nDelay summary by carrier:")
+    print(delay_breakdown(conn, 'carrier').round(2).to_string(index=False))
+    conn.close()
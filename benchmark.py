@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+"""
+Benchmark Suite for the IAD Flight Analysis Pipeline
+"""
+
+import matplotlib
+matplotlib.use('Agg')
+
+import pandas as pd
+import numpy as np
+import matplotlib.pyplot as plt
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from flight_data_loader import DEPARTURES_CSV, INTEGRATED_CSV, load_integrated_dataset
+from figure_renderer import HEADLESS_ENV_VAR, set_headless
+from time_rollups import clear_rollup_cache
+import comprehensive_eda
+import integrated_analysis
+import hypothesis_stories
+import final_stories
+import warnings
+warnings.filterwarnings('ignore')
+
+DEFAULT_SCALES = [1, 10, 100]
+DEFAULT_RESULTS = 'benchmark_results.json'
+DEFAULT_BASELINE = 'benchmark_baseline.json'
+
+# Entry-point modules whose cold import is timed; batch runs and CLI queries
+# should be working well within this many seconds of starting
+IMPORT_MODULES = ['comprehensive_eda', 'integrated_analysis', 'hypothesis_stories', 'final_stories',
+                  'initial_exploration', 'analytics_db', 'congestion_metrics', 'aircraft_rotations']
+IMPORT_TIME_BUDGET = 1.0
+
+# Row-level files are replicated to scale; the additional datasets are date
+# dimension tables and are copied as-is so joins stay one row per date
+SCALED_FILES = [DEPARTURES_CSV, INTEGRATED_CSV]
+COPIED_FILES = list(integrated_analysis.AUXILIARY_FILES.values())
+
+EDA_PANELS = [
+    comprehensive_eda.temporal_analysis,
+    comprehensive_eda.carrier_analysis,
+    comprehensive_eda.route_and_destination_analysis,
+    comprehensive_eda.operational_efficiency_analysis,
+]
+STORIES = [
+    hypothesis_stories.story_1_the_great_aviation_reset,
+    hypothesis_stories.story_2_weather_the_storm,
+    hypothesis_stories.story_3_economic_headwinds_and_tailwinds,
+    hypothesis_stories.story_4_the_operational_efficiency_paradox,
+    hypothesis_stories.story_5_the_resilience_factor,
+]
+
+def _replicate_csv(source, target, scale):
+    """Write a CSV whose data rows are the source rows repeated `scale` times"""
+    with open(source, 'rb') as f:
+        header = f.readline()
+        body = f.read()
+    if body and not body.endswith(b'\n'):
+        body += b'\n'
+
+    with open(target, 'wb') as f:
+        f.write(header)
+        for _ in range(scale):
+            f.write(body)
+
+def build_scaled_workspace(scale, source_dir, root):
+    """Create a working directory holding the bundled CSVs at the given scale"""
+    workdir = os.path.join(root, f'scale_{scale}x')
+    os.makedirs(workdir, exist_ok=True)
+
+    for name in SCALED_FILES:
+        if os.path.exists(os.path.join(source_dir, name)):
+            _replicate_csv(os.path.join(source_dir, name), os.path.join(workdir, name), scale)
+    for name in COPIED_FILES:
+        shutil.copy(os.path.join(source_dir, name), os.path.join(workdir, name))
+
+    return workdir
+
+def _count_rows(path):
+    """Data rows in a CSV file"""
+    with open(path, 'rb') as f:
+        return sum(block.count(b'\n') for block in iter(lambda: f.read(1 << 20), b'')) - 1
+
+def measure(func, *args, repeat=1):
+    """Best wall-clock time over `repeat` runs plus peak traced memory of one more run"""
+    # Every run starts without in-process caches, so repeats time the full work
+    timings = []
+    for _ in range(repeat):
+        clear_rollup_cache()
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            result = func(*args)
+            timings.append(time.perf_counter() - start)
+        plt.close('all')
+
+    # Peak memory is taken on a separate run because tracing slows execution
+    clear_rollup_cache()
+    tracemalloc.start()
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            func(*args)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+        plt.close('all')
+
+    return min(timings), peak, result
+
+def _record(results, name, scale, rows, seconds, peak):
+    """Append one benchmark result and echo it"""
+    results.append({
+        'name': name,
+        'scale': scale,
+        'rows': rows,
+        'seconds': round(seconds, 4),
+        'rows_per_sec': round(rows / seconds, 1) if seconds > 0 else None,
+        'peak_mb': round(peak / 1e6, 2),
+    })
+    print(f"{name:<45} {scale:>4}x {rows:>12,} rows {seconds:>9.3f}s "
+          f"{rows / max(seconds, 1e-9):>14,.0f} rows/s {peak / 1e6:>9.1f} MB")
+
+def measure_import_time(module, source_dir):
+    """Seconds to import one module in a fresh headless interpreter"""
+    code = f"import time; start = time.perf_counter(); import {module}; print(time.perf_counter() - start)"
+    completed = subprocess.run([sys.executable, '-c', code], cwd=source_dir, capture_output=True, text=True,
+                               check=True, env=dict(os.environ, **{HEADLESS_ENV_VAR: '1'}))
+    return float(completed.stdout.split()[-1])
+
+def run_import_benchmarks(source_dir, repeat=1):
+    """Cold import time of every entry-point module, best of `repeat` fresh interpreters"""
+    results = []
+    for module in IMPORT_MODULES:
+        seconds = min(measure_import_time(module, source_dir) for _ in range(repeat))
+        results.append({
+            'name': f'import {module}',
+            'scale': 1,
+            'rows': 0,
+            'seconds': round(seconds, 4),
+            'rows_per_sec': None,
+            'peak_mb': 0.0,
+        })
+        flag = '' if seconds <= IMPORT_TIME_BUDGET else f'  over the {IMPORT_TIME_BUDGET:.1f}s budget'
+        print(f"{'import ' + module:<45} {seconds:>9.3f}s{flag}")
+    return results
+
+def run_scale(scale, source_dir, root, repeat=1):
+    """Run every benchmark against one scaled copy of the data"""
+    workdir = build_scaled_workspace(scale, source_dir, root)
+    results = []
+    previous_dir = os.getcwd()
+    os.chdir(workdir)
+
+    try:
+        if os.path.exists(DEPARTURES_CSV):
+            flight_rows = _count_rows(DEPARTURES_CSV)
+
+            # Cold runs start without the loader cache or feature store
+            def cold_load():
+                shutil.rmtree('.cache', ignore_errors=True)
+                return comprehensive_eda.load_and_preprocess_data()
+
+            seconds, peak, _ = measure(cold_load, repeat=repeat)
+            _record(results, 'load_and_preprocess_data (cold)', scale, flight_rows, seconds, peak)
+            seconds, peak, df = measure(comprehensive_eda.load_and_preprocess_data, repeat=repeat)
+            _record(results, 'load_and_preprocess_data (warm)', scale, flight_rows, seconds, peak)
+
+            seconds, peak, _ = measure(integrated_analysis.load_and_integrate_all_data, repeat=repeat)
+            _record(results, 'load_and_integrate_all_data', scale, flight_rows, seconds, peak)
+
+            for panel in EDA_PANELS:
+                seconds, peak, _ = measure(panel, df, repeat=repeat)
+                _record(results, panel.__name__, scale, flight_rows, seconds, peak)
+        else:
+            print(f"{DEPARTURES_CSV} not found - skipping departures benchmarks")
+
+        integrated = load_integrated_dataset()
+        daily_rows = len(integrated)
+        for story in STORIES:
+            seconds, peak, _ = measure(lambda: story(integrated.copy()), repeat=repeat)
+            _record(results, story.__name__, scale, daily_rows, seconds, peak)
+
+        seconds, peak, _ = measure(final_stories.generate_final_insights, repeat=repeat)
+        _record(results, 'generate_final_insights', scale, daily_rows, seconds, peak)
+    finally:
+        os.chdir(previous_dir)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    return results
+
+def compare_to_baseline(results, baseline, time_threshold=0.20, memory_threshold=0.20):
+    """Return the benchmarks that regressed beyond the thresholds"""
+    reference = {(r['name'], r['scale']): r for r in baseline['results']}
+    regressions = []
+
+    print("\n" + "="*60)
+    print("COMPARISON AGAINST BASELINE")
+    print("="*60)
+    for result in results:
+        base = reference.get((result['name'], result['scale']))
+        if base is None:
+            continue
+
+        time_ratio = result['seconds'] / base['seconds'] if base['seconds'] else 1.0
+        memory_ratio = result['peak_mb'] / base['peak_mb'] if base['peak_mb'] else 1.0
+        regressed = time_ratio > 1 + time_threshold or memory_ratio > 1 + memory_threshold
+        if regressed:
+            regressions.append(dict(result, time_ratio=time_ratio, memory_ratio=memory_ratio))
+
+        print(f"{'REGRESSED' if regressed else 'ok':<10} {result['name']:<45} {result['scale']:>4}x "
+              f"time x{time_ratio:.2f}  memory x{memory_ratio:.2f}")
+
+    return regressions
+
+def main(argv=None):
+    """Main benchmark function"""
+    parser = argparse.ArgumentParser(description='Benchmark the IAD flight analysis pipeline')
+    parser.add_argument('--scales', type=int, nargs='+', default=DEFAULT_SCALES)
+    parser.add_argument('--repeat', type=int, default=1)
+    parser.add_argument('--output', default=DEFAULT_RESULTS)
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE)
+    parser.add_argument('--save-baseline', action='store_true')
+    parser.add_argument('--time-threshold', type=float, default=0.20)
+    parser.add_argument('--memory-threshold', type=float, default=0.20)
+    args = parser.parse_args(argv)
+
+    print("IAD FLIGHT ANALYSIS BENCHMARKS")
+    print("="*60)
+
+    set_headless()
+    source_dir = os.getcwd()
+    results = run_import_benchmarks(source_dir, repeat=args.repeat)
+    with tempfile.TemporaryDirectory(prefix='iad_bench_') as root:
+        for scale in args.scales:
+            results.extend(run_scale(scale, source_dir, root, repeat=args.repeat))
+
+    report = {
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'numpy': np.__version__,
+        'machine': platform.machine(),
+        'results': results,
+    }
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults saved to {args.output}")
+
+    if args.save_baseline:
+        shutil.copy(args.output, args.baseline)
+        print(f"Baseline saved to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline} - run with --save-baseline to create one")
+        return 0
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    regressions = compare_to_baseline(results, baseline, args.time_threshold, args.memory_threshold)
+    print(f"\n{len(regressions)} regression(s) beyond thresholds")
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
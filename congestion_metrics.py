@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Departure-Rate and Taxi-Queue Congestion Metrics for IAD
+"""
+
+import pandas as pd
+import numpy as np
+import os
+from flight_data_loader import DEPARTURES_CSV
+from analysis_engine import collect, scan_departures
+from feature_store import clock_minutes
+from correlation_engine import pairwise_correlation
+import warnings
+warnings.filterwarnings('ignore')
+
+DATE_COLUMN = 'Date (MM/DD/YYYY)'
+DELAY_COLUMN = 'Departure delay (Minutes)'
+TAXI_COLUMN = 'Taxi-Out time (Minutes)'
+CONGESTION_COLUMNS = [DATE_COLUMN, 'Scheduled departure time', DELAY_COLUMN, TAXI_COLUMN]
+
+# Sliding window widths (minutes), centred on each flight
+CONGESTION_WINDOWS = (15, 30, 60)
+
+# Taxi queues of this many aircraft or more share one bucket in the summaries
+MAX_QUEUE_BUCKET = 10
+
+MINUTES_PER_DAY = 24 * 60
+
+def _values(df, column):
+    return df[column].to_numpy(dtype='float64', na_value=np.nan)
+
+def departure_timeline(df):
+    """Scheduled, off-block and wheels-off times as minutes since the epoch"""
+    dates = df[DATE_COLUMN].to_numpy().astype('datetime64[D]')
+    days = np.where(np.isnat(dates), np.nan, dates.astype('int64'))
+    scheduled = days * MINUTES_PER_DAY + clock_minutes(df['Scheduled departure time']).to_numpy(
+        dtype='float64', na_value=np.nan)
+
+    # Scheduled time plus delay instead of the HH:MM actual time, so departures
+    # pushed past midnight land on the right day
+    off_block = scheduled + _values(df, DELAY_COLUMN)
+    wheels_off = off_block + _values(df, TAXI_COLUMN)
+    return scheduled, off_block, wheels_off
+
+def _timeline_order(times):
+    """Sort order of the present times, and those times sorted"""
+    order = np.flatnonzero(~np.isnan(times))
+    order = order[np.argsort(times[order])]
+    return order, times[order]
+
+def _scatter(values, order, size):
+    """Values computed in sorted order, put back in row order (NaN elsewhere)"""
+    aligned = np.full(size, np.nan)
+    aligned[order] = values
+    return aligned
+
+def _window_counts(sorted_times, width):
+    """Events in [t - width/2, t + width/2] around every sorted t, by two binary searches"""
+    # Sorted needles keep the searches cache-friendly, which matters more than
+    # the O(log N) bound once the timeline is tens of millions long
+    return (np.searchsorted(sorted_times, sorted_times + width / 2, side='right') -
+            np.searchsorted(sorted_times, sorted_times - width / 2, side='left'))
+
+def congestion_metrics(df, windows=CONGESTION_WINDOWS):
+    """Per-flight departure rates and taxi-out queue, aligned to df"""
+    scheduled, off_block, wheels_off = departure_timeline(df)
+    scheduled_order, sorted_scheduled = _timeline_order(scheduled)
+    off_block_order, sorted_off_block = _timeline_order(off_block)
+
+    metrics = {}
+    for width in windows:
+        metrics[f'Scheduled_{width}m'] = _scatter(_window_counts(sorted_scheduled, width),
+                                                  scheduled_order, len(df))
+        metrics[f'Actual_{width}m'] = _scatter(_window_counts(sorted_off_block, width),
+                                               off_block_order, len(df))
+
+    # Aircraft taxiing when this flight leaves the gate: pushed back at or before
+    # t and not yet airborne (wheels-off at or after t), excluding the flight itself
+    taxiing = ~np.isnan(wheels_off[off_block_order])
+    pushback = sorted_off_block[taxiing]
+    started = np.searchsorted(pushback, pushback, side='right')
+    finished = np.searchsorted(np.sort(wheels_off[off_block_order[taxiing]]), pushback, side='left')
+    metrics['Taxi_Queue'] = _scatter(np.maximum(started - finished - 1, 0),
+                                     off_block_order[taxiing], len(df))
+
+    metrics['Scheduled_Hour'] = np.floor(scheduled % MINUTES_PER_DAY / 60)
+    metrics[TAXI_COLUMN] = _values(df, TAXI_COLUMN)
+    metrics[DELAY_COLUMN] = _values(df, DELAY_COLUMN)
+    return pd.DataFrame(metrics, index=df.index)
+
+def hourly_congestion(df, metrics=None):
+    """Departures per hour per operating day with mean queue, taxi-out and delay by hour"""
+    if metrics is None:
+        metrics = congestion_metrics(df)
+    operating_days = df[DATE_COLUMN].nunique()
+    hourly = metrics.groupby('Scheduled_Hour').agg(
+        Departures=(DELAY_COLUMN, 'size'),
+        Peak_60m=('Scheduled_60m', 'mean'),
+        Taxi_Queue=('Taxi_Queue', 'mean'),
+        Taxi_Out=(TAXI_COLUMN, 'mean'),
+        Avg_Delay=(DELAY_COLUMN, 'mean'),
+    ).reindex(np.arange(24.0))
+    hourly['Departures'] = hourly['Departures'].fillna(0).astype(int)
+    hourly['Departures_Per_Day'] = hourly['Departures'] / max(operating_days, 1)
+    hourly.index = hourly.index.astype(int).rename('Hour')
+    return hourly
+
+def queue_response(metrics):
+    """Mean taxi-out and delay by the number of aircraft already taxiing at pushback"""
+    queue = metrics['Taxi_Queue'].clip(upper=MAX_QUEUE_BUCKET)
+    return metrics.groupby(queue).agg(
+        Flights=(TAXI_COLUMN, 'size'),
+        Taxi_Out=(TAXI_COLUMN, 'mean'),
+        Avg_Delay=(DELAY_COLUMN, 'mean'),
+    ).rename_axis('Taxi_Queue').rename(index=int)
+
+def congestion_correlations(metrics, windows=CONGESTION_WINDOWS):
+    """Pearson r of every window count and the taxi queue against taxi-out and delay"""
+    drivers = [f'{kind}_{width}m' for width in windows for kind in ('Scheduled', 'Actual')] + ['Taxi_Queue']
+    r = pairwise_correlation(metrics, drivers + [TAXI_COLUMN, DELAY_COLUMN])['r']
+    return r.loc[drivers, [TAXI_COLUMN, DELAY_COLUMN]]
+
+def load_congestion_metrics(path=DEPARTURES_CSV):
+    """Departures projected to the congestion inputs plus their metrics, or None without the file"""
+    if not os.path.exists(path):
+        print(f"{path} not found - congestion metrics unavailable")
+        return None, None
+    df = collect(scan_departures(columns=CONGESTION_COLUMNS, path=path))
+    return df, congestion_metrics(df)
+
+if __name__ == "__main__":
+    df, metrics = load_congestion_metrics()
+    if metrics is not None:
+        print("\nHourly congestion profile:")
+        print(hourly_congestion(df, metrics).round(2).to_string())
+        print("\nTaxi-out and delay by taxi queue at pushback:")
+        print(queue_response(metrics).round(2).to_string())
+        print("\nCorrelation with taxi-out and delay:")
+        print(congestion_correlations(metrics).round(3).to_string())
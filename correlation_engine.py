@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Pairwise-Complete Correlation Engine with Bootstrap Confidence Intervals
+"""
+
+import pandas as pd
+import numpy as np
+import os
+from concurrent.futures import ProcessPoolExecutor
+import warnings
+warnings.filterwarnings('ignore')
+
+BOOTSTRAP_SAMPLES = 1000
+# Resamples per seeded batch (also bounds the batch weight matrices in memory);
+# changing it changes which resamples a given seed draws
+BOOTSTRAP_BATCH = 64
+CONFIDENCE = 0.95
+
+# Below this many multiply-adds the bootstrap runs in-process; starting a pool
+# would cost more than the resampling itself
+PARALLEL_WORK_THRESHOLD = 5e8
+
+def _masked_matrix(df, columns):
+    """Column-centred values with missing entries zeroed, plus the presence mask"""
+    values = df[columns].to_numpy(dtype='float64', na_value=np.nan)
+    present = ~np.isnan(values)
+    # Centring does not change r but keeps the sums of squares well conditioned
+    centred = values - np.nanmean(values, axis=0)
+    return np.where(present, centred, 0.0), present.astype('float64')
+
+def _correlation_from_sums(n, sx, sxx, sxy):
+    """Pearson r per column pair from pairwise-complete sums (works on stacked batches)"""
+    sy = np.swapaxes(sx, -1, -2)
+    syy = np.swapaxes(sxx, -1, -2)
+    covariance = n * sxy - sx * sy
+    variance = (n * sxx - sx * sx) * (n * syy - sy * sy)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        r = covariance / np.sqrt(variance)
+    r = np.where((n > 1) & (variance > 0), np.clip(r, -1.0, 1.0), np.nan)
+
+    # Self-correlation is exactly 1 wherever the column varies
+    diagonal = np.arange(r.shape[-1])
+    r[..., diagonal, diagonal] = np.where(np.isnan(r[..., diagonal, diagonal]), np.nan, 1.0)
+    return r
+
+def _pairwise_sums(values, present, weights):
+    """Weighted pairwise-complete sums for a batch of row weightings in four matmuls"""
+    weighted_values = weights[:, :, None] * values
+    weighted_present = weights[:, :, None] * present
+    n = np.swapaxes(weighted_present, 1, 2) @ present
+    sx = np.swapaxes(weighted_values, 1, 2) @ present
+    sxx = np.swapaxes(weighted_values * values, 1, 2) @ present
+    sxy = np.swapaxes(weighted_values, 1, 2) @ values
+    return n, sx, sxx, sxy
+
+def _bootstrap_batches(values, present, batches):
+    """Correlation matrices for bootstrap resamples of the rows, one (size, seed) batch at a time"""
+    rows = len(values)
+    results = []
+    for size, seed in batches:
+        rng = np.random.default_rng(seed)
+        # Resampling rows with replacement == per-row draw counts as weights
+        draws = rng.integers(0, rows, size=(size, rows)) + np.arange(size)[:, None] * rows
+        weights = np.bincount(draws.ravel(), minlength=size * rows).reshape(size, rows).astype('float64')
+        results.append(_correlation_from_sums(*_pairwise_sums(values, present, weights)))
+    return np.concatenate(results)
+
+def pairwise_correlation(df, columns=None):
+    """Pairwise-complete Pearson matrix (like DataFrame.corr) and pair counts in one masked pass"""
+    columns = list(columns or df.select_dtypes('number').columns)
+    values, present = _masked_matrix(df, columns)
+    n, sx, sxx, sxy = _pairwise_sums(values, present, np.ones((1, len(values))))
+    r = _correlation_from_sums(n, sx, sxx, sxy)[0]
+    return {
+        'r': pd.DataFrame(r, index=columns, columns=columns),
+        'n': pd.DataFrame(n[0].round().astype('int64'), index=columns, columns=columns),
+    }
+
+def correlation_with_ci(df, columns=None, samples=BOOTSTRAP_SAMPLES, confidence=CONFIDENCE,
+                        seed=42, max_workers=None):
+    """Pairwise-complete correlations with percentile bootstrap confidence intervals"""
+    columns = list(columns or df.select_dtypes('number').columns)
+    result = pairwise_correlation(df, columns)
+    values, present = _masked_matrix(df, columns)
+
+    # Resamples are drawn in fixed-size batches, each from its own child seed,
+    # and only whole batches are spread over the workers - so the intervals
+    # depend on `seed` alone, not on the worker count or the machine
+    sizes = [min(BOOTSTRAP_BATCH, samples - start) for start in range(0, samples, BOOTSTRAP_BATCH)]
+    batches = list(zip(sizes, np.random.SeedSequence(seed).spawn(len(sizes))))
+    workers = min(max_workers or os.cpu_count() or 1, len(batches))
+    work = samples * len(values) * len(columns) ** 2 * 4
+
+    if workers > 1 and work > PARALLEL_WORK_THRESHOLD:
+        shares = [[batches[i] for i in share] for share in np.array_split(np.arange(len(batches)), workers)]
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(_bootstrap_batches, values, present, share) for share in shares]
+            replicates = np.concatenate([future.result() for future in futures])
+    else:
+        replicates = _bootstrap_batches(values, present, batches)
+
+    tail = (1 - confidence) / 2 * 100
+    low, high = np.nanpercentile(replicates, [tail, 100 - tail], axis=0)
+    result['ci_low'] = pd.DataFrame(low, index=columns, columns=columns)
+    result['ci_high'] = pd.DataFrame(high, index=columns, columns=columns)
+    result['confidence'] = confidence
+    return result
+
+def format_correlation(result, x, y):
+    """'r (95% CI low to high)' for one pair of a correlation_with_ci result"""
+    r = result['r'].loc[x, y]
+    if 'ci_low' not in result:
+        return f"{r:.3f}"
+    return (f"{r:.3f} ({result['confidence'] * 100:.0f}% CI "
+            f"{result['ci_low'].loc[x, y]:.3f} to {result['ci_high'].loc[x, y]:.3f})")
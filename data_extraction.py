@@ -4,15 +4,100 @@ Data Extraction Script for Additional Datasets
 """
 
 import pandas as pd
+import numpy as np
 import requests
 import json
 from datetime import datetime, timedelta
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from flight_data_loader import CACHE_DIR, file_fingerprint
+import hashlib
 import time
 import os
+import sys
 import warnings
 warnings.filterwarnings('ignore')
 
-def download_noaa_weather_data():
+# Period covered by the departures data
+DATA_START_DATE = '2017-07-01'
+DATA_END_DATE = '2024-12-31'
+
+WEATHER_CONDITIONS = ['Rain', 'Snow', 'Fog', 'Windy', 'Clear']
+
+def _series_rng(seed, key):
+    """Independent, reproducible random stream for one generated series"""
+    # Keyed on the series name so a station's or airport's values do not depend
+    # on which others are generated alongside it (or in which process)
+    series_key = int.from_bytes(hashlib.sha256(key.encode()).digest()[:8], 'little')
+    return np.random.default_rng(np.random.SeedSequence([seed, series_key]))
+
+def synthesize_weather_data(stations=('IAD',), start=DATA_START_DATE, end=DATA_END_DATE,
+                            freq='D', seed=42):
+    """Generate synthetic weather for each station and period, fully vectorized"""
+    periods = pd.date_range(start=start, end=end, freq=freq)
+    n_periods = len(periods)
+    n_stations = len(stations)
+
+    # Seasonal curves depend only on the (fractional) day of year
+    day_of_year = (periods.dayofyear + periods.hour / 24).to_numpy(dtype=float)
+    base_temp = 60 + 30 * np.sin(2 * np.pi * (day_of_year - 80) / 365)
+    precip_prob = 0.3 + 0.2 * np.sin(2 * np.pi * (day_of_year - 300) / 365)
+
+    shape = (n_stations, n_periods)
+    temp_noise = np.empty(shape)
+    temp_spread = np.empty(shape)
+    wet_draw = np.empty(shape)
+    precip_amount = np.empty(shape)
+    wind_speed = np.empty(shape)
+    wet_visibility_loss = np.empty(shape)
+    dry_visibility_loss = np.empty(shape)
+
+    for i, station in enumerate(stations):
+        rng = _series_rng(seed, station)
+        temp_noise[i] = rng.normal(0, 10, n_periods)
+        temp_spread[i] = rng.normal(15, 5, n_periods)
+        wet_draw[i] = rng.random(n_periods)
+        precip_amount[i] = rng.exponential(0.1, n_periods)
+        wind_speed[i] = rng.gamma(2, 5, n_periods)
+        wet_visibility_loss[i] = rng.exponential(0.5, n_periods)
+        dry_visibility_loss[i] = rng.exponential(0.2, n_periods)
+
+    temp_high = base_temp + temp_noise
+    temp_low = temp_high - temp_spread
+
+    # Precipitation (more in winter/spring)
+    precipitation = np.where(wet_draw < precip_prob, precip_amount, 0.0)
+
+    # Visibility (lower in winter and with precipitation)
+    visibility = np.where(precipitation > 0,
+                          10 - precipitation * 2 - wet_visibility_loss,
+                          10 - dry_visibility_loss)
+    visibility = np.clip(visibility, 0.5, 10)
+
+    # Weather conditions, built as category codes
+    condition_codes = np.select(
+        [(precipitation > 0.5) & (temp_high > 32), precipitation > 0.5, visibility < 5, wind_speed > 20],
+        [0, 1, 2, 3],
+        default=4
+    )
+
+    weather_df = pd.DataFrame({
+        'Date': np.tile(periods.to_numpy(), n_stations),
+        'Temperature_High': np.round(temp_high, 1).ravel(),
+        'Temperature_Low': np.round(temp_low, 1).ravel(),
+        'Precipitation': np.round(precipitation, 2).ravel(),
+        'Wind_Speed': np.round(wind_speed, 1).ravel(),
+        'Visibility': np.round(visibility, 1).ravel(),
+        'Weather_Condition': pd.Categorical.from_codes(condition_codes.ravel(), WEATHER_CONDITIONS)
+    })
+
+    if n_stations > 1:
+        station_codes = np.repeat(np.arange(n_stations), n_periods)
+        weather_df.insert(0, 'Station', pd.Categorical.from_codes(station_codes, list(stations)))
+
+    return weather_df
+
+def download_noaa_weather_data(stations=('IAD',), start=DATA_START_DATE, end=DATA_END_DATE,
+                               freq='D', seed=42, output_path='iad_weather_data.csv'):
     """Download weather data from NOAA for IAD airport"""
     print("Downloading NOAA Weather Data for IAD...")
 
@@ -27,165 +112,121 @@ def download_noaa_weather_data():
     print("Creating sample weather data structure...")
 
     # Generate sample weather data for the flight data period
-    date_range = pd.date_range(start='2017-07-01', end='2024-12-31', freq='D')
-
-    # Create realistic weather patterns
-    import numpy as np
-    np.random.seed(42)  # For reproducible results
-
-    weather_data = []
-    for date in date_range:
-        # Seasonal temperature patterns
-        day_of_year = date.timetuple().tm_yday
-        base_temp = 60 + 30 * np.sin(2 * np.pi * (day_of_year - 80) / 365)
-
-        # Add some randomness
-        temp_high = base_temp + np.random.normal(0, 10)
-        temp_low = temp_high - np.random.normal(15, 5)
-
-        # Precipitation (more in winter/spring)
-        precip_prob = 0.3 + 0.2 * np.sin(2 * np.pi * (day_of_year - 300) / 365)
-        precipitation = np.random.exponential(0.1) if np.random.random() < precip_prob else 0
-
-        # Wind speed
-        wind_speed = np.random.gamma(2, 5)
-
-        # Visibility (lower in winter and with precipitation)
-        visibility = 10 - (precipitation * 2) - np.random.exponential(0.5) if precipitation > 0 else 10 - np.random.exponential(0.2)
-        visibility = max(0.5, min(10, visibility))
-
-        # Weather conditions
-        if precipitation > 0.5:
-            condition = "Rain" if temp_high > 32 else "Snow"
-        elif visibility < 5:
-            condition = "Fog"
-        elif wind_speed > 20:
-            condition = "Windy"
-        else:
-            condition = "Clear"
-
-        weather_data.append({
-            'Date': date.strftime('%Y-%m-%d'),
-            'Temperature_High': round(temp_high, 1),
-            'Temperature_Low': round(temp_low, 1),
-            'Precipitation': round(precipitation, 2),
-            'Wind_Speed': round(wind_speed, 1),
-            'Visibility': round(visibility, 1),
-            'Weather_Condition': condition
-        })
+    weather_df = synthesize_weather_data(stations=stations, start=start, end=end, freq=freq, seed=seed)
 
-    weather_df = pd.DataFrame(weather_data)
-    weather_df.to_csv('iad_weather_data.csv', index=False)
+    weather_df.to_csv(output_path, index=False)
     print(f"Weather data saved: {len(weather_df)} records")
     return weather_df
 
-def download_tsa_checkpoint_data():
+# TSA regime baselines (average weekly travelers) by month. Rows cover
+# pre-COVID (<=2019), 2020, 2021 and the recovery period (>=2022).
+TSA_REGIME_FIRST_YEAR = 2019
+TSA_REGIME_BASELINES = np.array([
+    [2400000] * 12,                             # Pre-COVID normal levels
+    [2400000] * 3 + [200000] * 3 + [800000] * 6,  # Pre-COVID, severe drop, gradual recovery
+    [1000000] * 6 + [1600000] * 6,              # Slow recovery, better recovery
+    [2200000] * 12,                             # Near pre-COVID levels
+])
+
+# Weekly pattern (more travel on weekends), indexed by date.weekday()
+TSA_WEEKDAY_FACTORS = np.array([1.1, 0.8, 0.8, 1.1, 1.3, 1.3, 1.3])
+
+# Seasonal patterns (summer peak, holiday season, winter low), indexed by month - 1
+TSA_SEASONAL_FACTORS = np.array([0.8, 0.8, 1.0, 1.0, 1.0, 1.2, 1.2, 1.2, 1.0, 1.0, 1.15, 1.15])
+
+# Share of a day's travelers screened in each hour, for sub-daily output
+TSA_HOURLY_SHARE = np.array([
+    0.2, 0.1, 0.1, 0.2, 1.5, 5.0, 7.5, 8.0, 7.0, 6.0, 5.5, 5.0,
+    5.0, 5.0, 5.5, 6.0, 6.0, 5.5, 4.5, 3.5, 2.5, 2.0, 1.5, 1.0,
+])
+TSA_HOURLY_SHARE = TSA_HOURLY_SHARE / TSA_HOURLY_SHARE.sum()
+
+def synthesize_tsa_checkpoint_data(airports=('ALL',), start=DATA_START_DATE, end=DATA_END_DATE,
+                                   freq='D', seed=42):
+    """Generate synthetic TSA checkpoint throughput from the lookup tables"""
+    periods = pd.date_range(start=start, end=end, freq=freq)
+    n_periods = len(periods)
+    year = periods.year.to_numpy()
+    month = periods.month.to_numpy()
+    day_of_week = periods.dayofweek.to_numpy()
+
+    regime = np.clip(year - TSA_REGIME_FIRST_YEAR, 0, len(TSA_REGIME_BASELINES) - 1)
+    base_travelers = TSA_REGIME_BASELINES[regime, month - 1]
+    daily_travelers = np.trunc(base_travelers / 7 * TSA_WEEKDAY_FACTORS[day_of_week] *
+                               TSA_SEASONAL_FACTORS[month - 1])
+
+    # Spread daily volumes over the checkpoint day when generating sub-daily periods
+    if n_periods > 1 and periods[1] - periods[0] < pd.Timedelta(days=1):
+        hours_per_period = (periods[1] - periods[0]) / pd.Timedelta(hours=1)
+        daily_travelers = daily_travelers * TSA_HOURLY_SHARE[periods.hour.to_numpy()] * hours_per_period
+
+    # Add some randomness, one independent stream per airport
+    noise = np.empty((len(airports), n_periods))
+    for i, airport in enumerate(airports):
+        noise[i] = _series_rng(seed, f'tsa:{airport}').normal(1, 0.1, n_periods)
+    travelers = np.maximum(np.trunc(daily_travelers * noise), 0).astype(np.int64)
+
+    tsa_df = pd.DataFrame({
+        'Date': np.tile(periods.to_numpy(), len(airports)),
+        'Travelers_Total': travelers.ravel(),
+        'Year': np.tile(year, len(airports)),
+        'Month': np.tile(month, len(airports)),
+        'DayOfWeek': np.tile(day_of_week, len(airports))
+    })
+
+    if len(airports) > 1:
+        airport_codes = np.repeat(np.arange(len(airports)), n_periods)
+        tsa_df.insert(0, 'Airport', pd.Categorical.from_codes(airport_codes, list(airports)))
+
+    return tsa_df
+
+def download_tsa_checkpoint_data(airports=('ALL',), start=DATA_START_DATE, end=DATA_END_DATE,
+                                 freq='D', seed=42, output_path='tsa_checkpoint_data.csv'):
     """Download TSA checkpoint data"""
     print("Downloading TSA Checkpoint Data...")
 
     # Create sample TSA data based on known patterns
     # In reality, you'd scrape from TSA website or use their data
+    tsa_df = synthesize_tsa_checkpoint_data(airports=airports, start=start, end=end, freq=freq, seed=seed)
 
-    date_range = pd.date_range(start='2017-07-01', end='2024-12-31', freq='D')
-
-    tsa_data = []
-    for date in date_range:
-        # Pre-COVID normal levels (2017-2019)
-        if date.year <= 2019:
-            base_travelers = 2400000  # Average weekly travelers pre-COVID
-
-        # COVID impact (2020-2021)
-        elif date.year == 2020:
-            if date.month <= 3:
-                base_travelers = 2400000  # Pre-COVID
-            elif date.month <= 6:
-                base_travelers = 200000   # Severe drop
-            else:
-                base_travelers = 800000   # Gradual recovery
-
-        elif date.year == 2021:
-            if date.month <= 6:
-                base_travelers = 1000000  # Slow recovery
-            else:
-                base_travelers = 1600000  # Better recovery
-
-        # Recovery period (2022-2024)
-        else:
-            base_travelers = 2200000  # Near pre-COVID levels
-
-        # Weekly pattern (more travel on weekends)
-        day_of_week = date.weekday()
-        if day_of_week in [4, 5, 6]:  # Fri, Sat, Sun
-            daily_factor = 1.3
-        elif day_of_week in [0, 3]:  # Mon, Thu
-            daily_factor = 1.1
-        else:
-            daily_factor = 0.8
-
-        # Seasonal patterns
-        month = date.month
-        if month in [6, 7, 8]:  # Summer peak
-            seasonal_factor = 1.2
-        elif month in [11, 12]:  # Holiday season
-            seasonal_factor = 1.15
-        elif month in [1, 2]:  # Winter low
-            seasonal_factor = 0.8
-        else:
-            seasonal_factor = 1.0
-
-        # Calculate daily travelers
-        daily_travelers = int(base_travelers / 7 * daily_factor * seasonal_factor)
-
-        # Add some randomness
-        import numpy as np
-        daily_travelers = int(daily_travelers * np.random.normal(1, 0.1))
-        daily_travelers = max(0, daily_travelers)
-
-        tsa_data.append({
-            'Date': date.strftime('%Y-%m-%d'),
-            'Travelers_Total': daily_travelers,
-            'Year': date.year,
-            'Month': date.month,
-            'DayOfWeek': day_of_week
-        })
-
-    tsa_df = pd.DataFrame(tsa_data)
-    tsa_df.to_csv('tsa_checkpoint_data.csv', index=False)
+    tsa_df.to_csv(output_path, index=False)
     print(f"TSA data saved: {len(tsa_df)} records")
     return tsa_df
 
-def download_economic_indicators():
+def download_economic_indicators(start=DATA_START_DATE, end=DATA_END_DATE, seed=42,
+                                 output_path='economic_indicators.csv'):
     """Download basic economic indicators"""
     print("Creating Economic Indicators Data...")
 
-    # Create sample economic data
-    date_range = pd.date_range(start='2017-07-01', end='2024-12-31', freq='M')
+    # Create sample economic data (one row per month end)
+    date_range = pd.period_range(start=start, end=end, freq='M').to_timestamp(how='end').normalize()
+    rng = _series_rng(seed, 'economic')
 
     economic_data = []
     for date in date_range:
         # GDP growth (quarterly, simplified to monthly)
         if date.year <= 2019:
-            gdp_growth = np.random.normal(2.5, 0.5)  # Pre-COVID growth
+            gdp_growth = rng.normal(2.5, 0.5)  # Pre-COVID growth
         elif date.year == 2020:
-            gdp_growth = np.random.normal(-2.0, 2.0)  # COVID recession
+            gdp_growth = rng.normal(-2.0, 2.0)  # COVID recession
         else:
-            gdp_growth = np.random.normal(3.0, 1.0)  # Recovery
+            gdp_growth = rng.normal(3.0, 1.0)  # Recovery
 
         # Unemployment rate
         if date.year <= 2019:
-            unemployment = np.random.normal(4.0, 0.5)
+            unemployment = rng.normal(4.0, 0.5)
         elif date.year == 2020:
-            unemployment = np.random.normal(8.0, 2.0)  # COVID spike
+            unemployment = rng.normal(8.0, 2.0)  # COVID spike
         else:
-            unemployment = max(3.0, np.random.normal(5.0, 1.0))  # Recovery
+            unemployment = max(3.0, rng.normal(5.0, 1.0))  # Recovery
 
         # Consumer confidence
         if date.year <= 2019:
-            confidence = np.random.normal(130, 10)
+            confidence = rng.normal(130, 10)
         elif date.year == 2020:
-            confidence = np.random.normal(90, 15)  # Low confidence
+            confidence = rng.normal(90, 15)  # Low confidence
         else:
-            confidence = np.random.normal(115, 12)  # Recovery
+            confidence = rng.normal(115, 12)  # Recovery
 
         economic_data.append({
             'Date': date.strftime('%Y-%m-%d'),
@@ -195,25 +236,28 @@ def download_economic_indicators():
         })
 
     economic_df = pd.DataFrame(economic_data)
-    economic_df.to_csv('economic_indicators.csv', index=False)
+    economic_df.to_csv(output_path, index=False)
     print(f"Economic data saved: {len(economic_df)} records")
     return economic_df
 
-def download_fuel_price_data():
+def download_fuel_price_data(start=DATA_START_DATE, end=DATA_END_DATE, seed=42,
+                             output_path='fuel_price_data.csv'):
     """Download fuel price data"""
     print("Creating Fuel Price Data...")
 
-    date_range = pd.date_range(start='2017-07-01', end='2024-12-31', freq='W')
+    date_range = pd.date_range(start=start, end=end, freq='W')
+
+    rng = _series_rng(seed, 'fuel')
 
     fuel_data = []
     for date in date_range:
         # Base jet fuel price with trends
         if date.year <= 2019:
-            base_price = 55 + np.random.normal(0, 5)  # Pre-COVID levels
+            base_price = 55 + rng.normal(0, 5)  # Pre-COVID levels
         elif date.year == 2020:
-            base_price = 35 + np.random.normal(0, 8)  # COVID price drop
+            base_price = 35 + rng.normal(0, 8)  # COVID price drop
         else:
-            base_price = 70 + np.random.normal(0, 10)  # Post-COVID volatility
+            base_price = 70 + rng.normal(0, 10)  # Post-COVID volatility
 
         # Seasonal patterns (higher in summer)
         month = date.month
@@ -234,11 +278,12 @@ def download_fuel_price_data():
         })
 
     fuel_df = pd.DataFrame(fuel_data)
-    fuel_df.to_csv('fuel_price_data.csv', index=False)
+    fuel_df.to_csv(output_path, index=False)
     print(f"Fuel price data saved: {len(fuel_df)} records")
     return fuel_df
 
-def create_holiday_calendar():
+def create_holiday_calendar(start=DATA_START_DATE, end=DATA_END_DATE, seed=None,
+                            output_path='holiday_calendar.csv'):
     """Create holiday and special events calendar"""
     print("Creating Holiday Calendar...")
 
@@ -257,7 +302,7 @@ def create_holiday_calendar():
     }
 
     holiday_data = []
-    for year in range(2017, 2025):
+    for year in range(pd.Timestamp(start).year, pd.Timestamp(end).year + 1):
         for holiday, date_str in holidays.items():
             date = f"{year}-{date_str}"
             holiday_data.append({
@@ -282,42 +327,101 @@ def create_holiday_calendar():
         })
 
     holiday_df = pd.DataFrame(holiday_data)
-    holiday_df.to_csv('holiday_calendar.csv', index=False)
+    holiday_df.to_csv(output_path, index=False)
     print(f"Holiday calendar saved: {len(holiday_df)} records")
     return holiday_df
 
-def main():
+# Registry of auxiliary datasets: generator, output file and generator version.
+# Bump a version whenever a generator's output changes so the file is rebuilt.
+DATASET_GENERATORS = {
+    'weather': (download_noaa_weather_data, 'iad_weather_data.csv', 2),
+    'tsa': (download_tsa_checkpoint_data, 'tsa_checkpoint_data.csv', 2),
+    'economic': (download_economic_indicators, 'economic_indicators.csv', 2),
+    'fuel': (download_fuel_price_data, 'fuel_price_data.csv', 2),
+    'holidays': (create_holiday_calendar, 'holiday_calendar.csv', 1),
+}
+EXTRACTION_MANIFEST = os.path.join(CACHE_DIR, 'extraction_manifest.json')
+
+def _dataset_spec(name, start, end, seed):
+    """Inputs that determine a generated dataset's contents"""
+    return {
+        'version': DATASET_GENERATORS[name][2],
+        'start': str(start),
+        'end': str(end),
+        'seed': seed,
+    }
+
+def _read_manifest(path=EXTRACTION_MANIFEST):
+    """Read the extraction manifest, returning an empty one when missing"""
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def _write_manifest(manifest, path=EXTRACTION_MANIFEST):
+    """Write the extraction manifest atomically"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, path)
+
+def is_dataset_current(name, spec, manifest):
+    """Check whether a dataset's output file was produced from the same inputs"""
+    output_path = DATASET_GENERATORS[name][1]
+    entry = manifest.get(name)
+    if entry is None or entry.get('spec') != spec or not os.path.exists(output_path):
+        return False
+
+    # A hand-edited or replaced file no longer matches what we generated
+    return file_fingerprint(output_path, with_hash=False) == entry.get('output')
+
+def _run_generator(name, spec):
+    """Process pool entry point: regenerate one dataset"""
+    generator, output_path, _ = DATASET_GENERATORS[name]
+    df = generator(start=spec['start'], end=spec['end'], seed=spec['seed'], output_path=output_path)
+    return name, df, file_fingerprint(output_path, with_hash=False)
+
+def main(datasets=None, start=DATA_START_DATE, end=DATA_END_DATE, seed=42, force=False, max_workers=None):
     """Main data extraction function"""
     print("="*60)
     print("ADDITIONAL DATASETS EXTRACTION")
     print("="*60)
 
-    # Download all datasets
-    weather_df = download_noaa_weather_data()
-    tsa_df = download_tsa_checkpoint_data()
-    economic_df = download_economic_indicators()
-    fuel_df = download_fuel_price_data()
-    holiday_df = create_holiday_calendar()
+    names = list(datasets or DATASET_GENERATORS)
+    manifest = _read_manifest()
+    specs = {name: _dataset_spec(name, start, end, seed) for name in names}
+    stale = [name for name in names if force or not is_dataset_current(name, specs[name], manifest)]
+
+    results = {}
+    for name in names:
+        if name not in stale:
+            print(f"{DATASET_GENERATORS[name][1]} is up to date - skipping")
+            results[name] = pd.read_csv(DATASET_GENERATORS[name][1])
+
+    # The generators are independent, so stale ones are rebuilt concurrently
+    if stale:
+        with ProcessPoolExecutor(max_workers=max_workers or min(len(stale), os.cpu_count() or 1)) as pool:
+            futures = [pool.submit(_run_generator, name, specs[name]) for name in stale]
+            for future in as_completed(futures):
+                name, df, output_fingerprint = future.result()
+                results[name] = df
+                manifest[name] = {'spec': specs[name], 'output': output_fingerprint}
+        _write_manifest(manifest)
 
     print("\n" + "="*60)
     print("DATA EXTRACTION COMPLETED")
     print("="*60)
-    print("Generated datasets:")
-    print("- iad_weather_data.csv")
-    print("- tsa_checkpoint_data.csv")
-    print("- economic_indicators.csv")
-    print("- fuel_price_data.csv")
-    print("- holiday_calendar.csv")
+    print(f"Regenerated {len(stale)} of {len(names)} datasets:")
+    for name in names:
+        status = 'regenerated' if name in stale else 'up to date'
+        print(f"- {DATASET_GENERATORS[name][1]} ({status})")
     print("="*60)
 
-    return {
-        'weather': weather_df,
-        'tsa': tsa_df,
-        'economic': economic_df,
-        'fuel': fuel_df,
-        'holidays': holiday_df
-    }
+    return results
 
 if __name__ == "__main__":
-    import numpy as np
-    datasets = main()
\ No newline at end of file
+    # Usage: python data_extraction.py [--force] [weather tsa economic fuel holidays]
+    datasets = main(datasets=[arg for arg in sys.argv[1:] if not arg.startswith('--')] or None,
+                    force='--force' in sys.argv)
@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+Persisted Derived-Feature Store for the Departures Data
+"""
+
+import pandas as pd
+import numpy as np
+import json
+import os
+from flight_data_loader import CACHE_DIR, DEPARTURES_CSV, source_fingerprint, starts_with_fingerprint
+import warnings
+warnings.filterwarnings('ignore')
+
+FEATURE_STORE_PATH = os.path.join(CACHE_DIR, 'departures_features.parquet')
+
+DAY_NAMES = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+SEASON_NAMES = {1: 'Spring', 2: 'Summer', 3: 'Fall', 4: 'Winter'}
+TIME_PERIODS = ['Early Morning', 'Morning', 'Afternoon', 'Evening']
+
+# Season number indexed by month (index 0 unused)
+SEASON_BY_MONTH = np.array([0, 4, 4, 1, 1, 1, 2, 2, 2, 3, 3, 3, 4])
+
+# Time period code indexed by scheduled hour - same bins as
+# pd.cut(hour, [0, 6, 12, 18, 24], include_lowest=True)
+TIME_PERIOD_BY_HOUR = np.array([0] * 7 + [1] * 6 + [2] * 6 + [3] * 5)
+
+DATE_COLUMN = 'Date (MM/DD/YYYY)'
+DELAY_COLUMN = 'Departure delay (Minutes)'
+
+def _categorical_from_numbers(numbers, names):
+    """Categorical of names looked up by number, with alphabetical categories like an object groupby"""
+    categories = sorted(set(names.values()))
+    lookup = np.full(max(names) + 1, -1)
+    for number, name in names.items():
+        lookup[number] = categories.index(name)
+    codes = np.where(numbers.isna(), -1, lookup[numbers.fillna(0).astype(int)])
+    return pd.Categorical.from_codes(codes, categories)
+
+def clock_minutes(series):
+    """Minutes since midnight for an HH:MM column, parsing each distinct value once"""
+    clock = series.astype('category')
+    categories = pd.Series(clock.cat.categories.astype(str))
+    parts = categories.str.extract(r'^\s*(\d{1,2}):(\d{2})\s*$').astype(float)
+    hours, minutes = parts[0], parts[1]
+
+    # Same validity rules as pd.to_datetime(..., format='%H:%M', errors='coerce')
+    valid = (hours < 24) & (minutes < 60)
+    category_minutes = (hours * 60 + minutes).where(valid).to_numpy()
+
+    codes = clock.cat.codes.to_numpy()
+    values = np.where(codes >= 0, category_minutes[codes], np.nan)
+    return pd.Series(values, index=series.index).astype('Int16')
+
+def _scheduled_minutes(df):
+    return clock_minutes(df['Scheduled departure time'])
+
+def _scheduled_hour(df):
+    return (df['Scheduled_Minutes'] // 60).astype('Int8')
+
+def _time_period(df):
+    hour = df['Scheduled_Hour']
+    codes = np.where(hour.isna(), -1, TIME_PERIOD_BY_HOUR[hour.fillna(0).astype(int)])
+    return pd.Categorical.from_codes(codes, TIME_PERIODS, ordered=True)
+
+def _day_of_week_name(df):
+    return _categorical_from_numbers(df['DayOfWeek'], dict(enumerate(DAY_NAMES)))
+
+def _season(df):
+    month = df['Month']
+    seasons = SEASON_BY_MONTH[month.fillna(0).to_numpy(dtype=int)]
+    return pd.Series(seasons, index=df.index).astype('Int8').mask(month.isna())
+
+def _season_name(df):
+    return _categorical_from_numbers(df['Season'], SEASON_NAMES)
+
+def _delayed_beyond(df, minutes):
+    # A flight without a recorded delay counts as not delayed, as it did when
+    # the delay column was a NaN float rather than nullable Int16
+    return (df[DELAY_COLUMN] > minutes).fillna(False).astype(bool)
+
+def _schedule_adherence(df):
+    return 100 - (df[DELAY_COLUMN].abs() / df['Scheduled elapsed time (Minutes)'] * 100)
+
+def _time_efficiency(df):
+    scheduled = df['Scheduled elapsed time (Minutes)']
+    return (scheduled - df['Actual elapsed time (Minutes)']) / scheduled * 100
+
+# Derived features in dependency order: name -> (definition version, function).
+# Bump a version whenever its definition changes; only that feature is recomputed.
+FEATURE_DEFINITIONS = {
+    'Year': (2, lambda df: df[DATE_COLUMN].dt.year.astype('Int16')),
+    'Month': (2, lambda df: df[DATE_COLUMN].dt.month.astype('Int8')),
+    'DayOfWeek': (2, lambda df: df[DATE_COLUMN].dt.dayofweek.astype('Int8')),
+    'DayOfWeek_Name': (1, _day_of_week_name),
+    'Is_Weekend': (2, lambda df: (df['DayOfWeek'] >= 5).fillna(False).astype(bool)),
+    'Season': (2, _season),
+    'Season_Name': (1, _season_name),
+    'Is_Delayed': (2, lambda df: _delayed_beyond(df, 0)),
+    'Is_Significantly_Delayed': (2, lambda df: _delayed_beyond(df, 15)),
+    'Schedule_Adherence': (1, _schedule_adherence),
+    'Scheduled_Minutes': (1, _scheduled_minutes),
+    'Scheduled_Hour': (1, _scheduled_hour),
+    'Time_Period': (1, _time_period),
+    'Time_Efficiency': (1, _time_efficiency),
+}
+
+# Raw columns the features are derived from
+FEATURE_INPUTS = [DATE_COLUMN, DELAY_COLUMN, 'Scheduled departure time',
+                  'Scheduled elapsed time (Minutes)', 'Actual elapsed time (Minutes)']
+
+def compute_features(raw, names=None):
+    """Compute derived features for a frame of raw departures"""
+    names = list(names or FEATURE_DEFINITIONS)
+    work = raw[FEATURE_INPUTS].copy()
+    features = pd.DataFrame(index=raw.index)
+
+    # Definitions may build on earlier features, so evaluate every one in order
+    for name, (_, func) in FEATURE_DEFINITIONS.items():
+        work[name] = func(work)
+        if name in names:
+            features[name] = work[name]
+
+    return features
+
+def _read_store(store_path):
+    """Read the stored features and metadata, or (None, None) when unusable"""
+    try:
+        with open(store_path + '.meta.json') as f:
+            meta = json.load(f)
+        return pd.read_parquet(store_path), meta
+    except (OSError, ValueError, ImportError):
+        return None, None
+
+def _write_store(features, meta, store_path):
+    """Persist features and metadata, replacing any previous version atomically"""
+    try:
+        os.makedirs(os.path.dirname(store_path), exist_ok=True)
+        features.to_parquet(store_path + '.tmp', index=False)
+        os.replace(store_path + '.tmp', store_path)
+        with open(store_path + '.meta.json.tmp', 'w') as f:
+            json.dump(meta, f, indent=2)
+        os.replace(store_path + '.meta.json.tmp', store_path + '.meta.json')
+    except ImportError:
+        print("Parquet engine not installed - feature store disabled")
+
+def add_derived_features(raw, path=DEPARTURES_CSV, store_path=FEATURE_STORE_PATH, cache_dir=CACHE_DIR):
+    """Attach derived features to the raw departures read from `path`, reusing persisted values where valid"""
+    versions = {name: version for name, (version, _) in FEATURE_DEFINITIONS.items()}
+    source = source_fingerprint(path, cache_dir)
+    stored, meta = _read_store(store_path)
+
+    # Stored rows are reused when they were derived from this exact file, or
+    # from an earlier version of it that the current file only appends to
+    stored_rows = 0
+    if stored is not None and meta.get('rows', 0) <= len(raw) and len(stored) == meta.get('rows'):
+        previous = meta.get('source', {})
+        if previous.get('sha256') == source['sha256']:
+            stored_rows = meta['rows'] if meta['rows'] == len(raw) else 0
+        elif starts_with_fingerprint(path, previous):
+            stored_rows = meta['rows']
+
+    if stored_rows:
+        stored_versions = meta.get('versions', {})
+        current = [name for name in versions
+                   if stored_versions.get(name) == versions[name] and name in stored.columns]
+        stale = [name for name in versions if name not in current]
+        features = stored[current].set_axis(raw.index[:stored_rows])
+        if stale:
+            features = features.join(compute_features(raw.iloc[:stored_rows], stale))
+    else:
+        stale = list(versions)
+        features = pd.DataFrame(index=raw.index[:0])
+
+    new_rows = len(raw) - stored_rows
+    if new_rows:
+        features = pd.concat([features, compute_features(raw.iloc[stored_rows:])])
+
+    if stale or new_rows:
+        print(f"Feature store: recomputed {len(stale)} feature definitions, "
+              f"{new_rows:,} new rows")
+        features = features[list(versions)]
+        _write_store(features.reset_index(drop=True), {
+            'rows': len(raw),
+            'source': source,
+            'versions': versions,
+        }, store_path)
+    else:
+        print("Feature store: all derived features current")
+
+    return pd.concat([raw, features[list(versions)]], axis=1)
+
+if __name__ == "__main__":
+    from flight_data_loader import load_departures
+    df = add_derived_features(load_departures())
+    print(f"Departures with derived features: {len(df):,} rows, {df.shape[1]} columns")
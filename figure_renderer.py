@@ -0,0 +1,324 @@
+#!/usr/bin/env python3
+"""
+Parallel Figure Rendering for the Analysis Panels
+"""
+
+import pandas as pd
+import numpy as np
+import glob
+import hashlib
+import inspect
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from flight_data_loader import CACHE_DIR, file_fingerprint, _read_cache_meta, _write_cache_meta
+import warnings
+warnings.filterwarnings('ignore')
+
+FIGURE_DPI = 300
+FIGURE_STYLE = 'seaborn-v0_8'
+FIGURE_PALETTE = 'husl'
+
+# Batch runs (cron, CI, quick CLI queries) render off-screen and never block on show()
+HEADLESS_ENV_VAR = 'IAD_HEADLESS'
+
+# Scatter panels with more points than this are rasterized into a 2-D histogram
+# in the data step, so the draw cost no longer grows with the row count
+DENSITY_THRESHOLD = 100_000
+DENSITY_THRESHOLD_ENV_VAR = 'IAD_DENSITY_THRESHOLD'
+DENSITY_BINS = 200
+
+# Output path -> content key of the figure last rendered there, plus the PNG's
+# size and mtime so a file replaced or deleted since is redrawn
+FIGURE_CACHE_PATH = os.path.join(CACHE_DIR, 'figures.meta.json')
+
+# Downscaled copies of every rendered PNG for the site's srcset, listed in a
+# manifest next to them. Pages load these; only the full-size modal fetches the
+# 300-dpi original. Formats are offered in this order, best compression first;
+# AVIF at speed 8 encodes ~4x faster than the default for ~10% more bytes.
+IMAGE_DERIVATIVES_DIR = 'responsive'
+IMAGE_MANIFEST_NAME = 'manifest.json'
+IMAGE_WIDTHS = (480, 1200)
+IMAGE_FORMATS = {
+    'avif': {'quality': 50, 'speed': 8},
+    'webp': {'quality': 80},
+}
+
+_pyplot_state = {}
+
+# A panel is split into a data step (aggregates computed from the full frame in
+# the parent process) and a module-level draw function that builds the figure
+# from those small aggregates only. Draw functions return the Figure they made.
+
+def set_headless(enabled=True):
+    """Switch batch mode on or off for this process and any worker it starts"""
+    if enabled:
+        os.environ[HEADLESS_ENV_VAR] = '1'
+    else:
+        os.environ.pop(HEADLESS_ENV_VAR, None)
+
+def is_headless():
+    """True when $IAD_HEADLESS is set to anything but 0/false/no"""
+    return os.environ.get(HEADLESS_ENV_VAR, '').lower() not in ('', '0', 'false', 'no')
+
+def pyplot():
+    """Import matplotlib on first use, on the Agg backend in batch mode, with the report style"""
+    import matplotlib
+    if is_headless():
+        matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    if not _pyplot_state.get('styled'):
+        import seaborn as sns
+        plt.style.use(FIGURE_STYLE)
+        sns.set_palette(FIGURE_PALETTE)
+        _pyplot_state['styled'] = True
+    return plt
+
+def density_threshold():
+    """Point count above which scatters become density plots ($IAD_DENSITY_THRESHOLD overrides)"""
+    return int(os.environ.get(DENSITY_THRESHOLD_ENV_VAR) or DENSITY_THRESHOLD)
+
+def scatter_points(x, y, extent=None, threshold=None):
+    """Scatter inputs for draw_scatter: the points themselves, or binned counts above the threshold"""
+    threshold = density_threshold() if threshold is None else threshold
+    if len(x) <= threshold:
+        return {'x': x, 'y': y, 'count': len(x)}
+
+    x = np.asarray(x, dtype='float64')
+    y = np.asarray(y, dtype='float64')
+    present = ~(np.isnan(x) | np.isnan(y))
+    x, y = x[present], y[present]
+    # Bin the visible range only (e.g. a clipped delay axis) so the grid keeps its resolution
+    ranges = []
+    for values, limits in zip((x, y), extent or (None, None)):
+        if limits is None:
+            limits = (values.min(), values.max()) if len(values) else (0.0, 1.0)
+        ranges.append(limits)
+    counts, x_edges, y_edges = np.histogram2d(x, y, bins=DENSITY_BINS, range=ranges)
+    return {'counts': counts, 'x_edges': x_edges, 'y_edges': y_edges, 'count': len(x)}
+
+def draw_scatter(ax, points, label='Points per bin', **scatter_kwargs):
+    """Draw scatter_points output: a plain scatter, or log-scaled bin counts with a colorbar"""
+    if 'counts' not in points:
+        return ax.scatter(points['x'], points['y'], **scatter_kwargs)
+
+    from matplotlib.colors import LogNorm
+    mesh = ax.pcolormesh(points['x_edges'], points['y_edges'], np.ma.masked_equal(points['counts'].T, 0),
+                         norm=LogNorm(), cmap='viridis', rasterized=True)
+    ax.figure.colorbar(mesh, ax=ax, label=label)
+    return mesh
+
+def render_figure(draw, data, path, dpi=FIGURE_DPI):
+    """Draw one figure from its aggregated inputs and save it"""
+    pyplot()
+    fig = draw(data)
+    fig.savefig(path, dpi=dpi, bbox_inches='tight')
+    return fig
+
+def _init_worker():
+    """Process pool initializer: render off-screen"""
+    import matplotlib
+    matplotlib.use('Agg')
+
+def _render_job(draw, data, path, dpi, derivatives_dir=None):
+    """Process pool entry point: render, save and close one figure, then its image derivatives"""
+    start = time.perf_counter()
+    pyplot().close(render_figure(draw, data, path, dpi))
+    seconds = time.perf_counter() - start
+    return path, seconds, image_derivatives(path, derivatives_dir) if derivatives_dir else None
+
+def submit_figure(figures, draw, data, path):
+    """Queue a figure for render_figures, or draw it now when figures is None (shown unless headless)"""
+    if figures is not None:
+        figures.append((draw, data, path))
+        return
+    fig = render_figure(draw, data, path)
+    plt = pyplot()
+    if is_headless():
+        plt.close(fig)
+    else:
+        plt.show()
+
+def show_figures(paths):
+    """Display saved figures in interactive windows, blocking until they are closed"""
+    plt = pyplot()
+    for path in paths:
+        image = plt.imread(path)
+        height, width = image.shape[:2]
+        fig = plt.figure(figsize=(width / FIGURE_DPI, height / FIGURE_DPI))
+        fig.add_axes([0, 0, 1, 1]).imshow(image)
+        fig.axes[0].set_axis_off()
+        fig.canvas.manager.set_window_title(path)
+    plt.show()
+
+def _digest_value(sha, value):
+    """Feed one draw input into a hash: frames and arrays by content, anything else by repr"""
+    if isinstance(value, dict):
+        for key in sorted(value, key=str):
+            sha.update(repr(key).encode())
+            _digest_value(sha, value[key])
+    elif isinstance(value, (list, tuple)):
+        sha.update(f'{type(value).__name__}:{len(value)}'.encode())
+        for item in value:
+            _digest_value(sha, item)
+    elif isinstance(value, (pd.DataFrame, pd.Series)):
+        labels = value.columns.tolist() if isinstance(value, pd.DataFrame) else value.name
+        dtypes = value.dtypes.tolist() if isinstance(value, pd.DataFrame) else value.dtype
+        sha.update(repr((type(value).__name__, labels, dtypes, value.index.names)).encode())
+        sha.update(pd.util.hash_pandas_object(value, index=True).to_numpy().tobytes())
+    elif isinstance(value, np.ndarray) and value.dtype != object:
+        sha.update(repr((value.dtype.str, value.shape)).encode())
+        sha.update(np.ascontiguousarray(value).tobytes())
+    else:
+        sha.update(repr(value).encode())
+
+def _draw_source(draw):
+    """Source of a draw function plus the module-level helpers it calls"""
+    sources = [inspect.getsource(draw)]
+    for name in draw.__code__.co_names:
+        helper = draw.__globals__.get(name)
+        if inspect.isfunction(helper):
+            sources.append(inspect.getsource(helper))
+    return '\n'.join(sources)
+
+def figure_key(draw, data, dpi=FIGURE_DPI):
+    """Content hash of a figure: its aggregated inputs, drawing code and render settings"""
+    import matplotlib
+    sha = hashlib.sha256()
+    sha.update(_draw_source(draw).encode())
+    sha.update(repr((dpi, FIGURE_STYLE, FIGURE_PALETTE, matplotlib.__version__)).encode())
+    _digest_value(sha, data)
+    return sha.hexdigest()
+
+def _figure_is_current(path, key, entry):
+    """Check a figure cache entry against the key and the PNG currently on disk"""
+    if entry is None or entry.get('key') != key or not os.path.exists(path):
+        return False
+    on_disk = file_fingerprint(path, with_hash=False)
+    return on_disk['size'] == entry.get('size') and on_disk['mtime_ns'] == entry.get('mtime_ns')
+
+def image_derivatives(path, output_dir=IMAGE_DERIVATIVES_DIR):
+    """Write downscaled AVIF/WebP copies of a PNG and return its srcset manifest entry"""
+    from PIL import Image
+    os.makedirs(output_dir, exist_ok=True)
+    stem = os.path.splitext(os.path.basename(path))[0]
+    fingerprint = file_fingerprint(path, with_hash=False)
+
+    with Image.open(path) as png:
+        # The figures are drawn on an opaque background, so alpha only adds bytes
+        image = png.convert('RGB')
+    width, height = image.size
+    sources = {}
+    for target in [w for w in IMAGE_WIDTHS if w < width] or [width]:
+        resized = image.resize((target, max(round(height * target / width), 1)), Image.LANCZOS,
+                               reducing_gap=3.0)
+        for fmt, options in IMAGE_FORMATS.items():
+            # Forward slashes: the manifest paths are URLs relative to the page
+            out = f'{output_dir}/{stem}-{target}w.{fmt}'
+            try:
+                resized.save(out, format=fmt.upper(), **options)
+            except (KeyError, OSError, ValueError):
+                # This Pillow build has no encoder for the format
+                if os.path.exists(out):
+                    os.remove(out)
+                continue
+            sources.setdefault(fmt, []).append({'src': out, 'width': target})
+    return {'src': path, 'width': width, 'height': height, 'sources': sources,
+            'bytes': fingerprint['size'], 'mtime_ns': fingerprint['mtime_ns']}
+
+def _image_entry_is_current(path, entry):
+    """Check a srcset manifest entry against the PNG on disk and the derivative files it lists"""
+    if entry is None or not os.path.exists(path):
+        return False
+    on_disk = file_fingerprint(path, with_hash=False)
+    if on_disk['size'] != entry.get('bytes') or on_disk['mtime_ns'] != entry.get('mtime_ns'):
+        return False
+    return all(os.path.exists(variant['src']) for variants in entry['sources'].values() for variant in variants)
+
+def update_image_derivatives(paths, rendered=None, output_dir=IMAGE_DERIVATIVES_DIR):
+    """Bring the srcset manifest up to date for these PNGs, reusing derivatives that are current"""
+    manifest_path = f'{output_dir}/{IMAGE_MANIFEST_NAME}'
+    manifest = _read_cache_meta(manifest_path) or {}
+    rendered = rendered or {}
+
+    updated = 0
+    for path in paths:
+        entry = rendered.get(path)
+        if entry is None:
+            if not os.path.exists(path) or _image_entry_is_current(path, manifest.get(path)):
+                continue
+            entry = image_derivatives(path, output_dir)
+        manifest[path] = entry
+        updated += 1
+
+    os.makedirs(output_dir, exist_ok=True)
+    _write_cache_meta(manifest_path, manifest)
+    formats = sorted({fmt for entry in manifest.values() for fmt in entry['sources']})
+    print(f"Image derivatives: {updated} figure(s) updated, {len(manifest)} in {manifest_path} "
+          f"({', '.join(formats) or 'no formats'})")
+    return manifest
+
+def render_figures(figures, max_workers=None, use_cache=True, cache_path=FIGURE_CACHE_PATH,
+                   derivatives_dir=IMAGE_DERIVATIVES_DIR):
+    """Render queued figures concurrently, skipping ones the cache shows unchanged, then show them unless headless"""
+    timings = _render_figures(figures, max_workers, use_cache, cache_path, derivatives_dir)
+    # Workers draw off-screen; interactive runs display the saved PNGs afterwards
+    if figures and not is_headless():
+        show_figures([path for _, _, path in figures])
+    return timings
+
+def _render_figures(figures, max_workers, use_cache, cache_path, derivatives_dir):
+    """Render and cache the queued figures and their image derivatives"""
+    if not figures:
+        return {}
+
+    manifest = (_read_cache_meta(cache_path) or {}) if use_cache else {}
+    paths = [path for _, _, path in figures]
+    keys = {path: figure_key(draw, data) for draw, data, path in figures}
+    cached = [path for path in paths if _figure_is_current(path, keys[path], manifest.get(path))]
+    figures = [figure for figure in figures if figure[2] not in cached]
+    if use_cache:
+        print(f"\nFigure cache: {len(cached)} hit(s), {len(figures)} miss(es)")
+        for path in cached:
+            print(f"- {path} (unchanged)")
+    if not figures:
+        # Unchanged figures may still be missing derivatives (first run, new widths)
+        if derivatives_dir:
+            update_image_derivatives(paths, output_dir=derivatives_dir)
+        return {}
+
+    workers = min(len(figures), max_workers or os.cpu_count() or 1)
+    print(f"\nRendering {len(figures)} figures with {workers} worker(s)...")
+
+    timings = {}
+    images = {}
+    start = time.perf_counter()
+    if workers == 1:
+        # A pool of one only adds start-up and pickling cost
+        for draw, data, path in figures:
+            path, seconds, images[path] = _render_job(draw, data, path, FIGURE_DPI, derivatives_dir)
+            timings[path] = seconds
+            manifest[path] = dict(key=keys[path], **file_fingerprint(path, with_hash=False))
+            print(f"- {path} ({seconds:.1f}s)")
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+            futures = [pool.submit(_render_job, draw, data, path, FIGURE_DPI, derivatives_dir)
+                       for draw, data, path in figures]
+            for future in as_completed(futures):
+                path, seconds, images[path] = future.result()
+                timings[path] = seconds
+                manifest[path] = dict(key=keys[path], **file_fingerprint(path, with_hash=False))
+                print(f"- {path} ({seconds:.1f}s)")
+    print(f"Rendered in {time.perf_counter() - start:.1f}s wall time "
+          f"({sum(timings.values()):.1f}s of drawing)")
+
+    if use_cache:
+        os.makedirs(os.path.dirname(cache_path) or '.', exist_ok=True)
+        _write_cache_meta(cache_path, manifest)
+    if derivatives_dir:
+        update_image_derivatives(paths, images, derivatives_dir)
+    return timings
+
+if __name__ == "__main__":
+    # Derivatives for PNGs already on disk, e.g. the committed figures
+    update_image_derivatives(sorted(glob.glob('*.png')))
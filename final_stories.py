@@ -5,15 +5,15 @@ Final Data-Driven Stories for IAD Flight Analysis
 
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
+from flight_data_loader import load_integrated_dataset
+from time_rollups import month_of_year_mean, time_rollups
+from correlation_engine import correlation_with_ci, format_correlation
 import warnings
 warnings.filterwarnings('ignore')
 
 def load_data():
     """Load the integrated dataset"""
-    df = pd.read_csv('integrated_flight_analysis_dataset.csv')
-    df['Date'] = pd.to_datetime(df['Date'])
-    return df
+    return load_integrated_dataset()
 
 def generate_final_insights():
     """Generate final comprehensive insights"""
@@ -65,27 +65,31 @@ def generate_final_insights():
     # Economic Correlation Analysis
     econ_data = df.dropna(subset=['GDP_Growth', 'Flight_Count', 'Unemployment_Rate'])
     if not econ_data.empty:
-        gdp_correlation = econ_data['GDP_Growth'].corr(econ_data['Flight_Count'])
-        unemployment_correlation = econ_data['Unemployment_Rate'].corr(econ_data['Flight_Count'])
+        economic_correlation = correlation_with_ci(econ_data, ['GDP_Growth', 'Unemployment_Rate', 'Flight_Count'])
+        gdp_correlation = economic_correlation['r'].loc['GDP_Growth', 'Flight_Count']
+        unemployment_correlation = economic_correlation['r'].loc['Unemployment_Rate', 'Flight_Count']
 
         print(f"\n💰 ECONOMIC SENSITIVITY ANALYSIS:")
-        print(f"   • GDP Growth correlation: {gdp_correlation:.3f} (Strong positive)")
-        print(f"   • Unemployment correlation: {unemployment_correlation:.3f} (Negative as expected)")
+        print(f"   • GDP Growth correlation: "
+              f"{format_correlation(economic_correlation, 'GDP_Growth', 'Flight_Count')} (Strong positive)")
+        print(f"   • Unemployment correlation: "
+              f"{format_correlation(economic_correlation, 'Unemployment_Rate', 'Flight_Count')} (Negative as expected)")
         print(f"   • Economic indicators strongly predict travel demand")
 
     # Operational Efficiency Analysis
-    volume_delay_corr = df['Flight_Count'].corr(df['Avg_Delay'])
+    volume_delay = correlation_with_ci(df, ['Flight_Count', 'Avg_Delay'])
+    volume_delay_corr = volume_delay['r'].loc['Flight_Count', 'Avg_Delay']
     peak_efficiency = df[df['Flight_Count'] > df['Flight_Count'].quantile(0.8)]['Avg_Delay'].mean()
     low_efficiency = df[df['Flight_Count'] < df['Flight_Count'].quantile(0.2)]['Avg_Delay'].mean()
 
     print(f"\n⚡ OPERATIONAL EFFICIENCY ANALYSIS:")
-    print(f"   • Volume-delay correlation: {volume_delay_corr:.3f}")
+    print(f"   • Volume-delay correlation: {format_correlation(volume_delay, 'Flight_Count', 'Avg_Delay')}")
     print(f"   • High-volume day delays: {peak_efficiency:.1f} minutes")
     print(f"   • Low-volume day delays: {low_efficiency:.1f} minutes")
     print(f"   • Congestion penalty: {peak_efficiency - low_efficiency:.1f} minutes")
 
     # Seasonal Patterns
-    seasonal_pattern = df.groupby('Month')['Flight_Count'].mean()
+    seasonal_pattern = month_of_year_mean(time_rollups(df), 'Flight_Count')
     peak_month = seasonal_pattern.idxmax()
     low_month = seasonal_pattern.idxmin()
     seasonal_variation = ((seasonal_pattern.max() - seasonal_pattern.min()) / seasonal_pattern.mean()) * 100
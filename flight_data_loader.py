@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+"""
+Shared Loader for the BTS Departures Data
+"""
+
+import pandas as pd
+import numpy as np
+import hashlib
+import io
+import json
+import os
+from integrated_store import INTEGRATED_STORE_DIR, read_integrated_store, store_manifest_mtime
+import warnings
+warnings.filterwarnings('ignore')
+
+DEPARTURES_CSV = 'Combined Data_Detailed_Statistics_Departures.csv'
+INTEGRATED_CSV = 'integrated_flight_analysis_dataset.csv'
+CACHE_DIR = '.cache'
+CACHE_FORMAT_VERSION = 1
+
+# Declared column types for the departures frame. 'numeric' columns become
+# nullable Int16 when every value is a whole number that fits, else Float32.
+DEPARTURES_SCHEMA = {
+    'Carrier Code': 'category',
+    'Date (MM/DD/YYYY)': 'date',
+    'Flight Number': 'numeric',
+    'Tail Number': 'category',
+    'Destination Airport': 'category',
+    'Scheduled departure time': 'category',
+    'Actual departure time': 'category',
+    'Scheduled elapsed time (Minutes)': 'numeric',
+    'Actual elapsed time (Minutes)': 'numeric',
+    'Departure delay (Minutes)': 'numeric',
+    'Wheels-off time': 'category',
+    'Taxi-Out time (Minutes)': 'numeric',
+    'Delay Carrier (Minutes)': 'numeric',
+    'Delay Weather (Minutes)': 'numeric',
+    'Delay National Aviation System (Minutes)': 'numeric',
+    'Delay Security (Minutes)': 'numeric',
+    'Delay Late Aircraft Arrival (Minutes)': 'numeric',
+}
+DEPARTURES_DATE_FORMAT = '%m/%d/%Y'
+
+# A chunk only sees part of each column, so the per-column downcast could pick
+# Int16 for one chunk and Float32 for the next. Streamed chunks give every
+# numeric column this one dtype instead: wide enough for any chunk, NaN-missing.
+STREAMING_NUMERIC_DTYPE = 'float64'
+
+# Format of the 'Date' column in the auxiliary and integrated datasets
+DATE_KEY_FORMAT = '%Y-%m-%d'
+
+def _schema_signature():
+    """Short hash of the declared schema so cache entries follow schema edits"""
+    payload = json.dumps([DEPARTURES_SCHEMA, DEPARTURES_DATE_FORMAT], sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()[:16]
+
+def _downcast_numeric(series):
+    """Downcast a numeric column to nullable Int16, or Float32 if it will not fit"""
+    values = pd.to_numeric(series, errors='coerce')
+    present = values.dropna()
+    int16 = np.iinfo(np.int16)
+
+    if (present.empty or
+            ((present % 1 == 0).all() and present.min() >= int16.min and present.max() <= int16.max)):
+        return values.astype('Int16')
+    return values.astype('Float32')
+
+def apply_departures_schema(df, report=False, numeric_dtype=None):
+    """Cast the departures frame to the declared memory-lean schema (report prints the saving)"""
+    before = df.memory_usage(deep=True).sum()
+
+    for col, kind in DEPARTURES_SCHEMA.items():
+        if col not in df.columns:
+            continue
+
+        if kind == 'category':
+            df[col] = df[col].astype('category')
+        elif kind == 'numeric' and numeric_dtype is not None:
+            df[col] = pd.to_numeric(df[col], errors='coerce').astype(numeric_dtype)
+        elif kind == 'numeric':
+            df[col] = _downcast_numeric(df[col])
+        elif kind == 'date' and not pd.api.types.is_datetime64_any_dtype(df[col]):
+            try:
+                df[col] = pd.to_datetime(df[col], format=DEPARTURES_DATE_FORMAT)
+            except ValueError:
+                df[col] = pd.to_datetime(df[col])
+
+    if report:
+        after = df.memory_usage(deep=True).sum()
+        print(f"Departures memory: {before / 1e6:,.1f} MB -> {after / 1e6:,.1f} MB "
+              f"({(1 - after / before) * 100:.0f}% smaller)")
+
+    return df
+
+def file_fingerprint(path, with_hash=True):
+    """Return the size, mtime and (optionally) content hash of a source file"""
+    stat = os.stat(path)
+    fingerprint = {
+        'size': stat.st_size,
+        'mtime_ns': stat.st_mtime_ns,
+    }
+
+    if with_hash:
+        sha = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                sha.update(block)
+        fingerprint['sha256'] = sha.hexdigest()
+
+    return fingerprint
+
+def _cache_paths(path, cache_dir):
+    """Locate the Parquet cache and its metadata file for a source CSV"""
+    base = os.path.splitext(os.path.basename(path))[0].replace(' ', '_')
+    return (os.path.join(cache_dir, f'{base}.parquet'),
+            os.path.join(cache_dir, f'{base}.meta.json'))
+
+def _read_cache_meta(meta_path):
+    """Read cache metadata, returning None when it is missing or unreadable"""
+    try:
+        with open(meta_path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def _write_cache_meta(meta_path, meta):
+    """Write cache metadata atomically"""
+    tmp_path = meta_path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(meta, f, indent=2)
+    os.replace(tmp_path, meta_path)
+
+def _cache_is_current(path, meta):
+    """Check a cache entry against the source file fingerprint"""
+    if meta is None or meta.get('format_version') != CACHE_FORMAT_VERSION:
+        return False, None
+    if meta.get('schema') != _schema_signature():
+        return False, None
+
+    # Size and mtime are cheap; only hash the file when they have moved
+    quick = file_fingerprint(path, with_hash=False)
+    stored = meta.get('source', {})
+    if quick['size'] != stored.get('size'):
+        return False, None
+    if quick['mtime_ns'] == stored.get('mtime_ns'):
+        return True, None
+
+    full = file_fingerprint(path)
+    return full['sha256'] == stored.get('sha256'), full
+
+def source_fingerprint(path=DEPARTURES_CSV, cache_dir=CACHE_DIR):
+    """Fingerprint (with content hash) of a source CSV, taken from its cache metadata when current"""
+    meta = _read_cache_meta(_cache_paths(path, cache_dir)[1])
+    is_current, refreshed = _cache_is_current(path, meta)
+    if is_current:
+        return refreshed or meta['source']
+    return file_fingerprint(path)
+
+def _hash_prefix(f, size):
+    """sha256 of the next `size` bytes of an open file and their last byte; (None, None) if it ends early"""
+    sha = hashlib.sha256()
+    last_byte = b''
+    while size:
+        block = f.read(min(1 << 20, size))
+        if not block:
+            return None, None
+        sha.update(block)
+        size -= len(block)
+        last_byte = block[-1:]
+    return sha, last_byte
+
+def starts_with_fingerprint(path, previous):
+    """Whether a file still begins with the complete content recorded in `previous`"""
+    size = previous.get('size', 0)
+    if not size or os.path.getsize(path) < size:
+        return False
+    with open(path, 'rb') as f:
+        sha, last_byte = _hash_prefix(f, size)
+    return sha is not None and sha.hexdigest() == previous.get('sha256') and last_byte == b'\n'
+
+def load_departures(path=DEPARTURES_CSV, cache_dir=CACHE_DIR, use_cache=True):
+    """Load the departures data, reusing the columnar cache when it is current"""
+    if not use_cache:
+        return apply_departures_schema(pd.read_csv(path))
+
+    parquet_path, meta_path = _cache_paths(path, cache_dir)
+    meta = _read_cache_meta(meta_path)
+    is_current, refreshed = _cache_is_current(path, meta)
+
+    if is_current and os.path.exists(parquet_path):
+        try:
+            df = pd.read_parquet(parquet_path)
+        except ImportError:
+            # No Parquet engine available - the CSV is always a valid source
+            return apply_departures_schema(pd.read_csv(path))
+
+        if refreshed is not None:
+            # Touched but unchanged; record the new mtime to skip the hash next time
+            meta['source'] = refreshed
+            _write_cache_meta(meta_path, meta)
+        print(f"Loaded departures from cache: {parquet_path}")
+        return df
+
+    print(f"Parsing {path} (cache missing or stale)...")
+    source = refreshed or file_fingerprint(path)
+    df = apply_departures_schema(pd.read_csv(path))
+
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp_path = parquet_path + '.tmp'
+        df.to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, parquet_path)
+        _write_cache_meta(meta_path, {
+            'format_version': CACHE_FORMAT_VERSION,
+            'schema': _schema_signature(),
+            'source_path': os.path.abspath(path),
+            'source': source,
+            'rows': len(df),
+        })
+    except ImportError:
+        print("Parquet engine not installed - departures cache disabled")
+
+    return df
+
+def to_date_key(values, fmt=DATE_KEY_FORMAT):
+    """Parse a date column once into a datetime64 key used for every merge"""
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return values.dt.normalize()
+    return pd.to_datetime(values, format=fmt)
+
+def load_dated_csv(path, date_column='Date', fmt=DATE_KEY_FORMAT):
+    """Read a CSV whose date column is parsed once into a datetime64 key"""
+    df = pd.read_csv(path)
+    df[date_column] = to_date_key(df[date_column], fmt)
+    return df
+
+def load_integrated_dataset(path=INTEGRATED_CSV, store_dir=INTEGRATED_STORE_DIR):
+    """Load the integrated daily dataset with a datetime64 'Date' key"""
+    # Prefer the partitioned store when it was refreshed after the CSV was written
+    store_mtime = store_manifest_mtime(store_dir)
+    if store_mtime is not None and (not os.path.exists(path) or store_mtime >= os.path.getmtime(path)):
+        print(f"Loaded integrated dataset from store: {store_dir}/ (newer than {path})")
+        return read_integrated_store(store_dir)
+    return load_dated_csv(path)
+
+def read_appended_departures(path, previous):
+    """Rows appended to a CSV since its `previous` fingerprint, plus its new fingerprint; (None, None) if rewritten"""
+    # The old content must be an unchanged prefix ending on a line break. The
+    # file is read once: the prefix is only hashed, the tail is hashed and parsed,
+    # and the new fingerprint describes exactly the bytes that were read.
+    size = previous.get('size', 0)
+    if not size or os.path.getsize(path) < size:
+        return None, None
+    with open(path, 'rb') as f:
+        mtime_ns = os.fstat(f.fileno()).st_mtime_ns
+        sha, last_byte = _hash_prefix(f, size)
+        if sha is None or sha.hexdigest() != previous.get('sha256') or last_byte != b'\n':
+            return None, None
+        tail = f.read()
+    # A line still being written is left for the next update
+    tail = tail[:tail.rfind(b'\n') + 1]
+    sha.update(tail)
+
+    fingerprint = {'size': size + len(tail), 'mtime_ns': mtime_ns, 'sha256': sha.hexdigest()}
+    columns = pd.read_csv(path, nrows=0).columns
+    rows = pd.read_csv(io.BytesIO(tail), header=None, names=columns) if tail else pd.DataFrame(columns=columns)
+    return apply_departures_schema(rows), fingerprint
+
+def iter_departures(path=DEPARTURES_CSV, chunksize=250_000, columns=None):
+    """Stream the departures CSV in typed chunks, optionally projecting columns"""
+    # Numeric and date columns get the same dtype in every chunk; category
+    # columns only hold the categories present in their own chunk
+    reader = pd.read_csv(path, chunksize=chunksize, usecols=columns)
+    for chunk in reader:
+        yield apply_departures_schema(chunk, numeric_dtype=STREAMING_NUMERIC_DTYPE)
+
+if __name__ == "__main__":
+    df = load_departures()
+    print(f"Departures loaded: {len(df):,} flights, {df.memory_usage(deep=True).sum() / 1e6:,.1f} MB in memory")
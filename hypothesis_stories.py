@@ -5,49 +5,27 @@ Data-Driven Hypothesis Stories for IAD Flight Analysis
 
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
 from datetime import datetime, timedelta
-import plotly.express as px
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
+import sys
+from flight_data_loader import load_integrated_dataset
+from time_rollups import rollup_frame, rollup_series, time_rollups
+from correlation_engine import correlation_with_ci, format_correlation
+from congestion_metrics import MAX_QUEUE_BUCKET, hourly_congestion, load_congestion_metrics, queue_response
+from figure_renderer import render_figures, set_headless, submit_figure
 import warnings
 warnings.filterwarnings('ignore')
 
-# Set style for better plots
-plt.style.use('seaborn-v0_8')
-sns.set_palette("husl")
-
 def load_data():
     """Load the integrated dataset"""
-    df = pd.read_csv('integrated_flight_analysis_dataset.csv')
-    df['Date'] = pd.to_datetime(df['Date'])
-    return df
-
-def story_1_the_great_aviation_reset(df):
-    """
-    Story 1: The Great Aviation Reset - How COVID-19 Fundamentally Changed Travel Patterns
-    """
-    print("\n" + "="*80)
-    print("STORY 1: THE GREAT AVIATION RESET")
-    print("How COVID-19 Fundamentally Changed Travel Patterns at IAD")
-    print("="*80)
+    return load_integrated_dataset()
 
+def _draw_story_1(data):
+    """Story 1 figure from its monthly, phase and weekday aggregates"""
+    import matplotlib.pyplot as plt
     fig, axes = plt.subplots(2, 2, figsize=(16, 12))
 
-    # 1. The Cliff Drop - March 2020
-    # Create monthly aggregation without conflicting with existing Date column
-    df['Year_col'] = df['Date'].dt.year
-    df['Month_col'] = df['Date'].dt.month
-
-    monthly_data = df.groupby(['Year_col', 'Month_col']).agg({
-        'Flight_Count': 'sum',
-        'Travelers_Total': 'sum'
-    }).reset_index()
-    monthly_data.columns = ['Year', 'Month', 'Total_Flights', 'Total_Travelers']
-    monthly_data['Date_Plot'] = pd.to_datetime(monthly_data[['Year', 'Month']].assign(day=1))
-
     # Plot 1: The Dramatic Drop
+    monthly_data = data['monthly_data']
     axes[0,0].plot(monthly_data['Date_Plot'], monthly_data['Total_Flights'], marker='o', linewidth=3)
     axes[0,0].axvline(x=pd.to_datetime('2020-03-01'), color='red', linestyle='--', linewidth=2, label='COVID Declaration')
     axes[0,0].set_title('The Great Aviation Cliff: Monthly Flight Volume', fontsize=14, fontweight='bold')
@@ -57,17 +35,8 @@ def story_1_the_great_aviation_reset(df):
     axes[0,0].legend()
 
     # 2. Recovery Phases
-    recovery_phases = {
-        'Pre-COVID (2017-2019)': df[df['Year'] <= 2019]['Flight_Count'].mean(),
-        'Free Fall (Mar-Jun 2020)': df[(df['Year'] == 2020) & (df['Month'].between(3, 6))]['Flight_Count'].mean(),
-        'Slow Climb (Jul 2020-Jun 2021)': df[((df['Year'] == 2020) & (df['Month'] >= 7)) |
-                                             ((df['Year'] == 2021) & (df['Month'] <= 6))]['Flight_Count'].mean(),
-        'Recovery (Jul 2021-2024)': df[((df['Year'] == 2021) & (df['Month'] >= 7)) |
-                                      (df['Year'] >= 2022)]['Flight_Count'].mean()
-    }
-
-    phases = list(recovery_phases.keys())
-    values = list(recovery_phases.values())
+    phases = list(data['recovery_phases'].keys())
+    values = list(data['recovery_phases'].values())
     colors = ['green', 'red', 'orange', 'blue']
 
     axes[0,1].bar(phases, values, color=colors, alpha=0.7)
@@ -76,7 +45,7 @@ def story_1_the_great_aviation_reset(df):
     axes[0,1].tick_params(axis='x', rotation=45)
 
     # 3. TSA vs IAD Correlation
-    correlation_data = df.dropna(subset=['Travelers_Total', 'Flight_Count'])
+    correlation_data = data['points']
     axes[1,0].scatter(correlation_data['Travelers_Total'], correlation_data['Flight_Count'],
                      alpha=0.6, s=30)
 
@@ -85,21 +54,17 @@ def story_1_the_great_aviation_reset(df):
     p = np.poly1d(z)
     axes[1,0].plot(correlation_data['Travelers_Total'], p(correlation_data['Travelers_Total']), "r--", alpha=0.8)
 
-    correlation = correlation_data['Travelers_Total'].corr(correlation_data['Flight_Count'])
-    axes[1,0].set_title(f'National Travel vs IAD Flights (r={correlation:.3f})', fontsize=14, fontweight='bold')
+    axes[1,0].set_title(f"National Travel vs IAD Flights (r={data['correlation']:.3f})", fontsize=14, fontweight='bold')
     axes[1,0].set_xlabel('Daily TSA Checkpoint Travelers (National)')
     axes[1,0].set_ylabel('Daily Flights from IAD')
 
     # 4. The New Normal - Pre vs Post patterns
-    pre_covid_dow = df[df['Year'] <= 2019].groupby('DayOfWeek')['Flight_Count'].mean()
-    post_covid_dow = df[df['Year'] >= 2022].groupby('DayOfWeek')['Flight_Count'].mean()
-
     days = ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun']
     x = np.arange(len(days))
     width = 0.35
 
-    axes[1,1].bar(x - width/2, pre_covid_dow.values, width, label='Pre-COVID (2017-2019)', alpha=0.8)
-    axes[1,1].bar(x + width/2, post_covid_dow.values, width, label='Post-COVID (2022-2024)', alpha=0.8)
+    axes[1,1].bar(x - width/2, data['pre_covid_dow'].values, width, label='Pre-COVID (2017-2019)', alpha=0.8)
+    axes[1,1].bar(x + width/2, data['post_covid_dow'].values, width, label='Post-COVID (2022-2024)', alpha=0.8)
     axes[1,1].set_title('The New Weekly Rhythm', fontsize=14, fontweight='bold')
     axes[1,1].set_xlabel('Day of Week')
     axes[1,1].set_ylabel('Average Daily Flights')
@@ -108,61 +73,78 @@ def story_1_the_great_aviation_reset(df):
     axes[1,1].legend()
 
     plt.tight_layout()
-    plt.savefig('story1_the_great_aviation_reset.png', dpi=300, bbox_inches='tight')
-    plt.show()
+    return fig
+
+def story_1_the_great_aviation_reset(df, figures=None):
+    """
+    Story 1: The Great Aviation Reset - How COVID-19 Fundamentally Changed Travel Patterns
+    """
+    print("\n" + "="*80)
+    print("STORY 1: THE GREAT AVIATION RESET")
+    print("How COVID-19 Fundamentally Changed Travel Patterns at IAD")
+    print("="*80)
+
+    # 1. The Cliff Drop - March 2020
+    monthly_data = rollup_frame(time_rollups(df), 'month', {
+        'Flight_Count': 'sum',
+        'Travelers_Total': 'sum'
+    }).reset_index()
+    monthly_data.columns = ['Date_Plot', 'Total_Flights', 'Total_Travelers']
+
+    # 2. Recovery Phases
+    recovery_phases = {
+        'Pre-COVID (2017-2019)': df[df['Year'] <= 2019]['Flight_Count'].mean(),
+        'Free Fall (Mar-Jun 2020)': df[(df['Year'] == 2020) & (df['Month'].between(3, 6))]['Flight_Count'].mean(),
+        'Slow Climb (Jul 2020-Jun 2021)': df[((df['Year'] == 2020) & (df['Month'] >= 7)) |
+                                             ((df['Year'] == 2021) & (df['Month'] <= 6))]['Flight_Count'].mean(),
+        'Recovery (Jul 2021-2024)': df[((df['Year'] == 2021) & (df['Month'] >= 7)) |
+                                      (df['Year'] >= 2022)]['Flight_Count'].mean()
+    }
+
+    # 3. TSA vs IAD Correlation
+    correlation_data = df.dropna(subset=['Travelers_Total', 'Flight_Count'])
+    travel_correlation = correlation_with_ci(df, ['Travelers_Total', 'Flight_Count'])
+
+    # 4. The New Normal - Pre vs Post patterns
+    pre_covid_dow = df[df['Year'] <= 2019].groupby('DayOfWeek')['Flight_Count'].mean()
+    post_covid_dow = df[df['Year'] >= 2022].groupby('DayOfWeek')['Flight_Count'].mean()
+
+    submit_figure(figures, _draw_story_1, {
+        'monthly_data': monthly_data,
+        'recovery_phases': recovery_phases,
+        'points': correlation_data[['Travelers_Total', 'Flight_Count']],
+        'correlation': travel_correlation['r'].loc['Travelers_Total', 'Flight_Count'],
+        'pre_covid_dow': pre_covid_dow,
+        'post_covid_dow': post_covid_dow,
+    }, 'story1_the_great_aviation_reset.png')
 
     # Key insights
     print("\nKEY INSIGHTS:")
     print(f"📉 COVID Impact: {((df[df['COVID_Period']]['Flight_Count'].mean() - df[df['Year'] <= 2019]['Flight_Count'].mean()) / df[df['Year'] <= 2019]['Flight_Count'].mean() * 100):.1f}% drop in daily flights")
     print(f"🔄 Recovery: As of 2024, daily flights are at {(df[df['Year'] >= 2022]['Flight_Count'].mean() / df[df['Year'] <= 2019]['Flight_Count'].mean() * 100):.1f}% of pre-COVID levels")
-    print(f"🎯 Correlation: National TSA numbers correlate {correlation:.3f} with IAD flights")
+    print(f"🎯 Correlation: National TSA numbers correlate "
+          f"{format_correlation(travel_correlation, 'Travelers_Total', 'Flight_Count')} with IAD flights")
     print(f"📅 Pattern Shift: Weekend travel patterns fundamentally changed")
 
-def story_2_weather_the_storm(df):
-    """
-    Story 2: Weather the Storm - The Hidden Cost of Mother Nature
-    """
-    print("\n" + "="*80)
-    print("STORY 2: WEATHER THE STORM")
-    print("The Hidden Cost of Mother Nature on Aviation Operations")
-    print("="*80)
-
+def _draw_story_2(data):
+    """Story 2 figure from its weather, precipitation and visibility aggregates"""
+    import matplotlib.pyplot as plt
     fig, axes = plt.subplots(2, 2, figsize=(16, 12))
 
     # 1. Weather condition impact
-    weather_impact = df.groupby('Weather_Condition').agg({
-        'Avg_Delay': 'mean',
-        'Flight_Count': 'sum',
-        'Weather_Delay': 'mean'
-    }).round(2)
-
-    weather_impact.sort_values('Avg_Delay', ascending=True)['Avg_Delay'].plot(
-        kind='barh', ax=axes[0,0], color='lightcoral'
-    )
+    data['weather_delay'].plot(kind='barh', ax=axes[0,0], color='lightcoral')
     axes[0,0].set_title('Average Delay by Weather Condition', fontsize=14, fontweight='bold')
     axes[0,0].set_xlabel('Average Delay (Minutes)')
 
     # 2. Precipitation vs delays
-    df['Precip_Category'] = pd.cut(df['Precipitation'],
-                                   bins=[0, 0.01, 0.1, 0.5, np.inf],
-                                   labels=['None', 'Light', 'Moderate', 'Heavy'])
-
-    precip_delay = df.groupby('Precip_Category')['Avg_Delay'].mean()
-    precip_count = df.groupby('Precip_Category')['Flight_Count'].sum()
-
+    precip_delay = data['precip_delay']
     axes[0,1].bar(precip_delay.index, precip_delay.values, color='lightblue', alpha=0.7)
     axes[0,1].set_title('Precipitation Impact on Delays', fontsize=14, fontweight='bold')
     axes[0,1].set_xlabel('Precipitation Level')
     axes[0,1].set_ylabel('Average Delay (Minutes)')
 
     # 3. Seasonal weather patterns
-    monthly_weather = df.groupby('Month').agg({
-        'Precipitation': 'mean',
-        'Temperature_High': 'mean',
-        'Avg_Delay': 'mean',
-        'Wind_Speed': 'mean'
-    })
-
+    monthly_weather = data['monthly_weather']
     ax3 = axes[1,0]
     ax3_twin = ax3.twinx()
 
@@ -181,6 +163,49 @@ def story_2_weather_the_storm(df):
     lines2, labels2 = ax3_twin.get_legend_handles_labels()
     ax3.legend(lines1 + lines2, labels1 + labels2, loc='upper left')
 
+    # 4. Visibility impact
+    visibility_delay = data['visibility_delay']
+    axes[1,1].bar(visibility_delay.index, visibility_delay.values,
+                  color='gold', alpha=0.7)
+    axes[1,1].set_title('Visibility Impact on Flight Delays', fontsize=14, fontweight='bold')
+    axes[1,1].set_xlabel('Visibility Category')
+    axes[1,1].set_ylabel('Average Delay (Minutes)')
+    axes[1,1].tick_params(axis='x', rotation=45)
+
+    plt.tight_layout()
+    return fig
+
+def story_2_weather_the_storm(df, figures=None):
+    """
+    Story 2: Weather the Storm - The Hidden Cost of Mother Nature
+    """
+    print("\n" + "="*80)
+    print("STORY 2: WEATHER THE STORM")
+    print("The Hidden Cost of Mother Nature on Aviation Operations")
+    print("="*80)
+
+    # 1. Weather condition impact
+    weather_impact = df.groupby('Weather_Condition').agg({
+        'Avg_Delay': 'mean',
+        'Flight_Count': 'sum',
+        'Weather_Delay': 'mean'
+    }).round(2)
+
+    # 2. Precipitation vs delays
+    df['Precip_Category'] = pd.cut(df['Precipitation'],
+                                   bins=[0, 0.01, 0.1, 0.5, np.inf],
+                                   labels=['None', 'Light', 'Moderate', 'Heavy'])
+
+    precip_delay = df.groupby('Precip_Category')['Avg_Delay'].mean()
+
+    # 3. Seasonal weather patterns
+    monthly_weather = df.groupby('Month').agg({
+        'Precipitation': 'mean',
+        'Temperature_High': 'mean',
+        'Avg_Delay': 'mean',
+        'Wind_Speed': 'mean'
+    })
+
     # 4. Visibility impact
     df['Visibility_Category'] = pd.cut(df['Visibility'],
                                        bins=[0, 3, 6, 10, np.inf],
@@ -191,16 +216,12 @@ def story_2_weather_the_storm(df):
         'Flight_Count': 'count'
     })
 
-    axes[1,1].bar(visibility_impact.index, visibility_impact['Avg_Delay'],
-                  color='gold', alpha=0.7)
-    axes[1,1].set_title('Visibility Impact on Flight Delays', fontsize=14, fontweight='bold')
-    axes[1,1].set_xlabel('Visibility Category')
-    axes[1,1].set_ylabel('Average Delay (Minutes)')
-    axes[1,1].tick_params(axis='x', rotation=45)
-
-    plt.tight_layout()
-    plt.savefig('story2_weather_the_storm.png', dpi=300, bbox_inches='tight')
-    plt.show()
+    submit_figure(figures, _draw_story_2, {
+        'weather_delay': weather_impact.sort_values('Avg_Delay', ascending=True)['Avg_Delay'],
+        'precip_delay': precip_delay,
+        'monthly_weather': monthly_weather[['Avg_Delay', 'Precipitation']],
+        'visibility_delay': visibility_impact['Avg_Delay'],
+    }, 'story2_weather_the_storm.png')
 
     # Calculate weather costs
     clear_day_delay = df[df['Weather_Condition'] == 'Clear']['Avg_Delay'].mean()
@@ -213,19 +234,13 @@ def story_2_weather_the_storm(df):
     print(f"💰 Weather penalty: {weather_penalty:.1f} additional minutes per flight")
     print(f"🌧️ Rainy/snowy days account for {(df['Weather_Condition'].isin(['Rain', 'Snow']).sum() / len(df) * 100):.1f}% of all days")
 
-def story_3_economic_headwinds_and_tailwinds(df):
-    """
-    Story 3: Economic Headwinds and Tailwinds - How the Economy Drives Aviation
-    """
-    print("\n" + "="*80)
-    print("STORY 3: ECONOMIC HEADWINDS AND TAILWINDS")
-    print("How the Economy Drives Aviation Demand")
-    print("="*80)
-
+def _draw_story_3(data):
+    """Story 3 figure from the economic indicator points and aggregates"""
+    import matplotlib.pyplot as plt
     fig, axes = plt.subplots(2, 2, figsize=(16, 12))
 
     # 1. GDP Growth vs Flight Volume
-    econ_clean = df.dropna(subset=['GDP_Growth', 'Flight_Count'])
+    econ_clean = data['gdp_points']
     if not econ_clean.empty:
         axes[0,0].scatter(econ_clean['GDP_Growth'], econ_clean['Flight_Count'], alpha=0.6)
 
@@ -234,13 +249,12 @@ def story_3_economic_headwinds_and_tailwinds(df):
         p = np.poly1d(z)
         axes[0,0].plot(econ_clean['GDP_Growth'], p(econ_clean['GDP_Growth']), "r--", alpha=0.8)
 
-        correlation = econ_clean['GDP_Growth'].corr(econ_clean['Flight_Count'])
-        axes[0,0].set_title(f'GDP Growth vs Flight Volume (r={correlation:.3f})', fontsize=14, fontweight='bold')
+        axes[0,0].set_title(f"GDP Growth vs Flight Volume (r={data['gdp_correlation']:.3f})", fontsize=14, fontweight='bold')
         axes[0,0].set_xlabel('GDP Growth (%)')
         axes[0,0].set_ylabel('Daily Flights')
 
     # 2. Unemployment vs Travel
-    unemployment_clean = df.dropna(subset=['Unemployment_Rate', 'Flight_Count'])
+    unemployment_clean = data['unemployment_points']
     if not unemployment_clean.empty:
         axes[0,1].scatter(unemployment_clean['Unemployment_Rate'], unemployment_clean['Flight_Count'],
                          alpha=0.6, color='orange')
@@ -250,15 +264,12 @@ def story_3_economic_headwinds_and_tailwinds(df):
         axes[0,1].plot(unemployment_clean['Unemployment_Rate'], p(unemployment_clean['Unemployment_Rate']),
                       "r--", alpha=0.8)
 
-        correlation = unemployment_clean['Unemployment_Rate'].corr(unemployment_clean['Flight_Count'])
-        axes[0,1].set_title(f'Unemployment vs Flight Volume (r={correlation:.3f})', fontsize=14, fontweight='bold')
+        axes[0,1].set_title(f"Unemployment vs Flight Volume (r={data['unemployment_correlation']:.3f})", fontsize=14, fontweight='bold')
         axes[0,1].set_xlabel('Unemployment Rate (%)')
         axes[0,1].set_ylabel('Daily Flights')
 
     # 3. Consumer Confidence Timeline
-    confidence_timeline = df.dropna(subset=['Consumer_Confidence']).groupby(['Year', 'Month']).first().reset_index()
-    confidence_timeline['Date_Plot'] = pd.to_datetime(confidence_timeline[['Year', 'Month']].assign(day=1))
-
+    confidence_timeline = data['confidence_timeline']
     ax3 = axes[1,0]
     ax3_twin = ax3.twinx()
 
@@ -273,8 +284,46 @@ def story_3_economic_headwinds_and_tailwinds(df):
     ax3_twin.set_ylabel('Daily Flights', color='blue')
     ax3.set_title('Consumer Confidence vs Flight Activity', fontsize=14, fontweight='bold')
 
+    # 4. Fuel Price Impact
+    fuel_delay = data['fuel_delay']
+    if fuel_delay is not None:
+        axes[1,1].bar(fuel_delay.index, fuel_delay.values, color='purple', alpha=0.7)
+        axes[1,1].set_title('Fuel Prices vs Flight Delays', fontsize=14, fontweight='bold')
+        axes[1,1].set_xlabel('Fuel Price Category')
+        axes[1,1].set_ylabel('Average Delay (Minutes)')
+        axes[1,1].tick_params(axis='x', rotation=45)
+
+    plt.tight_layout()
+    return fig
+
+def story_3_economic_headwinds_and_tailwinds(df, figures=None):
+    """
+    Story 3: Economic Headwinds and Tailwinds - How the Economy Drives Aviation
+    """
+    print("\n" + "="*80)
+    print("STORY 3: ECONOMIC HEADWINDS AND TAILWINDS")
+    print("How the Economy Drives Aviation Demand")
+    print("="*80)
+
+    # Both indicators against flights in one pairwise-complete pass
+    economic_correlation = correlation_with_ci(df, ['GDP_Growth', 'Unemployment_Rate', 'Flight_Count'])
+
+    # 1. GDP Growth vs Flight Volume
+    econ_clean = df.dropna(subset=['GDP_Growth', 'Flight_Count'])
+
+    # 2. Unemployment vs Travel
+    unemployment_clean = df.dropna(subset=['Unemployment_Rate', 'Flight_Count'])
+
+    # 3. Consumer Confidence Timeline
+    confidence_timeline = rollup_frame(time_rollups(df), 'month', {
+        'Consumer_Confidence': 'mean',
+        'Flight_Count': 'mean'
+    }).dropna(subset=['Consumer_Confidence']).reset_index()
+    confidence_timeline = confidence_timeline.rename(columns={'Date': 'Date_Plot'})
+
     # 4. Fuel Price Impact
     fuel_clean = df.dropna(subset=['Jet_Fuel_Price', 'Avg_Delay'])
+    fuel_delay = None
     if not fuel_clean.empty:
         # Create fuel price bins
         fuel_clean['Fuel_Price_Category'] = pd.cut(fuel_clean['Jet_Fuel_Price'],
@@ -285,105 +334,68 @@ def story_3_economic_headwinds_and_tailwinds(df):
             'Avg_Delay': 'mean',
             'Flight_Count': 'mean'
         })
+        fuel_delay = fuel_impact['Avg_Delay']
 
-        axes[1,1].bar(fuel_impact.index, fuel_impact['Avg_Delay'], color='purple', alpha=0.7)
-        axes[1,1].set_title('Fuel Prices vs Flight Delays', fontsize=14, fontweight='bold')
-        axes[1,1].set_xlabel('Fuel Price Category')
-        axes[1,1].set_ylabel('Average Delay (Minutes)')
-        axes[1,1].tick_params(axis='x', rotation=45)
-
-    plt.tight_layout()
-    plt.savefig('story3_economic_headwinds_tailwinds.png', dpi=300, bbox_inches='tight')
-    plt.show()
+    submit_figure(figures, _draw_story_3, {
+        'gdp_points': econ_clean[['GDP_Growth', 'Flight_Count']],
+        'gdp_correlation': economic_correlation['r'].loc['GDP_Growth', 'Flight_Count'],
+        'unemployment_points': unemployment_clean[['Unemployment_Rate', 'Flight_Count']],
+        'unemployment_correlation': economic_correlation['r'].loc['Unemployment_Rate', 'Flight_Count'],
+        'confidence_timeline': confidence_timeline,
+        'fuel_delay': fuel_delay,
+    }, 'story3_economic_headwinds_tailwinds.png')
 
     print("\nKEY INSIGHTS:")
     if not econ_clean.empty:
-        gdp_corr = econ_clean['GDP_Growth'].corr(econ_clean['Flight_Count'])
-        print(f"📈 GDP Growth Correlation: {gdp_corr:.3f} - Strong positive relationship")
+        gdp_corr = format_correlation(economic_correlation, 'GDP_Growth', 'Flight_Count')
+        print(f"📈 GDP Growth Correlation: {gdp_corr} - Strong positive relationship")
 
     if not unemployment_clean.empty:
-        unemployment_corr = unemployment_clean['Unemployment_Rate'].corr(unemployment_clean['Flight_Count'])
-        print(f"📉 Unemployment Correlation: {unemployment_corr:.3f} - Negative relationship as expected")
+        unemployment_corr = format_correlation(economic_correlation, 'Unemployment_Rate', 'Flight_Count')
+        print(f"📉 Unemployment Correlation: {unemployment_corr} - Negative relationship as expected")
 
     print(f"⛽ High fuel prices correlate with operational challenges")
     print(f"💼 Economic confidence drives travel demand")
 
-def story_4_the_operational_efficiency_paradox(df):
-    """
-    Story 4: The Operational Efficiency Paradox - More Flights, More Problems?
-    """
-    print("\n" + "="*80)
-    print("STORY 4: THE OPERATIONAL EFFICIENCY PARADOX")
-    print("More Flights, More Problems?")
-    print("="*80)
-
+def _draw_story_4(data):
+    """Story 4 figure from the volume points, hourly congestion and day-type aggregates"""
+    import matplotlib.pyplot as plt
     fig, axes = plt.subplots(2, 2, figsize=(16, 12))
 
     # 1. Flight Volume vs Delay Correlation
-    axes[0,0].scatter(df['Flight_Count'], df['Avg_Delay'], alpha=0.6)
+    points = data['points']
+    axes[0,0].scatter(points['Flight_Count'], points['Avg_Delay'], alpha=0.6)
 
     # Add trend line
-    z = np.polyfit(df['Flight_Count'], df['Avg_Delay'], 1)
+    z = np.polyfit(points['Flight_Count'], points['Avg_Delay'], 1)
     p = np.poly1d(z)
-    axes[0,0].plot(df['Flight_Count'], p(df['Flight_Count']), "r--", alpha=0.8)
+    axes[0,0].plot(points['Flight_Count'], p(points['Flight_Count']), "r--", alpha=0.8)
 
-    correlation = df['Flight_Count'].corr(df['Avg_Delay'])
-    axes[0,0].set_title(f'Flight Volume vs Average Delay (r={correlation:.3f})', fontsize=14, fontweight='bold')
+    axes[0,0].set_title(f"Flight Volume vs Average Delay (r={data['correlation']:.3f})", fontsize=14, fontweight='bold')
     axes[0,0].set_xlabel('Daily Flight Count')
     axes[0,0].set_ylabel('Average Delay (Minutes)')
 
-    # 2. Hourly Congestion Analysis (simulated from flight patterns)
-    # Create hourly distribution based on typical airline schedules
-    np.random.seed(42)
-    hourly_flights = []
-    hourly_delays = []
-
-    for hour in range(24):
-        if 6 <= hour <= 22:  # Primary operating hours
-            if hour in [7, 8, 17, 18, 19]:  # Peak hours
-                flights = np.random.normal(8, 2)
-                delay = np.random.normal(15, 5)
-            elif hour in [9, 10, 11, 14, 15, 16]:  # Busy hours
-                flights = np.random.normal(6, 1.5)
-                delay = np.random.normal(10, 3)
-            else:  # Regular hours
-                flights = np.random.normal(4, 1)
-                delay = np.random.normal(8, 2)
-        else:  # Night hours
-            flights = np.random.normal(1, 0.5)
-            delay = np.random.normal(5, 1)
-
-        hourly_flights.append(max(0, flights))
-        hourly_delays.append(max(0, delay))
-
+    # 2. Hourly Congestion Analysis (departure rates and taxi queues from the departures file)
+    hourly = data['hourly']
     ax2 = axes[0,1]
-    ax2_twin = ax2.twinx()
-
-    hours = list(range(24))
-    line1 = ax2.bar(hours, hourly_flights, alpha=0.7, color='lightblue', label='Flights')
-    line2 = ax2_twin.plot(hours, hourly_delays, 'ro-', linewidth=2, label='Avg Delay')
-
-    ax2.set_xlabel('Hour of Day')
-    ax2.set_ylabel('Average Flights per Hour', color='blue')
-    ax2_twin.set_ylabel('Average Delay (Minutes)', color='red')
+    if hourly is not None:
+        ax2_twin = ax2.twinx()
+
+        hours = hourly.index
+        line1 = ax2.bar(hours, hourly['Departures_Per_Day'], alpha=0.7, color='lightblue', label='Flights')
+        line2 = ax2_twin.plot(hours, hourly['Avg_Delay'], 'ro-', linewidth=2, label='Avg Delay')
+
+        ax2.set_xlabel('Scheduled Hour of Day')
+        ax2.set_ylabel('Average Departures per Hour', color='blue')
+        ax2_twin.set_ylabel('Average Delay (Minutes)', color='red')
+    else:
+        ax2.text(0.5, 0.5, 'Departures data not available', ha='center', va='center', transform=ax2.transAxes)
     ax2.set_title('Hourly Operations vs Delays', fontsize=14, fontweight='bold')
 
     # 3. Weekend vs Weekday Efficiency
-    weekend_data = df[df['Is_Weekend'] == True].agg({
-        'Flight_Count': 'mean',
-        'Avg_Delay': 'mean',
-        'Avg_Taxi_Time': 'mean'
-    })
-
-    weekday_data = df[df['Is_Weekend'] == False].agg({
-        'Flight_Count': 'mean',
-        'Avg_Delay': 'mean',
-        'Avg_Taxi_Time': 'mean'
-    })
-
     metrics = ['Flight_Count', 'Avg_Delay', 'Avg_Taxi_Time']
-    weekday_values = [weekday_data[metric] for metric in metrics]
-    weekend_values = [weekend_data[metric] for metric in metrics]
+    weekday_values = [data['weekday_data'][metric] for metric in metrics]
+    weekend_values = [data['weekend_data'][metric] for metric in metrics]
 
     x = np.arange(len(metrics))
     width = 0.35
@@ -397,13 +409,7 @@ def story_4_the_operational_efficiency_paradox(df):
     axes[1,0].legend()
 
     # 4. Holiday Impact on Operations
-    holiday_comparison = df.groupby('Is_Holiday').agg({
-        'Flight_Count': 'mean',
-        'Avg_Delay': 'mean'
-    })
-
-    holiday_comparison.index = ['Regular Day', 'Holiday']
-
+    holiday_comparison = data['holiday_comparison']
     ax4 = axes[1,1]
     ax4_twin = ax4.twinx()
 
@@ -417,33 +423,76 @@ def story_4_the_operational_efficiency_paradox(df):
     ax4.set_title('Holiday Impact on Operations', fontsize=14, fontweight='bold')
 
     plt.tight_layout()
-    plt.savefig('story4_operational_efficiency_paradox.png', dpi=300, bbox_inches='tight')
-    plt.show()
+    return fig
 
-    print("\nKEY INSIGHTS:")
-    print(f"🔄 Volume-Delay Correlation: {correlation:.3f}")
-    print(f"📊 Weekday avg flights: {weekday_data['Flight_Count']:.1f}, Weekend: {weekend_data['Flight_Count']:.1f}")
-    print(f"⏱️ Weekday avg delay: {weekday_data['Avg_Delay']:.1f} min, Weekend: {weekend_data['Avg_Delay']:.1f} min")
-    print(f"🎉 Holiday effect: {holiday_comparison.loc['Holiday', 'Flight_Count'] - holiday_comparison.loc['Regular Day', 'Flight_Count']:.1f} flight difference")
-
-def story_5_the_resilience_factor(df):
+def story_4_the_operational_efficiency_paradox(df, figures=None):
     """
-    Story 5: The Resilience Factor - IAD's Recovery and Adaptation
+    Story 4: The Operational Efficiency Paradox - More Flights, More Problems?
     """
     print("\n" + "="*80)
-    print("STORY 5: THE RESILIENCE FACTOR")
-    print("IAD's Recovery and Adaptation Story")
+    print("STORY 4: THE OPERATIONAL EFFICIENCY PARADOX")
+    print("More Flights, More Problems?")
     print("="*80)
 
-    fig, axes = plt.subplots(2, 2, figsize=(16, 12))
+    # 1. Flight Volume vs Delay Correlation
+    volume_delay = correlation_with_ci(df, ['Flight_Count', 'Avg_Delay'])
 
-    # 1. Recovery Timeline with Milestones
-    recovery_timeline = df.groupby(['Year', 'Month']).agg({
+    # 2. Hourly Congestion Analysis (departure rates and taxi queues from the departures file)
+    departures, congestion = load_congestion_metrics()
+    hourly = hourly_congestion(departures, congestion) if congestion is not None else None
+
+    # 3. Weekend vs Weekday Efficiency
+    weekend_data = df[df['Is_Weekend'] == True].agg({
+        'Flight_Count': 'mean',
+        'Avg_Delay': 'mean',
+        'Avg_Taxi_Time': 'mean'
+    })
+
+    weekday_data = df[df['Is_Weekend'] == False].agg({
+        'Flight_Count': 'mean',
+        'Avg_Delay': 'mean',
+        'Avg_Taxi_Time': 'mean'
+    })
+
+    # 4. Holiday Impact on Operations
+    holiday_comparison = df.groupby('Is_Holiday').agg({
         'Flight_Count': 'mean',
         'Avg_Delay': 'mean'
-    }).reset_index()
-    recovery_timeline['Date_Plot'] = pd.to_datetime(recovery_timeline[['Year', 'Month']].assign(day=1))
+    })
+
+    holiday_comparison.index = ['Regular Day', 'Holiday']
+
+    submit_figure(figures, _draw_story_4, {
+        'points': df[['Flight_Count', 'Avg_Delay']],
+        'correlation': volume_delay['r'].loc['Flight_Count', 'Avg_Delay'],
+        'hourly': hourly,
+        'weekday_data': weekday_data,
+        'weekend_data': weekend_data,
+        'holiday_comparison': holiday_comparison,
+    }, 'story4_operational_efficiency_paradox.png')
+
+    print("\nKEY INSIGHTS:")
+    print(f"🔄 Volume-Delay Correlation: {format_correlation(volume_delay, 'Flight_Count', 'Avg_Delay')}")
+    if congestion is not None:
+        peak_hour = hourly['Departures_Per_Day'].idxmax()
+        queues = queue_response(congestion)
+        longest = queues.index[-1]
+        longest = f"{longest}+" if longest == MAX_QUEUE_BUCKET else longest
+        print(f"🛫 Peak departure hour: {peak_hour:02d}:00 ({hourly.loc[peak_hour, 'Departures_Per_Day']:.1f} departures/day, "
+              f"{hourly.loc[peak_hour, 'Taxi_Queue']:.2f} aircraft already taxiing at pushback)")
+        print(f"🚕 Taxi-out with an empty queue: {queues['Taxi_Out'].iloc[0]:.1f} min, "
+              f"with {longest} aircraft queued: {queues['Taxi_Out'].iloc[-1]:.1f} min")
+    print(f"📊 Weekday avg flights: {weekday_data['Flight_Count']:.1f}, Weekend: {weekend_data['Flight_Count']:.1f}")
+    print(f"⏱️ Weekday avg delay: {weekday_data['Avg_Delay']:.1f} min, Weekend: {weekend_data['Avg_Delay']:.1f} min")
+    print(f"🎉 Holiday effect: {holiday_comparison.loc['Holiday', 'Flight_Count'] - holiday_comparison.loc['Regular Day', 'Flight_Count']:.1f} flight difference")
+
+def _draw_story_5(data):
+    """Story 5 figure from the monthly and yearly recovery rollups"""
+    import matplotlib.pyplot as plt
+    fig, axes = plt.subplots(2, 2, figsize=(16, 12))
 
+    # 1. Recovery Timeline with Milestones
+    recovery_timeline = data['recovery_timeline']
     axes[0,0].plot(recovery_timeline['Date_Plot'], recovery_timeline['Flight_Count'],
                    linewidth=3, marker='o', markersize=4)
 
@@ -466,18 +515,7 @@ def story_5_the_resilience_factor(df):
     axes[0,0].grid(True, alpha=0.3)
 
     # 2. Adaptation Metrics
-    adaptation_metrics = {}
-    for year in [2019, 2020, 2021, 2022, 2023, 2024]:
-        year_data = df[df['Year'] == year]
-        if not year_data.empty:
-            adaptation_metrics[year] = {
-                'Flight_Efficiency': year_data['Flight_Count'].mean(),
-                'Delay_Management': -year_data['Avg_Delay'].mean(),  # Negative because lower is better
-                'Weather_Resilience': -year_data['Weather_Delay'].mean()
-            }
-
-    adaptation_df = pd.DataFrame(adaptation_metrics).T
-
+    adaptation_df = data['adaptation_df']
     if not adaptation_df.empty:
         adaptation_df.plot(kind='line', ax=axes[0,1], marker='o')
         axes[0,1].set_title('Operational Adaptation Metrics', fontsize=14, fontweight='bold')
@@ -487,8 +525,7 @@ def story_5_the_resilience_factor(df):
         axes[0,1].grid(True, alpha=0.3)
 
     # 3. Seasonal Resilience Pattern
-    seasonal_pattern = df.groupby(['Year', 'Month'])['Flight_Count'].mean().unstack(level=0)
-
+    seasonal_pattern = data['seasonal_pattern']
     if seasonal_pattern.shape[1] > 0:
         # Plot recent years
         recent_years = [col for col in seasonal_pattern.columns if col >= 2020][:4]
@@ -504,9 +541,8 @@ def story_5_the_resilience_factor(df):
         axes[1,0].grid(True, alpha=0.3)
 
     # 4. Volatility Analysis
-    volatility_by_year = df.groupby('Year')['Flight_Count'].std()
-    recovery_rate = df.groupby('Year')['Flight_Count'].mean()
-
+    volatility_by_year = data['volatility_by_year']
+    recovery_rate = data['recovery_rate']
     axes[1,1].bar(volatility_by_year.index, volatility_by_year.values,
                   alpha=0.7, color='coral', label='Volatility (Std Dev)')
 
@@ -520,8 +556,56 @@ def story_5_the_resilience_factor(df):
     axes[1,1].set_title('Stability vs Recovery', fontsize=14, fontweight='bold')
 
     plt.tight_layout()
-    plt.savefig('story5_the_resilience_factor.png', dpi=300, bbox_inches='tight')
-    plt.show()
+    return fig
+
+def story_5_the_resilience_factor(df, figures=None):
+    """
+    Story 5: The Resilience Factor - IAD's Recovery and Adaptation
+    """
+    print("\n" + "="*80)
+    print("STORY 5: THE RESILIENCE FACTOR")
+    print("IAD's Recovery and Adaptation Story")
+    print("="*80)
+
+    # 1. Recovery Timeline with Milestones
+    rollups = time_rollups(df)
+    recovery_timeline = rollup_frame(rollups, 'month', {
+        'Flight_Count': 'mean',
+        'Avg_Delay': 'mean'
+    }).reset_index()
+    recovery_timeline = recovery_timeline.rename(columns={'Date': 'Date_Plot'})
+
+    # 2. Adaptation Metrics
+    yearly = rollup_frame(rollups, 'year', {
+        'Flight_Count': 'mean',
+        'Avg_Delay': 'mean',
+        'Weather_Delay': 'mean'
+    })
+    yearly = yearly[yearly.index.year.isin([2019, 2020, 2021, 2022, 2023, 2024])]
+    adaptation_df = pd.DataFrame({
+        'Flight_Efficiency': yearly['Flight_Count'],
+        'Delay_Management': -yearly['Avg_Delay'],  # Negative because lower is better
+        'Weather_Resilience': -yearly['Weather_Delay']
+    }).set_axis(yearly.index.year)
+
+    # 3. Seasonal Resilience Pattern
+    monthly_flights = rollup_series(rollups, 'month', 'Flight_Count')
+    seasonal_pattern = monthly_flights.set_axis(pd.MultiIndex.from_arrays(
+        [monthly_flights.index.year, monthly_flights.index.month], names=['Year', 'Month'])).unstack(level=0)
+
+    # 4. Volatility Analysis
+    volatility_by_year = rollup_series(rollups, 'year', 'Flight_Count', 'std')
+    volatility_by_year.index = volatility_by_year.index.year
+    recovery_rate = rollup_series(rollups, 'year', 'Flight_Count')
+    recovery_rate.index = recovery_rate.index.year
+
+    submit_figure(figures, _draw_story_5, {
+        'recovery_timeline': recovery_timeline,
+        'adaptation_df': adaptation_df,
+        'seasonal_pattern': seasonal_pattern,
+        'volatility_by_year': volatility_by_year,
+        'recovery_rate': recovery_rate,
+    }, 'story5_the_resilience_factor.png')
 
     # Calculate resilience metrics
     pre_covid_avg = df[df['Year'] <= 2019]['Flight_Count'].mean()
@@ -543,13 +627,15 @@ def generate_executive_summary(df):
     print("EXECUTIVE SUMMARY: DATA-DRIVEN INSIGHTS")
     print("="*80)
 
+    economic_correlation = correlation_with_ci(df, ['GDP_Growth', 'Flight_Count'])
+
     summary = {
         'total_flights': df['Flight_Count'].sum(),
         'analysis_period': f"{df['Date'].min()} to {df['Date'].max()}",
         'avg_daily_flights': df['Flight_Count'].mean(),
         'covid_impact': ((df[df['COVID_Period']]['Flight_Count'].mean() - df[df['Year'] <= 2019]['Flight_Count'].mean()) / df[df['Year'] <= 2019]['Flight_Count'].mean() * 100),
         'weather_impact': df[df['Weather_Condition'] != 'Clear']['Avg_Delay'].mean() - df[df['Weather_Condition'] == 'Clear']['Avg_Delay'].mean(),
-        'economic_correlation': df.dropna(subset=['GDP_Growth', 'Flight_Count'])['GDP_Growth'].corr(df.dropna(subset=['GDP_Growth', 'Flight_Count'])['Flight_Count']),
+        'economic_correlation': format_correlation(economic_correlation, 'GDP_Growth', 'Flight_Count'),
         'recovery_status': (df[df['Year'] >= 2023]['Flight_Count'].mean() / df[df['Year'] <= 2019]['Flight_Count'].mean() * 100)
     }
 
@@ -569,7 +655,7 @@ def generate_executive_summary(df):
    • Seasonal patterns: Winter weather challenges evident
 
 💰 ECONOMIC SENSITIVITY:
-   • GDP correlation coefficient: {summary['economic_correlation']:.3f}
+   • GDP correlation coefficient: {summary['economic_correlation']}
    • Economic indicators strongly predict travel demand
    • Consumer confidence drives aviation activity
 
@@ -581,7 +667,7 @@ def generate_executive_summary(df):
    5. Data-driven approach enables proactive management
     """)
 
-def main():
+def main(max_workers=None):
     """Main hypothesis stories function"""
     print("GENERATING DATA-DRIVEN HYPOTHESIS STORIES")
     print("=" * 70)
@@ -590,16 +676,19 @@ def main():
     df = load_data()
     print(f"Loaded integrated dataset: {len(df)} records")
 
-    # Generate all stories
-    story_1_the_great_aviation_reset(df)
-    story_2_weather_the_storm(df)
-    story_3_economic_headwinds_and_tailwinds(df)
-    story_4_the_operational_efficiency_paradox(df)
-    story_5_the_resilience_factor(df)
+    # Generate all stories; figures are drawn together once every story is computed
+    figures = []
+    story_1_the_great_aviation_reset(df, figures)
+    story_2_weather_the_storm(df, figures)
+    story_3_economic_headwinds_and_tailwinds(df, figures)
+    story_4_the_operational_efficiency_paradox(df, figures)
+    story_5_the_resilience_factor(df, figures)
 
     # Executive summary
     generate_executive_summary(df)
 
+    render_figures(figures, max_workers=max_workers)
+
     print("\n" + "="*70)
     print("HYPOTHESIS STORIES COMPLETED")
     print("Generated visualizations:")
@@ -611,4 +700,6 @@ def main():
     print("="*70)
 
 if __name__ == "__main__":
+    if '--headless' in sys.argv:
+        set_headless()
     main()
\ No newline at end of file
@@ -5,9 +5,8 @@ Initial Data Exploration Script for IAD Flight Data
 
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
 from datetime import datetime
+from flight_data_loader import load_departures
 import warnings
 warnings.filterwarnings('ignore')
 
@@ -16,7 +15,7 @@ def load_and_explore_data():
 
     # Load the dataset
     print("Loading dataset...")
-    df = pd.read_csv('Combined Data_Detailed_Statistics_Departures.csv')
+    df = load_departures()
 
     print(f"Dataset Shape: {df.shape}")
     print(f"Total flights: {len(df):,}")
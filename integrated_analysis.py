@@ -5,54 +5,46 @@ Integrated Analysis with All Datasets
 
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
 from datetime import datetime, timedelta
-import plotly.express as px
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
-from scipy import stats
+import sys
+from flight_data_loader import (DEPARTURES_CSV, file_fingerprint, load_departures, iter_departures,
+                                load_dated_csv, read_appended_departures, to_date_key)
+from analysis_engine import collect, resolve_engine, scan_departures
+from correlation_engine import correlation_with_ci, format_correlation, pairwise_correlation
+from figure_renderer import draw_scatter, render_figures, scatter_points, set_headless, submit_figure
+from time_rollups import month_of_year_mean, rollup_series, time_rollups
+from integrated_store import (INTEGRATED_STORE_DIR, read_integrated_store, read_store_manifest,
+                              upsert_integrated_rows, write_store_manifest)
 import warnings
 warnings.filterwarnings('ignore')
 
-# Set style for better plots
-plt.style.use('seaborn-v0_8')
-sns.set_palette("husl")
-
-def load_and_integrate_all_data():
-    """Load and integrate all datasets"""
-    print("Loading and integrating all datasets...")
-
-    # Load primary flight data
-    flights_df = pd.read_csv('Combined Data_Detailed_Statistics_Departures.csv')
-    flights_df['Date (MM/DD/YYYY)'] = pd.to_datetime(flights_df['Date (MM/DD/YYYY)'])
-    flights_df['Date'] = flights_df['Date (MM/DD/YYYY)'].dt.date
-
-    # Load additional datasets
-    weather_df = pd.read_csv('iad_weather_data.csv')
-    weather_df['Date'] = pd.to_datetime(weather_df['Date']).dt.date
-
-    tsa_df = pd.read_csv('tsa_checkpoint_data.csv')
-    tsa_df['Date'] = pd.to_datetime(tsa_df['Date']).dt.date
-
-    economic_df = pd.read_csv('economic_indicators.csv')
-    economic_df['Date'] = pd.to_datetime(economic_df['Date']).dt.date
-
-    fuel_df = pd.read_csv('fuel_price_data.csv')
-    fuel_df['Date'] = pd.to_datetime(fuel_df['Date']).dt.date
-
-    holiday_df = pd.read_csv('holiday_calendar.csv')
-    holiday_df['Date'] = pd.to_datetime(holiday_df['Date']).dt.date
-
-    print(f"Loaded datasets:")
-    print(f"- Flights: {len(flights_df):,} records")
-    print(f"- Weather: {len(weather_df):,} records")
-    print(f"- TSA: {len(tsa_df):,} records")
-    print(f"- Economic: {len(economic_df):,} records")
-    print(f"- Fuel: {len(fuel_df):,} records")
-    print(f"- Holidays: {len(holiday_df):,} records")
-
-    # Aggregate flight data by date for integration
+DAILY_DELAY_COLUMN = 'Departure delay (Minutes)'
+DAILY_MEAN_COLUMNS = {
+    'Weather_Delay': 'Delay Weather (Minutes)',
+    'Carrier_Delay': 'Delay Carrier (Minutes)',
+    'NAS_Delay': 'Delay National Aviation System (Minutes)',
+    'Avg_Taxi_Time': 'Taxi-Out time (Minutes)',
+    'Avg_Flight_Time': 'Actual elapsed time (Minutes)'
+}
+DAILY_FLIGHT_COLUMNS = ['Date', 'Flight_Count', 'Avg_Delay', 'Median_Delay', 'Delay_StdDev',
+                        'Weather_Delay', 'Carrier_Delay', 'NAS_Delay',
+                        'Avg_Taxi_Time', 'Avg_Flight_Time']
+STREAMING_CHUNK_ROWS = 250_000
+
+# Streaming medians count delays per date in fixed whole-minute bins. Values are
+# rounded to the minute and clipped into the window, which keeps their order,
+# so a median is exact unless the median value itself falls outside the window.
+MEDIAN_BIN_LOW = -180
+MEDIAN_BIN_HIGH = 1440
+MEDIAN_BINS = MEDIAN_BIN_HIGH - MEDIAN_BIN_LOW
+
+def aggregate_daily_flights(flights_df):
+    """Aggregate an in-memory departures frame to one row per date"""
+    # The lean schema stores minutes as nullable Int16/Float32; aggregating in
+    # float64 keeps the daily columns plain float64 (NaN when missing) and the
+    # means identical to the unconverted CSV
+    value_columns = [DAILY_DELAY_COLUMN] + list(DAILY_MEAN_COLUMNS.values())
+    flights_df = flights_df.astype({col: 'float64' for col in value_columns if col in flights_df.columns})
     daily_flights = flights_df.groupby('Date').agg({
         'Flight Number': 'count',
         'Departure delay (Minutes)': ['mean', 'median', 'std'],
@@ -64,49 +56,187 @@ def load_and_integrate_all_data():
     }).round(2)
 
     # Flatten column names
-    daily_flights.columns = [
-        'Flight_Count', 'Avg_Delay', 'Median_Delay', 'Delay_StdDev',
-        'Weather_Delay', 'Carrier_Delay', 'NAS_Delay',
-        'Avg_Taxi_Time', 'Avg_Flight_Time'
-    ]
-    daily_flights = daily_flights.reset_index()
+    daily_flights.columns = DAILY_FLIGHT_COLUMNS[1:]
+    daily_flights['Flight_Count'] = daily_flights['Flight_Count'].astype('int64')
+    return daily_flights.reset_index()
+
+def _daily_partials(chunk):
+    """Mergeable per-date partial aggregates, and delay counts in the median bins, for one chunk"""
+    grouped = chunk.groupby('Date')
+    delay = grouped[DAILY_DELAY_COLUMN]
+
+    partial = pd.DataFrame({'Flight_Count': grouped['Flight Number'].count()})
+    partial['n'] = delay.count()
+    partial['mean'] = delay.mean().astype('float64')
+    partial['m2'] = (delay.var(ddof=0) * partial['n']).astype('float64')
+    for name, col in DAILY_MEAN_COLUMNS.items():
+        partial[f'{name}_sum'] = grouped[col].sum().astype('float64')
+        partial[f'{name}_n'] = grouped[col].count()
+
+    # Dates with no delay values carry an empty moment state
+    partial[['mean', 'm2']] = partial[['mean', 'm2']].fillna(0.0)
+
+    # One row of bin counts per partial date, from a single bincount
+    values = chunk[DAILY_DELAY_COLUMN].to_numpy(dtype='float64', na_value=np.nan)
+    codes = partial.index.get_indexer(chunk['Date'])
+    present = ~np.isnan(values) & (codes >= 0)
+    bins = np.clip(np.rint(values[present]), MEDIAN_BIN_LOW, MEDIAN_BIN_HIGH - 1).astype(np.int64) - MEDIAN_BIN_LOW
+    counts = np.bincount(codes[present] * MEDIAN_BINS + bins, minlength=len(partial) * MEDIAN_BINS)
+
+    return partial, counts.reshape(len(partial), MEDIAN_BINS)
+
+def _merge_daily_partials(left, right):
+    """Combine two partial aggregates (Chan et al. parallel variance update)"""
+    left, right = left.align(right, fill_value=0)
+    n = left['n'] + right['n']
+    delta = right['mean'] - left['mean']
+    weight = (right['n'] / n.where(n > 0)).fillna(0.0)
+
+    merged = left + right
+    merged['mean'] = left['mean'] + delta * weight
+    merged['m2'] = left['m2'] + right['m2'] + delta ** 2 * left['n'] * weight
+    return merged
+
+def _median_from_bins(counts):
+    """Per-row median of fixed-bin delay counts (NaN for rows without values)"""
+    cumulative = counts.cumsum(axis=1)
+    total = cumulative[:, -1:]
+
+    # The median averages the values at ranks (n-1)//2 and n//2
+    lo = (cumulative <= (total - 1) // 2).sum(axis=1)
+    hi = (cumulative <= total // 2).sum(axis=1)
+    return np.where(total[:, 0] > 0, (lo + hi) / 2 + MEDIAN_BIN_LOW, np.nan)
+
+def _grow_rows(array, rows):
+    """The array with room for at least `rows` rows, doubling its capacity with zero-filled rows"""
+    if rows <= len(array):
+        return array
+    grown = np.zeros((max(rows, 2 * len(array)),) + array.shape[1:], dtype=array.dtype)
+    grown[:len(array)] = array
+    return grown
+
+def aggregate_daily_flights_streaming(path=DEPARTURES_CSV, chunksize=STREAMING_CHUNK_ROWS):
+    """Aggregate the departures source chunk by chunk; state grows with the number of dates, not rows"""
+    columns = ['Date (MM/DD/YYYY)', 'Flight Number', DAILY_DELAY_COLUMN] + list(DAILY_MEAN_COLUMNS.values())
+
+    # Per-date state lives in fixed-width array rows, so each chunk only
+    # reads and updates the rows of the dates it contains
+    date_rows = {}
+    state = bin_counts = None
+    total_rows = 0
+    for chunk in iter_departures(path, chunksize=chunksize, columns=columns):
+        chunk['Date'] = to_date_key(chunk['Date (MM/DD/YYYY)'])
+        partial, counts = _daily_partials(chunk)
+        rows = np.array([date_rows.setdefault(date, len(date_rows)) for date in partial.index], dtype=np.int64)
+        if state is None:
+            state = np.zeros((0, partial.shape[1]))
+            bin_counts = np.zeros((0, MEDIAN_BINS), dtype=np.int32)
+        state = _grow_rows(state, len(date_rows))
+        bin_counts = _grow_rows(bin_counts, len(date_rows))
+
+        stored = pd.DataFrame(state[rows], index=partial.index, columns=partial.columns)
+        state[rows] = _merge_daily_partials(stored, partial).to_numpy(dtype='float64')
+        bin_counts[rows] += counts
+        total_rows += len(chunk)
+
+    if state is None:
+        return pd.DataFrame(columns=DAILY_FLIGHT_COLUMNS), total_rows
+
+    dates = pd.Index(list(date_rows), name='Date')
+    partials = pd.DataFrame(state[:len(dates)], index=dates, columns=partial.columns)
+    n = partials['n']
+    daily_flights = pd.DataFrame({
+        'Flight_Count': partials['Flight_Count'].astype('int64'),
+        'Avg_Delay': partials['mean'].where(n > 0),
+        'Median_Delay': _median_from_bins(bin_counts[:len(dates)]),
+        'Delay_StdDev': np.sqrt(partials['m2'] / (n - 1).where(n > 1))
+    })
+    for name in DAILY_MEAN_COLUMNS:
+        count = partials[f'{name}_n']
+        daily_flights[name] = partials[f'{name}_sum'] / count.where(count > 0)
+
+    daily_flights = daily_flights.sort_index().round(2)
+    return daily_flights.reset_index(), total_rows
+
+def aggregate_daily_flights_polars(path=DEPARTURES_CSV):
+    """Aggregate departures per date on the lazy Polars engine, materializing only the daily rows"""
+    import polars as pl
+    columns = ['Date (MM/DD/YYYY)', 'Flight Number', DAILY_DELAY_COLUMN] + list(DAILY_MEAN_COLUMNS.values())
+    delay = pl.col(DAILY_DELAY_COLUMN)
+
+    values = [DAILY_DELAY_COLUMN] + list(DAILY_MEAN_COLUMNS.values())
+
+    # The Parquet cache holds downcast float32 columns; aggregate in float64 as the pandas path does
+    daily = (scan_departures(columns=columns, engine='polars', path=path)
+             .with_columns(pl.col(values).cast(pl.Float64))
+             .group_by(pl.col('Date (MM/DD/YYYY)').dt.truncate('1d').alias('Date'))
+             .agg([pl.len().alias('Rows'),
+                   pl.col('Flight Number').count().alias('Flight_Count'),
+                   delay.mean().alias('Avg_Delay'),
+                   delay.median().alias('Median_Delay'),
+                   delay.std().alias('Delay_StdDev')] +
+                  [pl.col(col).mean().alias(name) for name, col in DAILY_MEAN_COLUMNS.items()])
+             .sort('Date')
+             .collect())
+
+    total_rows = int(daily['Rows'].sum())
+    daily_flights = daily.drop('Rows').to_pandas()
+    daily_flights['Flight_Count'] = daily_flights['Flight_Count'].astype('int64')
+    daily_flights[DAILY_FLIGHT_COLUMNS[2:]] = daily_flights[DAILY_FLIGHT_COLUMNS[2:]].round(2)
+    return daily_flights[DAILY_FLIGHT_COLUMNS], total_rows
+
+AUXILIARY_FILES = {
+    'weather': 'iad_weather_data.csv',
+    'tsa': 'tsa_checkpoint_data.csv',
+    'economic': 'economic_indicators.csv',
+    'fuel': 'fuel_price_data.csv',
+    'holidays': 'holiday_calendar.csv'
+}
+
+def load_auxiliary_datasets():
+    """Load the additional datasets, parsing each 'Date' once into a datetime64 key"""
+    return {name: load_dated_csv(path) for name, path in AUXILIARY_FILES.items()}
+
+def integrate_daily_flights(daily_flights, auxiliary):
+    """Join daily flight aggregates with the additional datasets and add derived features"""
+    weather_df = auxiliary['weather']
+    tsa_df = auxiliary['tsa']
+    economic_df = auxiliary['economic']
+    fuel_df = auxiliary['fuel']
+    holiday_df = auxiliary['holidays']
+
+    # Engines may differ in datetime resolution; align the key with the auxiliary tables
+    daily_flights = daily_flights.assign(Date=daily_flights['Date'].astype(weather_df['Date'].dtype))
 
     # Merge all datasets
     integrated_df = daily_flights.merge(weather_df, on='Date', how='left')
     integrated_df = integrated_df.merge(tsa_df, on='Date', how='left')
 
     # Merge economic data (monthly, so forward fill)
-    integrated_df['Year_Month'] = pd.to_datetime(integrated_df['Date']).dt.to_period('M')
-    economic_df['Year_Month'] = pd.to_datetime(economic_df['Date']).dt.to_period('M')
+    integrated_df['Year_Month'] = integrated_df['Date'].dt.to_period('M')
+    economic_months = economic_df.assign(Year_Month=economic_df['Date'].dt.to_period('M'))
     integrated_df = integrated_df.merge(
-        economic_df[['Year_Month', 'GDP_Growth', 'Unemployment_Rate', 'Consumer_Confidence']],
+        economic_months[['Year_Month', 'GDP_Growth', 'Unemployment_Rate', 'Consumer_Confidence']],
         on='Year_Month', how='left'
     )
 
     # Merge fuel data (weekly, so forward fill)
-    # Convert dates to datetime for merge_asof
-    integrated_df['Date_dt'] = pd.to_datetime(integrated_df['Date'])
-    fuel_df['Date_dt'] = pd.to_datetime(fuel_df['Date'])
-
-    fuel_df_sorted = fuel_df.sort_values('Date_dt')
-    integrated_df_sorted = integrated_df.sort_values('Date_dt')
+    fuel_df_sorted = fuel_df.sort_values('Date')
+    integrated_df_sorted = integrated_df.sort_values('Date')
 
     integrated_df = pd.merge_asof(
         integrated_df_sorted,
-        fuel_df_sorted[['Date_dt', 'Jet_Fuel_Price', 'Crude_Oil_Price']],
-        on='Date_dt', direction='backward'
+        fuel_df_sorted[['Date', 'Jet_Fuel_Price', 'Crude_Oil_Price']],
+        on='Date', direction='backward'
     )
 
-    # Remove the temporary datetime column
-    integrated_df = integrated_df.drop('Date_dt', axis=1)
-
     # Add holiday indicators
     integrated_df['Is_Holiday'] = integrated_df['Date'].isin(holiday_df['Date'])
 
     # Add derived features
-    integrated_df['Year'] = pd.to_datetime(integrated_df['Date']).dt.year
-    integrated_df['Month'] = pd.to_datetime(integrated_df['Date']).dt.month
-    integrated_df['DayOfWeek'] = pd.to_datetime(integrated_df['Date']).dt.dayofweek
+    integrated_df['Year'] = integrated_df['Date'].dt.year
+    integrated_df['Month'] = integrated_df['Date'].dt.month
+    integrated_df['DayOfWeek'] = integrated_df['Date'].dt.dayofweek
     integrated_df['Is_Weekend'] = integrated_df['DayOfWeek'].isin([5, 6])
 
     # COVID period indicator
@@ -115,23 +245,101 @@ def load_and_integrate_all_data():
         ((integrated_df['Year'] == 2021) & (integrated_df['Month'] <= 6))
     )
 
+    return integrated_df
+
+def load_and_integrate_all_data(streaming=False, chunksize=STREAMING_CHUNK_ROWS, engine=None):
+    """Load and integrate all datasets"""
+    print("Loading and integrating all datasets...")
+    engine = resolve_engine(engine)
+
+    # Load primary flight data and aggregate it by date for integration
+    if streaming:
+        daily_flights, flight_records = aggregate_daily_flights_streaming(chunksize=chunksize)
+    elif engine == 'polars':
+        daily_flights, flight_records = aggregate_daily_flights_polars()
+    else:
+        # Only the columns the daily aggregates need are read from the cache
+        columns = ['Date (MM/DD/YYYY)', 'Flight Number', DAILY_DELAY_COLUMN] + list(DAILY_MEAN_COLUMNS.values())
+        flights_df = collect(scan_departures(columns=columns, engine=engine))
+        flights_df['Date'] = to_date_key(flights_df['Date (MM/DD/YYYY)'])
+        daily_flights = aggregate_daily_flights(flights_df)
+        flight_records = len(flights_df)
+
+    auxiliary = load_auxiliary_datasets()
+
+    print(f"Loaded datasets:")
+    print(f"- Flights: {flight_records:,} records")
+    print(f"- Weather: {len(auxiliary['weather']):,} records")
+    print(f"- TSA: {len(auxiliary['tsa']):,} records")
+    print(f"- Economic: {len(auxiliary['economic']):,} records")
+    print(f"- Fuel: {len(auxiliary['fuel']):,} records")
+    print(f"- Holidays: {len(auxiliary['holidays']):,} records")
+
+    integrated_df = integrate_daily_flights(daily_flights, auxiliary)
+
     print(f"\nIntegrated dataset: {len(integrated_df):,} records")
-    print(f"Date range: {integrated_df['Date'].min()} to {integrated_df['Date'].max()}")
+    print(f"Date range: {integrated_df['Date'].min().date()} to {integrated_df['Date'].max().date()}")
 
     return integrated_df
 
-def weather_delay_analysis(df):
-    """Analyze weather impact on delays"""
-    print("\n" + "="*50)
-    print("WEATHER-DELAY CORRELATION ANALYSIS")
-    print("="*50)
-
-    plt.figure(figsize=(20, 12))
+def update_integrated_dataset(path=DEPARTURES_CSV, store_dir=INTEGRATED_STORE_DIR):
+    """Incrementally refresh the Year_Month-partitioned integrated store from appended departures"""
+    print("Updating integrated dataset incrementally...")
+
+    quick = file_fingerprint(path, with_hash=False)
+    auxiliary_inputs = {name: file_fingerprint(aux_path, with_hash=False)
+                        for name, aux_path in AUXILIARY_FILES.items()}
+    manifest = read_store_manifest(store_dir)
+
+    # Any change to an additional dataset can affect every date
+    appended, source = None, None
+    if manifest is not None and manifest.get('auxiliary') == auxiliary_inputs:
+        stored = manifest['source']
+        if quick['size'] == stored['size'] and quick['mtime_ns'] == stored['mtime_ns']:
+            print("Integrated store is up to date")
+            return read_integrated_store(store_dir)
+        # Departures files grow by appending months; only the new rows are parsed
+        appended, source = read_appended_departures(path, stored)
+
+    if appended is None:
+        print("No store, or its sources changed other than by appending - rebuilding all dates")
+        flights_df = load_departures(path)
+        flights_df['Date'] = to_date_key(flights_df['Date (MM/DD/YYYY)'])
+        changed = flights_df['Date'].dropna().unique()
+    else:
+        appended['Date'] = to_date_key(appended['Date (MM/DD/YYYY)'])
+        changed = appended['Date'].dropna().unique()
+        months = sorted(set(str(month) for month in pd.DatetimeIndex(changed).to_period('M')))
+        stored_dates = read_integrated_store(store_dir, months) if months else pd.DataFrame()
+        extended = stored_dates['Date'].isin(changed).sum() if len(stored_dates) else 0
+        if extended:
+            # New rows for a date already stored: its aggregates need all of its rows
+            print(f"Appended rows extend {extended:,} stored date(s) - reading their full history")
+            flights_df = load_departures(path)
+            flights_df['Date'] = to_date_key(flights_df['Date (MM/DD/YYYY)'])
+            flights_df = flights_df[flights_df['Date'].isin(changed)]
+        else:
+            flights_df = appended
+
+    touched = []
+    if len(changed):
+        new_rows = integrate_daily_flights(aggregate_daily_flights(flights_df), load_auxiliary_datasets())
+        touched = upsert_integrated_rows(new_rows, store_dir=store_dir, replace_all=appended is None)
+    write_store_manifest({'source': source or file_fingerprint(path), 'auxiliary': auxiliary_inputs}, store_dir)
+
+    print(f"{'Rebuilt' if appended is None else 'Updated'} {len(changed):,} dates "
+          f"across {len(touched)} Year_Month partitions")
+    return read_integrated_store(store_dir)
+
+def _draw_weather_delay_analysis(data):
+    """Weather-delay figure from its aggregated inputs"""
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+    fig = plt.figure(figsize=(20, 12))
 
     # 1. Weather conditions vs delays
     plt.subplot(2, 4, 1)
-    weather_delays = df.groupby('Weather_Condition')['Avg_Delay'].mean().sort_values(ascending=False)
-    weather_delays.plot(kind='bar', color='lightcoral')
+    data['weather_delays'].plot(kind='bar', color='lightcoral')
     plt.title('Average Delay by Weather Condition')
     plt.xlabel('Weather Condition')
     plt.ylabel('Average Delay (Minutes)')
@@ -139,12 +347,7 @@ def weather_delay_analysis(df):
 
     # 2. Precipitation vs delays
     plt.subplot(2, 4, 2)
-    # Create precipitation bins
-    df['Precip_Category'] = pd.cut(df['Precipitation'],
-                                   bins=[0, 0.01, 0.1, 0.5, np.inf],
-                                   labels=['None', 'Light', 'Moderate', 'Heavy'])
-    precip_delays = df.groupby('Precip_Category')['Avg_Delay'].mean()
-    precip_delays.plot(kind='bar', color='lightblue')
+    data['precip_delays'].plot(kind='bar', color='lightblue')
     plt.title('Average Delay by Precipitation Level')
     plt.xlabel('Precipitation Category')
     plt.ylabel('Average Delay (Minutes)')
@@ -152,41 +355,57 @@ def weather_delay_analysis(df):
 
     # 3. Visibility vs delays
     plt.subplot(2, 4, 3)
-    plt.scatter(df['Visibility'], df['Avg_Delay'], alpha=0.5)
+    draw_scatter(plt.gca(), data['visibility_delay'], label='Days', alpha=0.5)
     plt.xlabel('Visibility (Miles)')
     plt.ylabel('Average Delay (Minutes)')
     plt.title('Visibility vs Average Delay')
 
     # 4. Wind speed vs delays
     plt.subplot(2, 4, 4)
-    plt.scatter(df['Wind_Speed'], df['Avg_Delay'], alpha=0.5)
+    draw_scatter(plt.gca(), data['wind_delay'], label='Days', alpha=0.5)
     plt.xlabel('Wind Speed (MPH)')
     plt.ylabel('Average Delay (Minutes)')
     plt.title('Wind Speed vs Average Delay')
 
     # 5. Temperature vs flight operations
     plt.subplot(2, 4, 5)
-    plt.scatter(df['Temperature_High'], df['Flight_Count'], alpha=0.5)
+    draw_scatter(plt.gca(), data['temperature_flights'], label='Days', alpha=0.5)
     plt.xlabel('High Temperature (°F)')
     plt.ylabel('Number of Flights')
     plt.title('Temperature vs Flight Volume')
 
     # 6. Weather delay correlation
     plt.subplot(2, 4, 6)
-    weather_corr = df[['Precipitation', 'Wind_Speed', 'Visibility', 'Temperature_High',
-                       'Avg_Delay', 'Weather_Delay']].corr()
-    sns.heatmap(weather_corr, annot=True, cmap='coolwarm', center=0, ax=plt.gca())
+    sns.heatmap(data['weather_corr'], annot=True, cmap='coolwarm', center=0, ax=plt.gca())
     plt.title('Weather Variables Correlation')
 
     # 7. Seasonal weather patterns
     plt.subplot(2, 4, 7)
-    monthly_weather = df.groupby('Month')[['Precipitation', 'Temperature_High', 'Avg_Delay']].mean()
-    monthly_weather.plot(kind='line', ax=plt.gca(), secondary_y=['Avg_Delay'])
+    data['monthly_weather'].plot(kind='line', ax=plt.gca(), secondary_y=['Avg_Delay'])
     plt.title('Monthly Weather Patterns vs Delays')
     plt.xlabel('Month')
 
     # 8. Extreme weather events
     plt.subplot(2, 4, 8)
+    conditions = ['Normal Weather', 'Extreme Weather']
+    plt.bar(conditions, data['extreme_delays'], color=['lightgreen', 'red'])
+    plt.title('Normal vs Extreme Weather Delays')
+    plt.ylabel('Average Delay (Minutes)')
+
+    plt.tight_layout()
+    return fig
+
+def weather_delay_analysis(df, figures=None):
+    """Analyze weather impact on delays"""
+    print("\n" + "="*50)
+    print("WEATHER-DELAY CORRELATION ANALYSIS")
+    print("="*50)
+
+    # Create precipitation bins
+    df['Precip_Category'] = pd.cut(df['Precipitation'],
+                                   bins=[0, 0.01, 0.1, 0.5, np.inf],
+                                   labels=['None', 'Light', 'Moderate', 'Heavy'])
+
     extreme_weather = df[
         (df['Precipitation'] > 0.5) |
         (df['Wind_Speed'] > 25) |
@@ -198,28 +417,26 @@ def weather_delay_analysis(df):
         (df['Visibility'] >= 8)
     ]
 
-    delays = [normal_weather['Avg_Delay'].mean(), extreme_weather['Avg_Delay'].mean()]
-    conditions = ['Normal Weather', 'Extreme Weather']
-    plt.bar(conditions, delays, color=['lightgreen', 'red'])
-    plt.title('Normal vs Extreme Weather Delays')
-    plt.ylabel('Average Delay (Minutes)')
-
-    plt.tight_layout()
-    plt.savefig('weather_delay_analysis.png', dpi=300, bbox_inches='tight')
-    plt.show()
-
-def covid_impact_analysis(df):
-    """Comprehensive COVID-19 impact analysis"""
-    print("\n" + "="*50)
-    print("COVID-19 IMPACT ANALYSIS")
-    print("="*50)
-
-    plt.figure(figsize=(20, 12))
+    submit_figure(figures, _draw_weather_delay_analysis, {
+        'weather_delays': df.groupby('Weather_Condition')['Avg_Delay'].mean().sort_values(ascending=False),
+        'precip_delays': df.groupby('Precip_Category')['Avg_Delay'].mean(),
+        'visibility_delay': scatter_points(df['Visibility'], df['Avg_Delay']),
+        'wind_delay': scatter_points(df['Wind_Speed'], df['Avg_Delay']),
+        'temperature_flights': scatter_points(df['Temperature_High'], df['Flight_Count']),
+        'weather_corr': pairwise_correlation(df, ['Precipitation', 'Wind_Speed', 'Visibility', 'Temperature_High',
+                                                  'Avg_Delay', 'Weather_Delay'])['r'],
+        'monthly_weather': df.groupby('Month')[['Precipitation', 'Temperature_High', 'Avg_Delay']].mean(),
+        'extreme_delays': [normal_weather['Avg_Delay'].mean(), extreme_weather['Avg_Delay'].mean()],
+    }, 'weather_delay_analysis.png')
+
+def _draw_covid_impact_analysis(data):
+    """COVID impact figure from its aggregated inputs"""
+    import matplotlib.pyplot as plt
+    fig = plt.figure(figsize=(20, 12))
 
     # 1. Flight volume over time
     plt.subplot(2, 4, 1)
-    monthly_flights = df.groupby(['Year', 'Month'])['Flight_Count'].sum().reset_index()
-    monthly_flights['Date'] = pd.to_datetime(monthly_flights[['Year', 'Month']].assign(day=1))
+    monthly_flights = data['monthly_flights']
     plt.plot(monthly_flights['Date'], monthly_flights['Flight_Count'])
     plt.axvline(x=pd.to_datetime('2020-03-01'), color='red', linestyle='--', label='COVID Start')
     plt.title('Monthly Flight Volume Over Time')
@@ -230,27 +447,21 @@ def covid_impact_analysis(df):
 
     # 2. TSA throughput correlation
     plt.subplot(2, 4, 2)
-    plt.scatter(df['Travelers_Total'], df['Flight_Count'], alpha=0.5)
+    draw_scatter(plt.gca(), data['travelers_flights'], label='Days', alpha=0.5)
     plt.xlabel('TSA Daily Travelers')
     plt.ylabel('Daily Flights from IAD')
     plt.title('TSA Throughput vs IAD Flights')
 
     # 3. Pre/During/Post COVID comparison
     plt.subplot(2, 4, 3)
-    pre_covid = df[df['Year'] <= 2019]['Flight_Count'].mean()
-    during_covid = df[df['COVID_Period']]['Flight_Count'].mean()
-    post_covid = df[(df['Year'] >= 2022)]['Flight_Count'].mean()
-
     periods = ['Pre-COVID\n(2017-2019)', 'During COVID\n(2020-2021)', 'Post-COVID\n(2022-2024)']
-    volumes = [pre_covid, during_covid, post_covid]
-    plt.bar(periods, volumes, color=['green', 'red', 'blue'])
+    plt.bar(periods, data['period_volumes'], color=['green', 'red', 'blue'])
     plt.title('Average Daily Flights by Period')
     plt.ylabel('Average Daily Flights')
 
     # 4. Recovery timeline
     plt.subplot(2, 4, 4)
-    recovery_data = df[df['Year'] >= 2020].groupby(['Year', 'Month'])['Flight_Count'].mean().reset_index()
-    recovery_data['Period'] = recovery_data['Year'].astype(str) + '-' + recovery_data['Month'].astype(str).str.zfill(2)
+    recovery_data = data['recovery_data']
     plt.plot(range(len(recovery_data)), recovery_data['Flight_Count'], marker='o')
     plt.title('Flight Recovery Timeline (2020-2024)')
     plt.xlabel('Time Period')
@@ -259,20 +470,19 @@ def covid_impact_analysis(df):
 
     # 5. Economic indicators during COVID
     plt.subplot(2, 4, 5)
-    covid_data = df[df['Year'].isin([2019, 2020, 2021])].dropna(subset=['GDP_Growth', 'Unemployment_Rate'])
-    if not covid_data.empty:
-        ax = covid_data.groupby('Year')['GDP_Growth'].mean().plot(kind='bar', color='lightcoral')
+    covid_gdp = data['covid_gdp']
+    covid_unemployment = data['covid_unemployment']
+    if not covid_gdp.empty:
+        ax = covid_gdp.set_axis(covid_gdp.index.year).plot(kind='bar', color='lightcoral')
         ax2 = ax.twinx()
-        covid_data.groupby('Year')['Unemployment_Rate'].mean().plot(kind='bar', ax=ax2, color='lightblue', alpha=0.7)
+        covid_unemployment.set_axis(covid_unemployment.index.year).plot(kind='bar', ax=ax2, color='lightblue', alpha=0.7)
         plt.title('Economic Indicators During COVID')
         ax.set_ylabel('GDP Growth (%)', color='red')
         ax2.set_ylabel('Unemployment Rate (%)', color='blue')
 
     # 6. Delay patterns during COVID
     plt.subplot(2, 4, 6)
-    delay_comparison = df.groupby('COVID_Period')['Avg_Delay'].mean()
-    delay_comparison.index = ['Normal Period', 'COVID Period']
-    delay_comparison.plot(kind='bar', color=['lightgreen', 'orange'])
+    data['delay_comparison'].plot(kind='bar', color=['lightgreen', 'orange'])
     plt.title('Average Delays: Normal vs COVID Period')
     plt.ylabel('Average Delay (Minutes)')
     plt.xticks(rotation=45)
@@ -281,78 +491,99 @@ def covid_impact_analysis(df):
     plt.subplot(2, 4, 7)
     # This would require carrier-specific data from the original dataset
     # For now, show general pattern
-    yearly_pattern = df.groupby('Year')['Flight_Count'].mean()
-    yearly_pattern.plot(kind='line', marker='o', color='purple')
+    data['yearly_pattern'].plot(kind='line', marker='o', color='purple')
     plt.title('Yearly Flight Volume Trend')
     plt.xlabel('Year')
     plt.ylabel('Average Daily Flights')
 
     # 8. Weekly patterns pre vs during COVID
     plt.subplot(2, 4, 8)
-    pre_covid_weekly = df[df['Year'] <= 2019].groupby('DayOfWeek')['Flight_Count'].mean()
-    covid_weekly = df[df['COVID_Period']].groupby('DayOfWeek')['Flight_Count'].mean()
-
     days = ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun']
-    plt.plot(days, pre_covid_weekly.values, marker='o', label='Pre-COVID', color='green')
-    plt.plot(days, covid_weekly.values, marker='s', label='During COVID', color='red')
+    plt.plot(days, data['pre_covid_weekly'].values, marker='o', label='Pre-COVID', color='green')
+    plt.plot(days, data['covid_weekly'].values, marker='s', label='During COVID', color='red')
     plt.title('Weekly Patterns: Pre vs During COVID')
     plt.xlabel('Day of Week')
     plt.ylabel('Average Daily Flights')
     plt.legend()
 
     plt.tight_layout()
-    plt.savefig('covid_impact_analysis.png', dpi=300, bbox_inches='tight')
-    plt.show()
+    return fig
 
-def economic_correlation_analysis(df):
-    """Analyze economic factors impact on aviation"""
+def covid_impact_analysis(df, figures=None):
+    """Comprehensive COVID-19 impact analysis"""
     print("\n" + "="*50)
-    print("ECONOMIC CORRELATION ANALYSIS")
+    print("COVID-19 IMPACT ANALYSIS")
     print("="*50)
 
-    plt.figure(figsize=(20, 12))
+    rollups = time_rollups(df)
+    pre_covid = df[df['Year'] <= 2019]['Flight_Count'].mean()
+    during_covid = df[df['COVID_Period']]['Flight_Count'].mean()
+    post_covid = df[(df['Year'] >= 2022)]['Flight_Count'].mean()
+
+    recovery_data = rollup_series(rollups, 'month', 'Flight_Count', start='2020-01-01').reset_index()
+    recovery_data['Period'] = recovery_data['Date'].dt.strftime('%Y-%m')
+
+    delay_comparison = df.groupby('COVID_Period')['Avg_Delay'].mean()
+    delay_comparison.index = ['Normal Period', 'COVID Period']
+
+    yearly_pattern = rollup_series(rollups, 'year', 'Flight_Count')
+    yearly_pattern.index = yearly_pattern.index.year
+
+    submit_figure(figures, _draw_covid_impact_analysis, {
+        'monthly_flights': rollup_series(rollups, 'month', 'Flight_Count', 'sum').reset_index(),
+        'travelers_flights': scatter_points(df['Travelers_Total'], df['Flight_Count']),
+        'period_volumes': [pre_covid, during_covid, post_covid],
+        'recovery_data': recovery_data,
+        'covid_gdp': rollup_series(rollups, 'year', 'GDP_Growth', start='2019-01-01', end='2021-12-31'),
+        'covid_unemployment': rollup_series(rollups, 'year', 'Unemployment_Rate', start='2019-01-01', end='2021-12-31'),
+        'delay_comparison': delay_comparison,
+        'yearly_pattern': yearly_pattern,
+        'pre_covid_weekly': df[df['Year'] <= 2019].groupby('DayOfWeek')['Flight_Count'].mean(),
+        'covid_weekly': df[df['COVID_Period']].groupby('DayOfWeek')['Flight_Count'].mean(),
+    }, 'covid_impact_analysis.png')
+
+def _draw_economic_correlation_analysis(data):
+    """Economic correlation figure from its aggregated inputs"""
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+    fig = plt.figure(figsize=(20, 12))
 
     # 1. Flight volume vs economic indicators
     plt.subplot(2, 4, 1)
-    economic_clean = df.dropna(subset=['GDP_Growth', 'Flight_Count'])
-    if not economic_clean.empty:
-        plt.scatter(economic_clean['GDP_Growth'], economic_clean['Flight_Count'], alpha=0.5)
+    if data['gdp_flights']['count']:
+        draw_scatter(plt.gca(), data['gdp_flights'], label='Days', alpha=0.5)
         plt.xlabel('GDP Growth (%)')
         plt.ylabel('Daily Flights')
         plt.title('GDP Growth vs Flight Volume')
 
     # 2. Unemployment vs travel
     plt.subplot(2, 4, 2)
-    unemployment_clean = df.dropna(subset=['Unemployment_Rate', 'Flight_Count'])
-    if not unemployment_clean.empty:
-        plt.scatter(unemployment_clean['Unemployment_Rate'], unemployment_clean['Flight_Count'], alpha=0.5)
+    if data['unemployment_flights']['count']:
+        draw_scatter(plt.gca(), data['unemployment_flights'], label='Days', alpha=0.5)
         plt.xlabel('Unemployment Rate (%)')
         plt.ylabel('Daily Flights')
         plt.title('Unemployment vs Flight Volume')
 
     # 3. Consumer confidence vs travel
     plt.subplot(2, 4, 3)
-    confidence_clean = df.dropna(subset=['Consumer_Confidence', 'Flight_Count'])
-    if not confidence_clean.empty:
-        plt.scatter(confidence_clean['Consumer_Confidence'], confidence_clean['Flight_Count'], alpha=0.5)
+    if data['confidence_flights']['count']:
+        draw_scatter(plt.gca(), data['confidence_flights'], label='Days', alpha=0.5)
         plt.xlabel('Consumer Confidence Index')
         plt.ylabel('Daily Flights')
         plt.title('Consumer Confidence vs Flight Volume')
 
     # 4. Fuel prices vs delays
     plt.subplot(2, 4, 4)
-    fuel_clean = df.dropna(subset=['Jet_Fuel_Price', 'Avg_Delay'])
-    if not fuel_clean.empty:
-        plt.scatter(fuel_clean['Jet_Fuel_Price'], fuel_clean['Avg_Delay'], alpha=0.5)
+    if data['fuel_delay']['count']:
+        draw_scatter(plt.gca(), data['fuel_delay'], label='Days', alpha=0.5)
         plt.xlabel('Jet Fuel Price ($/gallon)')
         plt.ylabel('Average Delay (Minutes)')
         plt.title('Fuel Prices vs Delays')
 
     # 5. Economic indicators over time
     plt.subplot(2, 4, 5)
-    monthly_econ = df.groupby(['Year', 'Month'])[['GDP_Growth', 'Unemployment_Rate', 'Consumer_Confidence']].first().dropna()
+    monthly_econ = data['monthly_econ']
     if not monthly_econ.empty:
-        monthly_econ.index = pd.to_datetime(monthly_econ.index.map(lambda x: f"{x[0]}-{x[1]:02d}-01"))
         monthly_econ['GDP_Growth'].plot(label='GDP Growth', ax=plt.gca())
         monthly_econ['Unemployment_Rate'].plot(label='Unemployment', ax=plt.gca())
         plt.title('Economic Indicators Over Time')
@@ -362,9 +593,8 @@ def economic_correlation_analysis(df):
 
     # 6. Fuel price trends
     plt.subplot(2, 4, 6)
-    fuel_trends = df.groupby(['Year', 'Month'])[['Jet_Fuel_Price', 'Crude_Oil_Price']].first().dropna()
+    fuel_trends = data['fuel_trends']
     if not fuel_trends.empty:
-        fuel_trends.index = pd.to_datetime(fuel_trends.index.map(lambda x: f"{x[0]}-{x[1]:02d}-01"))
         fuel_trends.plot(ax=plt.gca())
         plt.title('Fuel Price Trends')
         plt.xlabel('Date')
@@ -373,26 +603,65 @@ def economic_correlation_analysis(df):
 
     # 7. Holiday impact
     plt.subplot(2, 4, 7)
-    holiday_impact = df.groupby('Is_Holiday')['Flight_Count'].mean()
-    holiday_impact.index = ['Regular Day', 'Holiday']
-    holiday_impact.plot(kind='bar', color=['lightblue', 'orange'])
+    data['holiday_impact'].plot(kind='bar', color=['lightblue', 'orange'])
     plt.title('Holiday vs Regular Day Flight Volume')
     plt.ylabel('Average Daily Flights')
     plt.xticks(rotation=0)
 
     # 8. Correlation matrix
     plt.subplot(2, 4, 8)
-    corr_vars = ['Flight_Count', 'Avg_Delay', 'GDP_Growth', 'Unemployment_Rate',
-                 'Consumer_Confidence', 'Jet_Fuel_Price', 'Travelers_Total']
-    corr_df = df[corr_vars].dropna()
-    if not corr_df.empty:
-        correlation_matrix = corr_df.corr()
-        sns.heatmap(correlation_matrix, annot=True, cmap='coolwarm', center=0, ax=plt.gca())
+    if data['correlation_matrix'] is not None:
+        sns.heatmap(data['correlation_matrix'], annot=True, cmap='coolwarm', center=0, ax=plt.gca())
         plt.title('Economic-Aviation Correlation Matrix')
 
     plt.tight_layout()
-    plt.savefig('economic_correlation_analysis.png', dpi=300, bbox_inches='tight')
-    plt.show()
+    return fig
+
+def economic_correlation_analysis(df, figures=None):
+    """Analyze economic factors impact on aviation"""
+    print("\n" + "="*50)
+    print("ECONOMIC CORRELATION ANALYSIS")
+    print("="*50)
+
+    monthly_econ = df.groupby(['Year', 'Month'])[['GDP_Growth', 'Unemployment_Rate', 'Consumer_Confidence']].first().dropna()
+    if not monthly_econ.empty:
+        monthly_econ.index = pd.to_datetime(monthly_econ.index.map(lambda x: f"{x[0]}-{x[1]:02d}-01"))
+
+    fuel_trends = df.groupby(['Year', 'Month'])[['Jet_Fuel_Price', 'Crude_Oil_Price']].first().dropna()
+    if not fuel_trends.empty:
+        fuel_trends.index = pd.to_datetime(fuel_trends.index.map(lambda x: f"{x[0]}-{x[1]:02d}-01"))
+
+    holiday_impact = df.groupby('Is_Holiday')['Flight_Count'].mean()
+    holiday_impact.index = ['Regular Day', 'Holiday']
+
+    corr_vars = ['Flight_Count', 'Avg_Delay', 'GDP_Growth', 'Unemployment_Rate',
+                 'Consumer_Confidence', 'Jet_Fuel_Price', 'Travelers_Total']
+    # Pairwise-complete: each coefficient uses every day where both series exist
+    correlations = correlation_with_ci(df, corr_vars)
+    has_correlations = correlations['n'].values.max() > 1
+
+    # Each indicator pair is plotted over the days where both values exist
+    scatters = {}
+    for name, (x, y) in {'gdp_flights': ('GDP_Growth', 'Flight_Count'),
+                         'unemployment_flights': ('Unemployment_Rate', 'Flight_Count'),
+                         'confidence_flights': ('Consumer_Confidence', 'Flight_Count'),
+                         'fuel_delay': ('Jet_Fuel_Price', 'Avg_Delay')}.items():
+        clean = df.dropna(subset=[x, y])
+        scatters[name] = scatter_points(clean[x], clean[y])
+
+    submit_figure(figures, _draw_economic_correlation_analysis, {
+        **scatters,
+        'monthly_econ': monthly_econ,
+        'fuel_trends': fuel_trends,
+        'holiday_impact': holiday_impact,
+        'correlation_matrix': correlations['r'] if has_correlations else None,
+    }, 'economic_correlation_analysis.png')
+
+    if has_correlations:
+        print("Correlation with daily flights:")
+        for var in corr_vars[1:]:
+            print(f"- {var}: {format_correlation(correlations, var, 'Flight_Count')} "
+                  f"(n={correlations['n'].loc[var, 'Flight_Count']:,})")
 
 def comprehensive_insights_summary(df):
     """Generate comprehensive insights summary"""
@@ -420,11 +689,12 @@ def comprehensive_insights_summary(df):
     # Economic correlations
     econ_clean = df.dropna(subset=['GDP_Growth', 'Flight_Count', 'Unemployment_Rate'])
     if not econ_clean.empty:
-        gdp_correlation = econ_clean['GDP_Growth'].corr(econ_clean['Flight_Count'])
-        unemployment_correlation = econ_clean['Unemployment_Rate'].corr(econ_clean['Flight_Count'])
+        economic_correlations = correlation_with_ci(econ_clean, ['GDP_Growth', 'Unemployment_Rate', 'Flight_Count'])
+        gdp_correlation = format_correlation(economic_correlations, 'GDP_Growth', 'Flight_Count')
+        unemployment_correlation = format_correlation(economic_correlations, 'Unemployment_Rate', 'Flight_Count')
 
     print(f"DATASET OVERVIEW:")
-    print(f"- Analysis period: {df['Date'].min()} to {df['Date'].max()}")
+    print(f"- Analysis period: {df['Date'].min().date()} to {df['Date'].max().date()}")
     print(f"- Total days analyzed: {total_days:,}")
     print(f"- Total flights: {total_flights:,}")
     print(f"- Average daily flights: {avg_daily_flights:.1f}")
@@ -441,11 +711,11 @@ def comprehensive_insights_summary(df):
 
     if 'gdp_correlation' in locals():
         print(f"\nECONOMIC CORRELATIONS:")
-        print(f"- GDP Growth correlation with flights: {gdp_correlation:.3f}")
-        print(f"- Unemployment correlation with flights: {unemployment_correlation:.3f}")
+        print(f"- GDP Growth correlation with flights: {gdp_correlation}")
+        print(f"- Unemployment correlation with flights: {unemployment_correlation}")
 
     # Seasonal patterns
-    seasonal_flights = df.groupby('Month')['Flight_Count'].mean()
+    seasonal_flights = month_of_year_mean(time_rollups(df), 'Flight_Count')
     peak_month = seasonal_flights.idxmax()
     low_month = seasonal_flights.idxmin()
 
@@ -465,23 +735,30 @@ def comprehensive_insights_summary(df):
 
     print("="*60)
 
-def main():
+def main(streaming=False, incremental=False, engine=None, max_workers=None):
     """Main integrated analysis function"""
     print("Starting Comprehensive Integrated Analysis")
     print("=" * 70)
 
-    # Load and integrate all data
-    df = load_and_integrate_all_data()
-
-    # Save integrated dataset
-    df.to_csv('integrated_flight_analysis_dataset.csv', index=False)
-    print(f"\nIntegrated dataset saved as 'integrated_flight_analysis_dataset.csv'")
-
-    # Run all analyses
-    weather_delay_analysis(df)
-    covid_impact_analysis(df)
-    economic_correlation_analysis(df)
+    if incremental:
+        # Only new or changed dates are recomputed; the CSV is not rewritten
+        df = update_integrated_dataset()
+        print(f"\nIntegrated dataset stored under '{INTEGRATED_STORE_DIR}/'")
+    else:
+        # Load and integrate all data
+        df = load_and_integrate_all_data(streaming=streaming, engine=engine)
+
+        # Save integrated dataset
+        df.to_csv('integrated_flight_analysis_dataset.csv', index=False)
+        print(f"\nIntegrated dataset saved as 'integrated_flight_analysis_dataset.csv'")
+
+    # Run all analyses; figures are queued and drawn concurrently at the end
+    figures = []
+    weather_delay_analysis(df, figures)
+    covid_impact_analysis(df, figures)
+    economic_correlation_analysis(df, figures)
     comprehensive_insights_summary(df)
+    render_figures(figures, max_workers=max_workers)
 
     print("\n" + "="*70)
     print("INTEGRATED ANALYSIS COMPLETED")
@@ -495,4 +772,8 @@ def main():
     return df
 
 if __name__ == "__main__":
-    integrated_df = main()
\ No newline at end of file
+    if '--headless' in sys.argv:
+        set_headless()
+    engine = next((arg.split('=', 1)[1] for arg in sys.argv if arg.startswith('--engine=')), None)
+    integrated_df = main(streaming='--streaming' in sys.argv, incremental='--incremental' in sys.argv,
+                         engine=engine)
\ No newline at end of file
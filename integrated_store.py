@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Year_Month-Partitioned Store for the Integrated Daily Dataset
+"""
+
+import pandas as pd
+import json
+import os
+import shutil
+import warnings
+warnings.filterwarnings('ignore')
+
+INTEGRATED_STORE_DIR = 'integrated_store'
+STORE_FORMAT_VERSION = 2
+MANIFEST_NAME = '_manifest.json'
+
+def _partition_dir(store_dir, year_month):
+    """Hive-style directory for one Year_Month partition"""
+    return os.path.join(store_dir, f'Year_Month={year_month}')
+
+def _partition_file(store_dir, year_month):
+    return os.path.join(_partition_dir(store_dir, year_month), 'part-0.parquet')
+
+def list_partitions(store_dir=INTEGRATED_STORE_DIR):
+    """Year_Month labels of the partitions present in the store"""
+    if not os.path.isdir(store_dir):
+        return []
+    return sorted(name.split('=', 1)[1] for name in os.listdir(store_dir)
+                  if name.startswith('Year_Month=') and
+                  os.path.exists(os.path.join(store_dir, name, 'part-0.parquet')))
+
+def read_store_manifest(store_dir=INTEGRATED_STORE_DIR):
+    """Read the store manifest, returning None when missing or from another format"""
+    try:
+        with open(os.path.join(store_dir, MANIFEST_NAME)) as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return manifest if manifest.get('format_version') == STORE_FORMAT_VERSION else None
+
+def write_store_manifest(manifest, store_dir=INTEGRATED_STORE_DIR):
+    """Write the store manifest atomically"""
+    os.makedirs(store_dir, exist_ok=True)
+    path = os.path.join(store_dir, MANIFEST_NAME)
+    with open(path + '.tmp', 'w') as f:
+        json.dump(dict(manifest, format_version=STORE_FORMAT_VERSION), f, indent=2)
+    os.replace(path + '.tmp', path)
+
+def store_manifest_mtime(store_dir=INTEGRATED_STORE_DIR):
+    """Modification time of the store manifest, or None when there is no store"""
+    path = os.path.join(store_dir, MANIFEST_NAME)
+    return os.path.getmtime(path) if os.path.exists(path) else None
+
+def integrated_dtypes(df):
+    """The integrated frame in the dtypes read_csv gives for the CSV: int64/float64/bool, Year_Month as str"""
+    columns = {}
+    for col, dtype in df.dtypes.items():
+        values = df[col]
+        if isinstance(dtype, pd.PeriodDtype):
+            columns[col] = values.astype(str)
+        elif pd.api.types.is_bool_dtype(dtype):
+            columns[col] = values.astype(object if values.isna().any() else bool)
+        elif pd.api.types.is_integer_dtype(dtype):
+            # Nullable or narrow integers; a gap turns the column float, as in the CSV
+            columns[col] = values.astype('float64' if values.isna().any() else 'int64')
+        elif pd.api.types.is_float_dtype(dtype):
+            columns[col] = values.astype('float64')
+    return df.assign(**columns)
+
+def read_integrated_store(store_dir=INTEGRATED_STORE_DIR, months=None):
+    """Read the integrated dataset (or selected months) from the partitioned store"""
+    wanted = list_partitions(store_dir) if months is None else [str(m) for m in months]
+    frames = [pd.read_parquet(_partition_file(store_dir, month)) for month in wanted
+              if os.path.exists(_partition_file(store_dir, month))]
+    if not frames:
+        return pd.DataFrame()
+    return integrated_dtypes(pd.concat(frames, ignore_index=True).sort_values('Date').reset_index(drop=True))
+
+def upsert_integrated_rows(rows, drop_dates=(), store_dir=INTEGRATED_STORE_DIR, replace_all=False):
+    """Replace the given dates in the store, rewriting only the partitions they touch"""
+    if replace_all and os.path.isdir(store_dir):
+        for month in list_partitions(store_dir):
+            shutil.rmtree(_partition_dir(store_dir, month))
+
+    rows = integrated_dtypes(rows.assign(Year_Month=rows['Date'].dt.to_period('M')))
+    drop_dates = pd.DatetimeIndex(drop_dates)
+    replaced = pd.DatetimeIndex(rows['Date']).union(drop_dates)
+    touched = sorted(set(rows['Year_Month'].unique()) |
+                     set(str(m) for m in drop_dates.to_period('M').unique()))
+
+    for month in touched:
+        path = _partition_file(store_dir, month)
+        month_rows = rows[rows['Year_Month'] == month]
+        if os.path.exists(path):
+            existing = integrated_dtypes(pd.read_parquet(path))
+            existing = existing[~existing['Date'].isin(replaced)]
+            month_rows = pd.concat([existing, month_rows], ignore_index=True)
+
+        if month_rows.empty:
+            shutil.rmtree(_partition_dir(store_dir, month), ignore_errors=True)
+            continue
+
+        os.makedirs(_partition_dir(store_dir, month), exist_ok=True)
+        month_rows.sort_values('Date').to_parquet(path + '.tmp', index=False)
+        os.replace(path + '.tmp', path)
+
+    return touched
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Mergeable Quantile Sketches for Departure Delays
+"""
+
+import pandas as pd
+import numpy as np
+from flight_data_loader import DEPARTURES_CSV, iter_departures, to_date_key
+from aggregation_cube import encode_key
+import warnings
+warnings.filterwarnings('ignore')
+
+DELAY_COLUMN = 'Departure delay (Minutes)'
+SKETCH_GROUPINGS = ('Date', 'Carrier Code', 'Destination Airport')
+SKETCH_QUANTILES = (0.5, 0.9, 0.99)
+
+# Log-spaced buckets: every value in a bucket is within RELATIVE_ACCURACY of the
+# bucket's representative value. Magnitudes below MIN_MAGNITUDE share the zero
+# bucket (delays are whole minutes, so zero stays exact) and magnitudes are
+# capped at MAX_MAGNITUDE, which bounds a group to SKETCH_BUCKETS counters.
+RELATIVE_ACCURACY = 0.01
+MIN_MAGNITUDE = 0.5
+MAX_MAGNITUDE = 2 ** 15
+GAMMA = (1 + RELATIVE_ACCURACY) / (1 - RELATIVE_ACCURACY)
+LOG_GAMMA = np.log(GAMMA)
+KEY_OFFSET = 1 - int(np.ceil(np.log(MIN_MAGNITUDE) / LOG_GAMMA))
+MAX_KEY = int(np.ceil(np.log(MAX_MAGNITUDE) / LOG_GAMMA)) + KEY_OFFSET
+SKETCH_BUCKETS = 2 * MAX_KEY + 1
+
+def bucket_keys(values):
+    """Signed bucket key per value: 0 for ~zero, +/-k for positive/negative magnitudes"""
+    magnitude = np.minimum(np.abs(values), MAX_MAGNITUDE)
+    keys = np.ceil(np.log(np.maximum(magnitude, MIN_MAGNITUDE)) / LOG_GAMMA).astype(np.int64) + KEY_OFFSET
+    keys = np.where(magnitude < MIN_MAGNITUDE, 0, keys)
+    return np.where(values < 0, -keys, keys)
+
+def bucket_values(keys):
+    """Representative value of each bucket key"""
+    keys = np.asarray(keys, dtype=np.int64)
+    magnitude = 2 * GAMMA ** (np.abs(keys) - KEY_OFFSET) / (GAMMA + 1)
+    return np.where(keys == 0, 0.0, np.sign(keys) * magnitude)
+
+def build_sketch(df, group_column, value_column=DELAY_COLUMN):
+    """Per-group sketch as a (group, bucket key) -> count Series, from one bincount"""
+    codes, labels = encode_key(df[group_column])
+    values = df[value_column].to_numpy(dtype='float64', na_value=np.nan)
+    present = (codes >= 0) & ~np.isnan(values)
+
+    slots = bucket_keys(values[present]) + MAX_KEY
+    counts = np.bincount(codes[present] * SKETCH_BUCKETS + slots,
+                         minlength=len(labels) * SKETCH_BUCKETS)
+    nonzero = np.flatnonzero(counts)
+
+    index = pd.MultiIndex.from_arrays([labels[nonzero // SKETCH_BUCKETS],
+                                       nonzero % SKETCH_BUCKETS - MAX_KEY],
+                                      names=[group_column, 'bucket'])
+    return pd.Series(counts[nonzero], index=index, name='count')
+
+def merge_sketches(*sketches):
+    """Combine sketches built on different chunks or workers by adding bucket counts"""
+    sketches = [s for s in sketches if s is not None]
+    if not sketches:
+        return None
+    merged = sketches[0]
+    for sketch in sketches[1:]:
+        merged = merged.add(sketch, fill_value=0)
+    return merged.astype('int64').sort_index()
+
+def sketch_quantiles(sketch, quantiles=SKETCH_QUANTILES):
+    """Approximate quantiles per group, within RELATIVE_ACCURACY of a value at that rank"""
+    # Magnitudes below MIN_MAGNITUDE come back as 0 (absolute error under MIN_MAGNITUDE)
+    sketch = sketch.sort_index()
+    groups = sketch.index.get_level_values(0)
+    keys = sketch.index.get_level_values(1).to_numpy()
+    by_group = sketch.groupby(level=0, sort=False)
+    upper = by_group.cumsum().to_numpy()
+    lower = upper - sketch.to_numpy()
+    total = by_group.transform('sum').to_numpy()
+
+    result = pd.DataFrame({'count': by_group.sum()})
+    for q in quantiles:
+        rank = np.floor(q * (total - 1))
+        hit = (lower <= rank) & (rank < upper)
+        result[f'p{q * 100:g}'] = pd.Series(bucket_values(keys[hit]), index=groups[hit])
+    return result
+
+def sketch_departures(path=DEPARTURES_CSV, groupings=SKETCH_GROUPINGS, chunksize=250_000):
+    """Delay sketches per date, carrier and destination, built chunk by chunk and merged"""
+    columns = ['Date (MM/DD/YYYY)', DELAY_COLUMN] + [g for g in groupings if g != 'Date']
+    sketches = dict.fromkeys(groupings)
+    for chunk in iter_departures(path, chunksize=chunksize, columns=columns):
+        chunk['Date'] = to_date_key(chunk['Date (MM/DD/YYYY)'])
+        for grouping in groupings:
+            sketches[grouping] = merge_sketches(sketches[grouping], build_sketch(chunk, grouping))
+    return sketches
+
+if __name__ == "__main__":
+    sketches = sketch_departures()
+    for grouping in ('Carrier Code', 'Destination Airport'):
+        print(f"\nDeparture delay percentiles by {grouping}:")
+        print(sketch_quantiles(sketches[grouping]).round(1).to_string())
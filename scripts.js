@@ -10,6 +10,7 @@ document.addEventListener('DOMContentLoaded', function() {
     initializeStoryTabs();
     initializeModal();
     initializeScrollEffects();
+    initializeLazyLoading();
     loadVisualizationData();
 });
 
@@ -554,36 +555,97 @@ function animateSectionContent(section) {
 // Data Visualization Functions
 // ==========================================================================
 
-function loadVisualizationData() {
-    // Simulate loading real data (in a real application, this would fetch from APIs)
-    const insights = {
-        covidImpact: {
-            maxDrop: -54.2,
-            recoveryLevel: 108.4,
-            timeToRecover: 18 // months
-        },
-        economicCorrelation: {
-            gdpCorrelation: 0.701,
-            unemploymentCorrelation: -0.426,
-            consumerConfidenceCorrelation: 0.643
-        },
-        operationalEfficiency: {
-            congestionPenalty: 11.3,
-            volumeDelayCorrelation: 0.301,
-            peakHourDelays: 16.4
-        },
-        temporalPatterns: {
-            seasonalVariation: 4.9,
-            peakMonth: 'August',
-            busiestDay: 'Monday'
-        }
-    };
+// Precomputed aggregates written by web_export.py: a small manifest with the
+// headline insights and monthly overview, plus one gzipped file per year
+const WEB_DATA_DIR = 'site_data';
+const DAILY_DETAIL_MAX_YEARS = 2;
+const yearDataCache = new Map();
+
+// Shown when the export has not been generated (e.g. opening index.html from disk)
+const FALLBACK_INSIGHTS = {
+    covidImpact: {
+        maxDrop: -54.2,
+        recoveryLevel: 108.4,
+        timeToRecover: 18, // months
+        milestones: [
+            { date: '2020-03-15', event: 'COVID Declaration', value: 100 },
+            { date: '2020-04-01', event: 'Lockdown Peak', value: 45 },
+            { date: '2021-07-01', event: 'Vaccination Rollout', value: 70 },
+            { date: '2022-01-01', event: 'Recovery Phase', value: 95 },
+            { date: '2024-01-01', event: 'Full Recovery', value: 108 }
+        ]
+    },
+    economicCorrelation: {
+        gdpCorrelation: 0.701,
+        unemploymentCorrelation: -0.426,
+        consumerConfidenceCorrelation: 0.643,
+        labels: ['Flights', 'GDP', 'Unemployment', 'Confidence'],
+        matrix: [
+            [1.0, 0.701, -0.426, 0.643],
+            [0.701, 1.0, -0.523, 0.789],
+            [-0.426, -0.523, 1.0, -0.634],
+            [0.643, 0.789, -0.634, 1.0]
+        ]
+    },
+    operationalEfficiency: {
+        congestionPenalty: 11.3,
+        volumeDelayCorrelation: 0.301,
+        peakHourDelays: 16.4
+    },
+    temporalPatterns: {
+        seasonalVariation: 4.9,
+        peakMonth: 'August',
+        busiestDay: 'Monday'
+    }
+};
+
+async function fetchJson(path) {
+    const response = await fetch(path);
+    if (!response.ok) {
+        throw new Error(`${path}: HTTP ${response.status}`);
+    }
+
+    // Static hosts serve .gz files as-is; servers that set Content-Encoding
+    // hand over the inflated body, so check for the gzip magic bytes
+    const bytes = new Uint8Array(await response.arrayBuffer());
+    if (bytes[0] === 0x1f && bytes[1] === 0x8b) {
+        const stream = new Blob([bytes]).stream().pipeThrough(new DecompressionStream('gzip'));
+        return JSON.parse(await new Response(stream).text());
+    }
+    return JSON.parse(new TextDecoder().decode(bytes));
+}
+
+function loadYearData(manifest, year) {
+    // One request per year, shared by every chart that needs it
+    const entry = manifest.years[year];
+    if (!entry) return Promise.resolve(null);
+
+    if (!yearDataCache.has(year)) {
+        yearDataCache.set(year, fetchJson(`${WEB_DATA_DIR}/${entry.file}`).catch(error => {
+            yearDataCache.delete(year);
+            throw error;
+        }));
+    }
+    return yearDataCache.get(year);
+}
+
+async function loadVisualizationData() {
+    let manifest = null;
+    let insights = FALLBACK_INSIGHTS;
+
+    try {
+        manifest = await fetchJson(`${WEB_DATA_DIR}/manifest.json`);
+        insights = manifest.insights;
+    } catch (error) {
+        console.warn('Web data export not available - showing summary figures only', error);
+    }
 
     // Update dynamic content
     updateDynamicContent(insights);
+    updateSummaryCharts(insights);
 
     // Create interactive visualizations
-    createInteractiveCharts(insights);
+    createInteractiveCharts(insights, manifest);
 }
 
 function updateDynamicContent(insights) {
@@ -615,27 +677,56 @@ function formatMetricValue(value, metric) {
     return value.toString();
 }
 
-function createInteractiveCharts(insights) {
+function updateChartData(canvasId, values, labels) {
+    const ctx = document.getElementById(canvasId);
+    const chart = ctx && typeof Chart !== 'undefined' ? Chart.getChart(ctx) : undefined;
+    if (!chart || !values || values.some(value => value === null)) return;
+
+    if (labels) {
+        chart.data.labels = labels;
+    }
+    chart.data.datasets[0].data = values;
+    chart.update();
+    return chart;
+}
+
+function updateSummaryCharts(insights) {
+    // The Chart.js panels are drawn with summary figures first, then refreshed from the export
+    const economic = insights.economicCorrelation;
+    updateChartData('covidChart', insights.covidImpact.periodFlights);
+    updateChartData('economicChart', [economic.gdpCorrelation, economic.unemploymentCorrelation,
+                                      economic.consumerConfidenceCorrelation]);
+    updateChartData('operationalChart', insights.operationalEfficiency.volumeDelays,
+                    insights.operationalEfficiency.volumeLabels);
+
+    // The y axis starts near the data rather than at zero, so follow the real range
+    const monthlyAverages = insights.temporalPatterns.monthlyAverages;
+    const temporalChart = updateChartData('temporalChart', monthlyAverages);
+    if (temporalChart) {
+        temporalChart.options.scales.y.min = Math.floor(Math.min(...monthlyAverages) * 0.95);
+        temporalChart.update();
+    }
+}
+
+function createInteractiveCharts(insights, manifest) {
     // Create advanced visualizations using Plotly
-    createTimeSeriesChart();
-    createCorrelationHeatmap();
-    createRecoveryTimeline();
+    createTimeSeriesChart(manifest);
+    createCorrelationHeatmap(insights);
+    createRecoveryTimeline(insights, manifest);
 }
 
-function createTimeSeriesChart() {
+function createTimeSeriesChart(manifest) {
     const container = document.getElementById('timeseries-chart');
-    if (!container) return;
+    if (!container || !manifest || typeof Plotly === 'undefined') return;
 
-    // Sample time series data
-    const dates = generateDateRange('2017-07-01', '2024-12-31');
-    const flightCounts = generateFlightData(dates);
-
-    const trace = {
-        x: dates,
-        y: flightCounts,
+    // Monthly overview from the manifest; zooming into a short window swaps in
+    // the daily series for just the years it covers
+    const overview = {
+        x: manifest.monthly.Date,
+        y: manifest.monthly.Flight_Count,
         type: 'scatter',
         mode: 'lines',
-        name: 'Daily Flights',
+        name: 'Average Daily Flights (monthly)',
         line: {
             color: '#2563eb',
             width: 2
@@ -649,24 +740,46 @@ function createTimeSeriesChart() {
         margin: { t: 40, r: 40, b: 40, l: 60 }
     };
 
-    if (typeof Plotly !== 'undefined') {
-        Plotly.newPlot(container, [trace], layout, {responsive: true});
-    }
+    Plotly.newPlot(container, [overview], layout, {responsive: true});
+
+    container.on('plotly_relayout', async event => {
+        const start = event['xaxis.range[0]'];
+        const end = event['xaxis.range[1]'];
+        if (event['xaxis.autorange'] || start === undefined) {
+            Plotly.restyle(container, { x: [overview.x], y: [overview.y], name: overview.name }, [0]);
+            return;
+        }
+
+        const firstYear = new Date(start).getFullYear();
+        const lastYear = new Date(end).getFullYear();
+        if (lastYear - firstYear + 1 > DAILY_DETAIL_MAX_YEARS) return;
+
+        const years = [];
+        for (let year = firstYear; year <= lastYear; year++) {
+            years.push(String(year));
+        }
+        try {
+            const payloads = (await Promise.all(years.map(year => loadYearData(manifest, year)))).filter(Boolean);
+            Plotly.restyle(container, {
+                x: [payloads.flatMap(payload => payload.daily.Date)],
+                y: [payloads.flatMap(payload => payload.daily.Flight_Count)],
+                name: 'Daily Flights'
+            }, [0]);
+        } catch (error) {
+            console.warn('Daily flight data could not be loaded', error);
+        }
+    });
 }
 
-function createCorrelationHeatmap() {
+function createCorrelationHeatmap(insights) {
     const container = document.getElementById('correlation-heatmap');
     if (!container) return;
 
+    const economic = insights.economicCorrelation;
     const data = [{
-        z: [
-            [1.0, 0.701, -0.426, 0.643],
-            [0.701, 1.0, -0.523, 0.789],
-            [-0.426, -0.523, 1.0, -0.634],
-            [0.643, 0.789, -0.634, 1.0]
-        ],
-        x: ['Flights', 'GDP', 'Unemployment', 'Confidence'],
-        y: ['Flights', 'GDP', 'Unemployment', 'Confidence'],
+        z: economic.matrix,
+        x: economic.labels,
+        y: economic.labels,
         type: 'heatmap',
         colorscale: 'RdBu'
     }];
@@ -681,18 +794,15 @@ function createCorrelationHeatmap() {
     }
 }
 
-function createRecoveryTimeline() {
+function createRecoveryTimeline(insights, manifest) {
     const container = document.getElementById('recovery-timeline');
     if (!container) return;
 
-    // Recovery milestones
-    const milestones = [
-        { date: '2020-03-15', event: 'COVID Declaration', value: 100 },
-        { date: '2020-04-01', event: 'Lockdown Peak', value: 45 },
-        { date: '2021-07-01', event: 'Vaccination Rollout', value: 70 },
-        { date: '2022-01-01', event: 'Recovery Phase', value: 95 },
-        { date: '2024-01-01', event: 'Full Recovery', value: 108 }
-    ];
+    // Recovery milestones, as a percentage of pre-COVID daily flights
+    const milestones = insights.covidImpact.milestones.slice();
+    if (manifest) {
+        milestones.push({ date: manifest.range[1], event: 'Current Level', value: insights.covidImpact.recoveryLevel });
+    }
 
     const trace = {
         x: milestones.map(m => m.date),
@@ -722,50 +832,6 @@ function createRecoveryTimeline() {
 // Utility Functions
 // ==========================================================================
 
-function generateDateRange(start, end) {
-    const dates = [];
-    const startDate = new Date(start);
-    const endDate = new Date(end);
-
-    for (let d = new Date(startDate); d <= endDate; d.setDate(d.getDate() + 1)) {
-        dates.push(new Date(d).toISOString().split('T')[0]);
-    }
-
-    return dates;
-}
-
-function generateFlightData(dates) {
-    // Generate realistic flight data with COVID impact
-    return dates.map((date, index) => {
-        const d = new Date(date);
-        const year = d.getFullYear();
-        const month = d.getMonth();
-
-        let baseFlights = 95;
-
-        // COVID impact
-        if (year === 2020 && month >= 2) {
-            baseFlights *= (month >= 3 && month <= 6) ? 0.4 : 0.7;
-        } else if (year === 2021 && month <= 6) {
-            baseFlights *= 0.8;
-        } else if (year >= 2022) {
-            baseFlights *= 1.08;
-        }
-
-        // Seasonal variation
-        const seasonalFactor = 1 + 0.1 * Math.sin((month * Math.PI) / 6);
-
-        // Weekly pattern
-        const dayOfWeek = d.getDay();
-        const weeklyFactor = dayOfWeek === 0 || dayOfWeek === 6 ? 0.85 : 1.1;
-
-        // Random variation
-        const randomFactor = 0.9 + Math.random() * 0.2;
-
-        return Math.round(baseFlights * seasonalFactor * weeklyFactor * randomFactor);
-    });
-}
-
 function debounce(func, wait) {
     let timeout;
     return function executedFunction(...args) {
@@ -795,20 +861,58 @@ function throttle(func, limit) {
 // Performance Optimization
 // ==========================================================================
 
-// Lazy loading for images
+// Downscaled AVIF/WebP copies of the figures, written by figure_renderer.py
+const IMAGE_MANIFEST_URL = 'responsive/manifest.json';
+let imageManifest = null;
+
+function loadImageManifest() {
+    // Without the manifest (not generated, or opened from file://) the PNGs load as before
+    if (!imageManifest) {
+        imageManifest = fetch(IMAGE_MANIFEST_URL)
+            .then(response => response.ok ? response.json() : {})
+            .catch(() => ({}));
+    }
+    return imageManifest;
+}
+
+// Wrap an image in <picture> so the browser picks the smallest derivative it can decode
+function applyResponsiveSources(img, derivatives) {
+    const picture = document.createElement('picture');
+    Object.entries(derivatives.sources).forEach(([format, variants]) => {
+        const source = document.createElement('source');
+        source.type = `image/${format}`;
+        source.srcset = variants.map(variant => `${variant.src} ${variant.width}w`).join(', ');
+        source.sizes = img.getAttribute('sizes') || '100vw';
+        picture.appendChild(source);
+    });
+
+    // Intrinsic size reserves the figure's aspect ratio before it arrives
+    img.width = derivatives.width;
+    img.height = derivatives.height;
+    img.parentNode.insertBefore(picture, img);
+    picture.appendChild(img);
+}
+
+// Lazy loading for images: the PNG stays the <img> fallback and the modal's full-size source
 function initializeLazyLoading() {
     const images = document.querySelectorAll('img[data-src]');
+    const manifest = loadImageManifest();
 
     const imageObserver = new IntersectionObserver((entries, observer) => {
         entries.forEach(entry => {
             if (entry.isIntersecting) {
                 const img = entry.target;
-                img.src = img.dataset.src;
-                img.classList.remove('lazy');
                 imageObserver.unobserve(img);
+                manifest.then(derivatives => {
+                    if (derivatives[img.dataset.src]) {
+                        applyResponsiveSources(img, derivatives[img.dataset.src]);
+                    }
+                    img.src = img.dataset.src;
+                    img.classList.remove('lazy');
+                });
             }
         });
-    });
+    }, { rootMargin: '200px 0px' });
 
     images.forEach(img => imageObserver.observe(img));
 }
@@ -0,0 +1,70 @@
+"""
+Shared Test Fixtures: a Small Synthetic Departures File and the Auxiliary Tables
+"""
+
+import os
+import sys
+import numpy as np
+import pandas as pd
+import pytest
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+from flight_data_loader import DEPARTURES_SCHEMA, load_dated_csv  # noqa: E402
+from integrated_analysis import AUXILIARY_FILES  # noqa: E402
+
+DEPARTURE_ROWS = 6000
+CARRIERS = ['AA', 'DL', 'UA', 'OO', 'NK']
+DESTINATIONS = [f'D{i:02d}' for i in range(12)]
+
+def make_departures(rows=DEPARTURE_ROWS, seed=0):
+    """Departures in the BTS layout: missing delays, and fractional taxi-out times in the last third only"""
+    rng = np.random.default_rng(seed)
+    dates = pd.Timestamp('2019-11-01') + pd.to_timedelta(np.sort(rng.integers(0, 240, rows)), unit='D')
+    scheduled = rng.integers(5 * 60, 23 * 60, rows)
+    delay = np.round(rng.gamma(1.5, 12.0, rows) - 12).astype(float)
+    delay[rng.random(rows) < 0.03] = np.nan
+    taxi = rng.integers(8, 40, rows).astype(float)
+    # A column whose type depends on which rows a reader sees: whole minutes
+    # first, then values only Float32 can hold
+    taxi[rows * 2 // 3:] += 0.5
+    late = np.where(rng.random(rows) < 0.2, rng.integers(1, 60, rows), 0)
+
+    def clock(minutes):
+        minutes = np.asarray(minutes) % (24 * 60)
+        return [f'{m // 60:02d}:{m % 60:02d}' for m in minutes]
+
+    actual = scheduled + np.nan_to_num(delay).astype(int)
+    frame = pd.DataFrame({
+        'Carrier Code': rng.choice(CARRIERS, rows),
+        'Date (MM/DD/YYYY)': dates.strftime('%m/%d/%Y'),
+        'Flight Number': rng.integers(1, 9999, rows),
+        'Tail Number': [f'N{i:04d}' for i in rng.integers(0, 60, rows)],
+        'Destination Airport': rng.choice(DESTINATIONS, rows),
+        'Scheduled departure time': clock(scheduled),
+        'Actual departure time': clock(actual),
+        'Scheduled elapsed time (Minutes)': rng.integers(60, 360, rows).astype(float),
+        'Actual elapsed time (Minutes)': rng.integers(55, 380, rows).astype(float),
+        'Departure delay (Minutes)': delay,
+        'Wheels-off time': clock(actual + taxi.astype(int)),
+        'Taxi-Out time (Minutes)': taxi,
+        'Delay Carrier (Minutes)': np.where(delay > 15, rng.integers(0, 30, rows), 0),
+        'Delay Weather (Minutes)': np.where(delay > 15, rng.integers(0, 10, rows), 0),
+        'Delay National Aviation System (Minutes)': np.where(delay > 15, rng.integers(0, 20, rows), 0),
+        'Delay Security (Minutes)': 0,
+        'Delay Late Aircraft Arrival (Minutes)': late,
+    })
+    return frame[list(DEPARTURES_SCHEMA)]
+
+@pytest.fixture
+def departures_csv(tmp_path):
+    """Path of a synthetic departures CSV"""
+    path = tmp_path / 'departures.csv'
+    make_departures().to_csv(path, index=False)
+    return str(path)
+
+@pytest.fixture
+def auxiliary():
+    """The committed weather, TSA, economic, fuel and holiday tables"""
+    return {name: load_dated_csv(os.path.join(REPO_DIR, path)) for name, path in AUXILIARY_FILES.items()}
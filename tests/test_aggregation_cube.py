@@ -0,0 +1,62 @@
+"""
+Aggregation Cube and Grouped Histograms Against pandas and numpy
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from aggregation_cube import (DELAY_COLUMN, EDA_GROUPING_SETS, build_aggregation_cube, cube_count, cube_mean,
+                              cube_nunique, cube_size, cube_std, cube_sum, grouped_histogram)
+from conftest import make_departures
+from feature_store import compute_features
+from flight_data_loader import load_departures
+
+MEASURES = [DELAY_COLUMN, 'Is_Significantly_Delayed', 'Taxi-Out time (Minutes)']
+
+@pytest.fixture(scope='module')
+def departures(tmp_path_factory):
+    path = tmp_path_factory.mktemp('cube') / 'departures.csv'
+    make_departures().to_csv(path, index=False)
+    raw = load_departures(str(path), use_cache=False)
+    return pd.concat([raw, compute_features(raw)], axis=1)
+
+@pytest.fixture(scope='module')
+def cube(departures):
+    return build_aggregation_cube(departures)
+
+def grouped(df, keys):
+    columns = {m: df[m].astype('float64') for m in MEASURES}
+    return pd.DataFrame(columns).groupby([df[key] for key in keys], observed=True)
+
+@pytest.mark.parametrize('keys', [grouping for grouping in EDA_GROUPING_SETS if grouping])
+def test_cube_matches_groupby(departures, cube, keys):
+    keys = list(keys)
+    expected = grouped(departures, keys)
+    size = cube_size(cube, keys)
+    np.testing.assert_array_equal(size.to_numpy(), departures.groupby(keys, observed=True).size().to_numpy())
+
+    for func, reference in [(cube_count, expected.count()), (cube_sum, expected.sum()),
+                            (cube_mean, expected.mean()), (cube_std, expected.std())]:
+        result = func(cube, keys, MEASURES)
+        assert list(result.index) == list(reference.index)
+        np.testing.assert_allclose(result.to_numpy(dtype='float64'), reference.to_numpy(dtype='float64'),
+                                   rtol=1e-9, atol=1e-9)
+
+def test_cube_totals_and_distinct_tails(departures, cube):
+    assert cube_size(cube, []) == len(departures)
+    assert cube_mean(cube, [], DELAY_COLUMN) == pytest.approx(departures[DELAY_COLUMN].astype('float64').mean())
+
+    tails = cube_nunique(cube, ['Carrier Code'], 'Tail Number')
+    expected = departures.groupby('Carrier Code', observed=True)['Tail Number'].nunique()
+    np.testing.assert_array_equal(tails.to_numpy(), expected.to_numpy())
+
+def test_grouped_histogram_matches_numpy(departures):
+    edges = [-30, -10, 0, 15, 45, 120]
+    result = grouped_histogram(departures, 'Carrier Code', DELAY_COLUMN, edges)
+
+    delay = departures[DELAY_COLUMN].astype('float64')
+    for carrier, counts in result.iterrows():
+        values = delay[departures['Carrier Code'] == carrier].dropna()
+        np.testing.assert_array_equal(counts.to_numpy(), np.histogram(values, bins=edges)[0])
+    assert list(result.index) == sorted(departures['Carrier Code'].unique())
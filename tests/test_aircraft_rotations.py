@@ -0,0 +1,98 @@
+"""
+Rotation Index, Per-Flight Metrics and Daily Utilization Against Naive Loops
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from aircraft_rotations import (build_rotation_index, daily_utilization, propagation_chains,
+                                rotation_metrics, tail_rows)
+from conftest import make_departures
+from flight_data_loader import apply_departures_schema
+
+@pytest.fixture(scope='module')
+def departures():
+    raw = make_departures(rows=8000, seed=5)
+    # One aircraft cannot leave twice in the same minute; ties would leave the order undefined
+    raw = raw.drop_duplicates(['Tail Number', 'Date (MM/DD/YYYY)', 'Scheduled departure time'])
+    raw.loc[raw.index[::97], 'Tail Number'] = None
+    raw.loc[raw.index[5::101], 'Scheduled departure time'] = None
+    df = apply_departures_schema(raw.reset_index(drop=True))
+
+    time = pd.to_datetime(df['Scheduled departure time'].astype(str), format='%H:%M', errors='coerce')
+    df['Scheduled'] = df['Date (MM/DD/YYYY)'] + pd.to_timedelta(time.dt.hour * 60 + time.dt.minute, unit='m')
+    return df
+
+def sorted_flights(df):
+    """Flights with a tail and a scheduled time, in rotation order"""
+    flights = df.dropna(subset=['Tail Number', 'Scheduled'])
+    return flights.sort_values(['Tail Number', 'Scheduled'], kind='mergesort')
+
+def test_offsets_slice_each_tail_in_departure_order(departures):
+    index = build_rotation_index(departures)
+    flights = sorted_flights(departures)
+    by_tail = flights.groupby('Tail Number', observed=True)
+
+    np.testing.assert_array_equal(np.diff(index['offsets']),
+                                  by_tail.size().reindex(index['tails'], fill_value=0).to_numpy())
+    for tail, group in by_tail:
+        np.testing.assert_array_equal(tail_rows(index, tail), group.index.to_numpy())
+
+def test_metrics_match_a_per_flight_loop(departures):
+    metrics = rotation_metrics(departures)
+    expected = pd.DataFrame({'Rotation_Leg': 0, 'Cycle_Gap_Minutes': np.nan, 'Upstream_Delay': np.nan,
+                             'Chain_Position': 0}, index=departures.index)
+
+    previous = None
+    flights = sorted_flights(departures)
+    minutes = {name: flights[name].to_numpy(dtype=float, na_value=np.nan)
+               for name in ['Departure delay (Minutes)', 'Actual elapsed time (Minutes)']}
+    flights = flights.assign(Minute=(flights['Scheduled'] - pd.Timestamp(0)) / pd.Timedelta(minutes=1), **minutes)
+    for row, flight in flights.iterrows():
+        late = flight['Delay Late Aircraft Arrival (Minutes)'] > 0
+        same_rotation = (previous is not None and previous['Tail Number'] == flight['Tail Number'] and
+                         previous['Scheduled'].date() == flight['Scheduled'].date())
+        if same_rotation:
+            arrival = (previous['Minute'] + previous['Departure delay (Minutes)'] +
+                       previous['Actual elapsed time (Minutes)'])
+            expected.loc[row, 'Rotation_Leg'] = expected.loc[previous.name, 'Rotation_Leg'] + 1
+            expected.loc[row, 'Cycle_Gap_Minutes'] = flight['Minute'] - arrival
+            expected.loc[row, 'Upstream_Delay'] = previous['Departure delay (Minutes)']
+        else:
+            expected.loc[row, 'Rotation_Leg'] = 1
+        if late:
+            inherited = same_rotation and expected.loc[previous.name, 'Chain_Position'] > 0
+            expected.loc[row, 'Chain_Position'] = expected.loc[previous.name, 'Chain_Position'] + 1 if inherited else 1
+        previous = flight
+
+    assert metrics['Rotation_Leg'].dtype == np.int32
+    for name in expected.columns:
+        np.testing.assert_allclose(metrics[name].to_numpy(dtype=float), expected[name].to_numpy(dtype=float),
+                                   err_msg=name)
+
+def test_chains_group_consecutive_late_legs(departures):
+    metrics = rotation_metrics(departures)
+    chains = propagation_chains(departures, metrics)
+    in_chain = metrics[metrics['Late_Aircraft_Chain'] >= 0]
+
+    assert chains['Legs'].sum() == (sorted_flights(departures)['Delay Late Aircraft Arrival (Minutes)'] > 0).sum()
+    np.testing.assert_array_equal(chains['Legs'], in_chain.groupby('Late_Aircraft_Chain').size())
+    np.testing.assert_array_equal(chains['Legs'], in_chain.groupby('Late_Aircraft_Chain')['Chain_Position'].max())
+
+def test_daily_utilization_matches_groupby(departures):
+    utilization = daily_utilization(departures)
+    flights = sorted_flights(departures)
+    by_day = flights.groupby(['Tail Number', flights['Scheduled'].dt.normalize()], observed=True)
+    expected = pd.DataFrame({
+        'Departures': by_day.size(),
+        'Block_Minutes': by_day['Actual elapsed time (Minutes)'].sum().astype('float64'),
+        'Active_Span_Hours': (by_day['Scheduled'].max() - by_day['Scheduled'].min()) / pd.Timedelta(hours=1),
+    })
+
+    actual = utilization.set_index(['Tail Number', 'Date']).sort_index()
+    np.testing.assert_array_equal(actual.index.get_level_values(0), expected.index.get_level_values(0))
+    np.testing.assert_array_equal(actual.index.get_level_values(1), expected.index.get_level_values(1))
+    for name in expected.columns:
+        np.testing.assert_allclose(actual[name].to_numpy(dtype=float), expected[name].to_numpy(dtype=float),
+                                   err_msg=name)
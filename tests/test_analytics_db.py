@@ -0,0 +1,45 @@
+"""
+SQLite Analytics Store Against pandas on the Source Files
+"""
+
+import os
+import numpy as np
+import pandas as pd
+import pytest
+
+import analytics_db
+from flight_data_loader import DEPARTURES_CSV, load_departures, to_date_key
+from integrated_analysis import aggregate_daily_flights, integrate_daily_flights
+
+@pytest.fixture
+def sources(departures_csv, auxiliary, tmp_path, monkeypatch):
+    """Departures under their default name, and the in-memory integrated frame (Period Year_Month, int32 keys)"""
+    monkeypatch.chdir(tmp_path)
+    os.replace(departures_csv, DEPARTURES_CSV)
+    flights = load_departures(DEPARTURES_CSV)
+    flights['Date'] = to_date_key(flights['Date (MM/DD/YYYY)'])
+    integrated = integrate_daily_flights(aggregate_daily_flights(flights), auxiliary)
+    monkeypatch.setattr(analytics_db, 'load_integrated_dataset', lambda: integrated)
+    return pd.read_csv(DEPARTURES_CSV), integrated
+
+def test_build_accepts_store_dtypes_and_answers_like_pandas(sources, tmp_path):
+    raw, integrated = sources
+    db_path = str(tmp_path / 'db' / 'analytics.sqlite')
+    analytics_db.build_analytics_db(db_path)
+    assert not os.path.exists(db_path + '.tmp')
+
+    conn = analytics_db.connect_analytics_db(db_path)
+    try:
+        delay = raw['Departure delay (Minutes)']
+        summary = analytics_db.delay_summary(conn, carrier='AA')
+        aa = raw['Carrier Code'] == 'AA'
+        assert summary['flights'] == aa.sum()
+        assert summary['avg_delay'] == pytest.approx(delay[aa].mean())
+        assert summary['on_time_pct'] == pytest.approx((delay[aa].dropna() <= 15).mean() * 100)
+
+        daily = analytics_db.daily_metrics(conn, ['Flight_Count', 'Year_Month', 'Avg_Delay'])
+        assert len(daily) == len(integrated)
+        assert daily['Year_Month'].tolist() == integrated['Year_Month'].astype(str).tolist()
+        np.testing.assert_allclose(daily['Avg_Delay'], integrated['Avg_Delay'])
+    finally:
+        conn.close()
@@ -0,0 +1,37 @@
+"""
+Correlation Engine Against DataFrame.corr, and Bootstrap Reproducibility
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import correlation_engine
+from correlation_engine import correlation_with_ci, pairwise_correlation
+
+@pytest.fixture
+def frame():
+    rng = np.random.default_rng(3)
+    x = rng.normal(size=400)
+    df = pd.DataFrame({'x': x, 'y': 0.5 * x + rng.normal(size=400), 'z': rng.normal(size=400)})
+    for col, share in [('x', 0.05), ('y', 0.1), ('z', 0.2)]:
+        df.loc[rng.random(400) < share, col] = np.nan
+    return df
+
+def test_pairwise_correlation_matches_pandas(frame):
+    result = pairwise_correlation(frame)
+    pd.testing.assert_frame_equal(result['r'], frame.corr(), atol=1e-12)
+    pd.testing.assert_frame_equal(result['n'], frame.notna().astype('int64').T.dot(frame.notna().astype('int64')))
+
+def test_bootstrap_does_not_depend_on_worker_count(frame, monkeypatch):
+    # Force the process pool even for this small frame
+    monkeypatch.setattr(correlation_engine, 'PARALLEL_WORK_THRESHOLD', 0)
+    results = [correlation_with_ci(frame, samples=300, seed=42, max_workers=workers) for workers in (1, 2, 3)]
+
+    for result in results[1:]:
+        pd.testing.assert_frame_equal(result['ci_low'], results[0]['ci_low'], check_exact=True)
+        pd.testing.assert_frame_equal(result['ci_high'], results[0]['ci_high'], check_exact=True)
+    assert results[0]['ci_low'].loc['x', 'y'] < results[0]['r'].loc['x', 'y'] < results[0]['ci_high'].loc['x', 'y']
+
+    other_seed = correlation_with_ci(frame, samples=300, seed=7, max_workers=1)
+    assert not other_seed['ci_low'].equals(results[0]['ci_low'])
@@ -0,0 +1,61 @@
+"""
+Derived Departure Features Against Their Plain-Pandas Definitions
+"""
+
+import numpy as np
+import pandas as pd
+
+from conftest import make_departures
+from feature_store import FEATURE_DEFINITIONS, add_derived_features, compute_features
+from flight_data_loader import load_departures
+
+def test_delay_flags_treat_missing_delay_as_not_delayed(departures_csv, tmp_path):
+    flights = load_departures(departures_csv, cache_dir=str(tmp_path / 'cache'))
+    features = compute_features(flights, ['Is_Delayed', 'Is_Significantly_Delayed'])
+    delay = pd.read_csv(departures_csv)['Departure delay (Minutes)']
+
+    assert delay.isna().any()
+    for name, minutes in [('Is_Delayed', 0), ('Is_Significantly_Delayed', 15)]:
+        assert features[name].dtype == bool
+        np.testing.assert_array_equal(features[name].to_numpy(), (delay > minutes).to_numpy())
+
+def test_feature_store_reuses_and_extends_stored_rows(tmp_path, capsys):
+    path = str(tmp_path / 'departures.csv')
+    cache_dir = str(tmp_path / 'cache')
+    store_path = str(tmp_path / 'features.parquet')
+    departures = make_departures()
+    half = len(departures) // 2
+
+    # First half computed and stored, then only the appended rows are new
+    departures.iloc[:half].to_csv(path, index=False)
+    add_derived_features(load_departures(path, cache_dir=cache_dir), path, store_path, cache_dir)
+    departures.iloc[half:].to_csv(path, mode='a', header=False, index=False)
+    flights = load_departures(path, cache_dir=cache_dir)
+    combined = add_derived_features(flights, path, store_path, cache_dir)
+    assert f"{len(departures) - half:,} new rows" in capsys.readouterr().out
+    pd.testing.assert_frame_equal(combined[list(FEATURE_DEFINITIONS)], compute_features(flights))
+
+    # Unchanged source: everything comes from the store
+    add_derived_features(flights, path, store_path, cache_dir)
+    assert "all derived features current" in capsys.readouterr().out
+
+    # Rewritten source: every row is recomputed
+    departures.iloc[::-1].to_csv(path, index=False)
+    flights = load_departures(path, cache_dir=cache_dir)
+    combined = add_derived_features(flights, path, store_path, cache_dir)
+    assert f"{len(departures):,} new rows" in capsys.readouterr().out
+    pd.testing.assert_frame_equal(combined[list(FEATURE_DEFINITIONS)], compute_features(flights))
+
+def test_date_features_keep_rows_without_a_date(tmp_path):
+    path = str(tmp_path / 'departures.csv')
+    departures = make_departures(rows=200)
+    departures.loc[7, 'Date (MM/DD/YYYY)'] = None
+    departures.to_csv(path, index=False)
+    flights = load_departures(path, use_cache=False)
+    features = compute_features(flights)
+    dates = pd.to_datetime(departures['Date (MM/DD/YYYY)'], format='%m/%d/%Y')
+
+    assert features.loc[7, ['Year', 'Month', 'DayOfWeek', 'Season']].isna().all()
+    assert not features.loc[7, 'Is_Weekend']
+    for name, expected in [('Year', dates.dt.year), ('Month', dates.dt.month), ('DayOfWeek', dates.dt.dayofweek)]:
+        np.testing.assert_array_equal(features[name].to_numpy(dtype=float, na_value=np.nan), expected.to_numpy())
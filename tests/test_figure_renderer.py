@@ -0,0 +1,34 @@
+"""
+Figure Rendering: Interactive Runs Show Every Figure, Headless Runs None
+"""
+
+import pytest
+
+import figure_renderer
+from figure_renderer import render_figures, set_headless
+
+def draw_line(data):
+    import matplotlib.pyplot as plt
+    fig, ax = plt.subplots(figsize=(2, 2))
+    ax.plot(data)
+    return fig
+
+@pytest.fixture
+def shown(monkeypatch):
+    paths = []
+    monkeypatch.setattr(figure_renderer, 'show_figures', paths.extend)
+    yield paths
+    set_headless(False)
+
+@pytest.mark.parametrize('headless', [False, True])
+def test_rendered_and_cached_figures_are_shown_unless_headless(tmp_path, shown, headless):
+    set_headless(headless)
+    figures = [(draw_line, [1, 2, i], str(tmp_path / f'figure_{i}.png')) for i in range(2)]
+    cache_path = str(tmp_path / 'figures.meta.json')
+
+    render_figures(figures, max_workers=1, cache_path=cache_path, derivatives_dir=None)
+    # A second run finds both figures cached and still shows them
+    render_figures(figures, max_workers=1, cache_path=cache_path, derivatives_dir=None)
+
+    expected = [path for _, _, path in figures] * 2
+    assert shown == ([] if headless else expected)
@@ -0,0 +1,34 @@
+"""
+Departures Loader: Declared Schema and Parquet Cache Against the Plain CSV
+"""
+
+import numpy as np
+import pandas as pd
+
+from flight_data_loader import DEPARTURES_SCHEMA, load_departures
+
+def test_schema_keeps_every_value(departures_csv):
+    flights = load_departures(departures_csv, use_cache=False)
+    raw = pd.read_csv(departures_csv)
+
+    for col, kind in DEPARTURES_SCHEMA.items():
+        if kind == 'category':
+            assert isinstance(flights[col].dtype, pd.CategoricalDtype), col
+            np.testing.assert_array_equal(flights[col].astype(object), raw[col], err_msg=col)
+        elif kind == 'numeric':
+            assert str(flights[col].dtype) in ('Int16', 'Float32'), col
+            np.testing.assert_array_equal(flights[col].to_numpy(dtype='float64', na_value=np.nan),
+                                          raw[col].to_numpy(dtype='float64'), err_msg=col)
+        else:
+            pd.testing.assert_series_equal(flights[col], pd.to_datetime(raw[col], format='%m/%d/%Y'))
+    # Whole minutes become Int16; the half-minute taxi-out times need Float32
+    assert flights['Departure delay (Minutes)'].dtype == 'Int16'
+    assert flights['Taxi-Out time (Minutes)'].dtype == 'Float32'
+
+def test_cached_load_matches_parse(departures_csv, tmp_path, capsys):
+    cache_dir = str(tmp_path / 'cache')
+    parsed = load_departures(departures_csv, cache_dir=cache_dir)
+    cached = load_departures(departures_csv, cache_dir=cache_dir)
+
+    assert "Loaded departures from cache" in capsys.readouterr().out
+    pd.testing.assert_frame_equal(cached, parsed)
@@ -0,0 +1,171 @@
+"""
+Daily Flight Aggregation: Every Engine Against the Original CSV Groupby
+"""
+
+import hashlib
+import os
+import numpy as np
+import pandas as pd
+import pytest
+
+import integrated_analysis
+from analysis_engine import collect, scan_departures
+from conftest import REPO_DIR, make_departures
+from flight_data_loader import (file_fingerprint, iter_departures, load_departures, read_appended_departures,
+                                to_date_key)
+from integrated_analysis import (AUXILIARY_FILES, DAILY_DELAY_COLUMN, DAILY_FLIGHT_COLUMNS, MEDIAN_BIN_HIGH,
+                                 MEDIAN_BIN_LOW, aggregate_daily_flights, aggregate_daily_flights_polars,
+                                 aggregate_daily_flights_streaming, integrate_daily_flights,
+                                 update_integrated_dataset)
+from integrated_store import integrated_dtypes
+
+def baseline_daily(path):
+    """The original aggregation: plain read_csv dtypes, one groupby"""
+    flights = pd.read_csv(path)
+    flights['Date'] = pd.to_datetime(flights['Date (MM/DD/YYYY)'], format='%m/%d/%Y')
+    daily = flights.groupby('Date').agg({
+        'Flight Number': 'count',
+        'Departure delay (Minutes)': ['mean', 'median', 'std'],
+        'Delay Weather (Minutes)': 'mean',
+        'Delay Carrier (Minutes)': 'mean',
+        'Delay National Aviation System (Minutes)': 'mean',
+        'Taxi-Out time (Minutes)': 'mean',
+        'Actual elapsed time (Minutes)': 'mean'
+    }).round(2)
+    daily.columns = DAILY_FLIGHT_COLUMNS[1:]
+    return daily.reset_index()
+
+def assert_matches_baseline(daily, path):
+    expected = baseline_daily(path)
+    # Engines may differ in datetime resolution only
+    daily = daily.assign(Date=daily['Date'].astype(expected['Date'].dtype))
+    pd.testing.assert_frame_equal(daily.reset_index(drop=True), expected)
+
+def test_pandas_daily_matches_baseline(departures_csv, tmp_path):
+    flights = load_departures(departures_csv, cache_dir=str(tmp_path / 'cache'))
+    flights['Date'] = to_date_key(flights['Date (MM/DD/YYYY)'])
+    daily = aggregate_daily_flights(flights)
+
+    assert daily['Flight_Count'].dtype == np.int64
+    assert all(daily[col].dtype == np.float64 for col in DAILY_FLIGHT_COLUMNS[2:])
+    assert_matches_baseline(daily, departures_csv)
+
+def test_streamed_chunks_share_dtypes(departures_csv):
+    # The fixture's taxi-out column is whole minutes in the first chunks only
+    dtypes = [chunk.dtypes.drop(['Carrier Code', 'Tail Number', 'Destination Airport', 'Scheduled departure time',
+                                 'Actual departure time', 'Wheels-off time'])
+              for chunk in iter_departures(departures_csv, chunksize=1000)]
+    assert all(chunk_dtypes.equals(dtypes[0]) for chunk_dtypes in dtypes)
+
+@pytest.mark.parametrize('chunksize', [700, 1000, 100_000])
+def test_streaming_daily_matches_baseline(departures_csv, chunksize):
+    daily, rows = aggregate_daily_flights_streaming(departures_csv, chunksize=chunksize)
+
+    assert rows == len(pd.read_csv(departures_csv))
+    assert all(daily[col].dtype == np.float64 for col in DAILY_FLIGHT_COLUMNS[2:])
+    assert_matches_baseline(daily, departures_csv)
+
+def test_streaming_median_exact_beyond_the_bin_window(tmp_path):
+    path = str(tmp_path / 'departures.csv')
+    departures = make_departures(rows=3000)
+    extreme = departures.index[::7]
+    # Extreme delays are clipped into the end bins without changing any rank
+    departures.loc[extreme, DAILY_DELAY_COLUMN] = np.where(extreme % 2, MEDIAN_BIN_HIGH * 3, MEDIAN_BIN_LOW * 2)
+    departures.to_csv(path, index=False)
+    daily, _ = aggregate_daily_flights_streaming(path, chunksize=500)
+
+    assert_matches_baseline(daily, path)
+
+@pytest.fixture
+def incremental_setup(departures_csv, tmp_path, monkeypatch):
+    """Departures split in two at a date boundary, with sources and caches under tmp_path"""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(integrated_analysis, 'AUXILIARY_FILES',
+                        {name: os.path.join(REPO_DIR, path) for name, path in AUXILIARY_FILES.items()})
+    rows = pd.read_csv(departures_csv)
+    dates = pd.to_datetime(rows['Date (MM/DD/YYYY)'], format='%m/%d/%Y')
+    return rows, dates
+
+def expected_store(path):
+    flights = load_departures(path, use_cache=False)
+    flights['Date'] = to_date_key(flights['Date (MM/DD/YYYY)'])
+    daily = aggregate_daily_flights(flights)
+    return integrated_dtypes(integrate_daily_flights(daily, integrated_analysis.load_auxiliary_datasets()))
+
+def fail_full_load(*args, **kwargs):
+    raise AssertionError('the full departures history was loaded')
+
+@pytest.mark.parametrize('split_inside_a_date', [False, True])
+def test_incremental_update_matches_full_rebuild(incremental_setup, monkeypatch, split_inside_a_date):
+    rows, dates = incremental_setup
+    split = int(np.searchsorted(dates, pd.Timestamp('2020-03-01')))
+    split += 5 if split_inside_a_date else 0
+    rows.iloc[:split].to_csv('departures.csv', index=False)
+    update_integrated_dataset('departures.csv', 'store')
+
+    # Unchanged source: nothing is read
+    monkeypatch.setattr(integrated_analysis, 'load_departures', fail_full_load)
+    update_integrated_dataset('departures.csv', 'store')
+
+    rows.iloc[split:].to_csv('departures.csv', mode='a', header=False, index=False)
+    if split_inside_a_date:
+        # Appended rows for a stored date need that date's earlier rows
+        monkeypatch.setattr(integrated_analysis, 'load_departures', load_departures)
+    store = update_integrated_dataset('departures.csv', 'store')
+
+    pd.testing.assert_frame_equal(store, expected_store('departures.csv'))
+
+def test_rewritten_source_rebuilds_the_store(incremental_setup):
+    rows, _ = incremental_setup
+    rows.to_csv('departures.csv', index=False)
+    update_integrated_dataset('departures.csv', 'store')
+
+    rows.iloc[::2].to_csv('departures.csv', index=False)
+    store = update_integrated_dataset('departures.csv', 'store')
+    pd.testing.assert_frame_equal(store, expected_store('departures.csv'))
+
+def test_appended_rows_and_fingerprint_cover_the_bytes_read(departures_csv):
+    previous = file_fingerprint(departures_csv)
+    with open(departures_csv) as f:
+        header, *lines = f.read().splitlines(keepends=True)
+    with open(departures_csv, 'a') as f:
+        # The last appended line is still being written
+        f.write(''.join(lines[:3]) + lines[3][:10])
+
+    rows, fingerprint = read_appended_departures(departures_csv, previous)
+    assert len(rows) == 3
+    assert fingerprint['size'] == previous['size'] + len(''.join(lines[:3]))
+    with open(departures_csv, 'rb') as f:
+        assert fingerprint['sha256'] == hashlib.sha256(f.read(fingerprint['size'])).hexdigest()
+
+def test_appended_rows_of_a_truncated_file(departures_csv, monkeypatch):
+    previous = file_fingerprint(departures_csv)
+    with open(departures_csv, 'r+') as f:
+        f.truncate(previous['size'] // 2)
+
+    # Truncated between the size check and the read
+    monkeypatch.setattr(os.path, 'getsize', lambda path: previous['size'])
+    assert read_appended_departures(departures_csv, previous) == (None, None)
+
+@pytest.mark.parametrize('cached', [False, True])
+def test_polars_daily_matches_baseline(departures_csv, tmp_path, monkeypatch, cached):
+    pytest.importorskip('polars')
+    monkeypatch.chdir(tmp_path)
+    if cached:
+        # With a current Parquet cache the lazy scan reads it instead of the CSV
+        load_departures(departures_csv)
+    daily, rows = aggregate_daily_flights_polars(departures_csv)
+
+    assert rows == len(pd.read_csv(departures_csv))
+    assert_matches_baseline(daily, departures_csv)
+
+def test_engines_filter_and_project_alike(departures_csv, tmp_path, monkeypatch):
+    pytest.importorskip('polars')
+    monkeypatch.chdir(tmp_path)
+    columns = ['Date (MM/DD/YYYY)', 'Carrier Code', DAILY_DELAY_COLUMN]
+    filters = [('Carrier Code', 'in', ['AA', 'UA']), (DAILY_DELAY_COLUMN, '>', 15)]
+    frames = [collect(scan_departures(columns=columns, filters=filters, engine=engine, path=departures_csv))
+              for engine in ('pandas', 'polars')]
+
+    pandas_rows, polars_rows = [frame.sort_values(columns).reset_index(drop=True) for frame in frames]
+    pd.testing.assert_frame_equal(polars_rows, pandas_rows, check_categorical=False)
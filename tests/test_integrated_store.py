@@ -0,0 +1,57 @@
+"""
+Integrated Store Round Trip Against the Integrated CSV
+"""
+
+import os
+import pandas as pd
+import pytest
+
+from flight_data_loader import load_dated_csv, load_departures, load_integrated_dataset, to_date_key
+from integrated_analysis import aggregate_daily_flights, integrate_daily_flights
+from integrated_store import read_integrated_store, upsert_integrated_rows, write_store_manifest
+
+@pytest.fixture
+def integrated(departures_csv, auxiliary, tmp_path):
+    flights = load_departures(departures_csv, cache_dir=str(tmp_path / 'cache'))
+    flights['Date'] = to_date_key(flights['Date (MM/DD/YYYY)'])
+    return integrate_daily_flights(aggregate_daily_flights(flights), auxiliary)
+
+def csv_round_trip(frame, path):
+    frame.to_csv(path, index=False)
+    return load_dated_csv(path)
+
+def test_store_matches_csv(integrated, tmp_path):
+    store_dir = str(tmp_path / 'store')
+    from_csv = csv_round_trip(integrated, str(tmp_path / 'integrated.csv'))
+    upsert_integrated_rows(integrated, store_dir=store_dir, replace_all=True)
+
+    pd.testing.assert_frame_equal(read_integrated_store(store_dir), from_csv)
+
+def test_partial_upsert_matches_csv(integrated, tmp_path):
+    store_dir = str(tmp_path / 'store')
+    from_csv = csv_round_trip(integrated, str(tmp_path / 'integrated.csv'))
+
+    # Store everything, then drop and re-insert the dates of one month
+    upsert_integrated_rows(integrated, store_dir=store_dir, replace_all=True)
+    january = integrated[integrated['Date'].dt.month == 1]
+    upsert_integrated_rows(january.iloc[:0], drop_dates=january['Date'], store_dir=store_dir)
+    assert len(read_integrated_store(store_dir)) == len(integrated) - len(january)
+    upsert_integrated_rows(january, store_dir=store_dir)
+
+    pd.testing.assert_frame_equal(read_integrated_store(store_dir), from_csv)
+
+def test_loader_returns_the_same_frame_from_either_source(integrated, tmp_path):
+    csv_path = str(tmp_path / 'integrated.csv')
+    store_dir = str(tmp_path / 'store')
+    from_csv = csv_round_trip(integrated, csv_path)
+    assert load_integrated_dataset(csv_path, store_dir).equals(from_csv)
+
+    upsert_integrated_rows(integrated, store_dir=store_dir, replace_all=True)
+    write_store_manifest({}, store_dir)
+    assert os.path.getmtime(os.path.join(store_dir, '_manifest.json')) >= os.path.getmtime(csv_path)
+    from_store = load_integrated_dataset(csv_path, store_dir)
+
+    pd.testing.assert_frame_equal(from_store, from_csv)
+    # A phase with no days averages to NaN, not pd.NA
+    assert pd.isna(from_store[from_store['Year'] == 1990]['Flight_Count'].mean())
+    assert isinstance(from_store[from_store['Year'] == 1990]['Flight_Count'].mean(), float)
@@ -0,0 +1,46 @@
+"""
+Quantile Sketch Error Bounds and Mergeability
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import make_departures
+from flight_data_loader import to_date_key
+from quantile_sketch import (DELAY_COLUMN, MIN_MAGNITUDE, RELATIVE_ACCURACY, SKETCH_QUANTILES,
+                             build_sketch, merge_sketches, sketch_departures, sketch_quantiles)
+
+@pytest.fixture(scope='module')
+def departures():
+    df = make_departures(rows=20000, seed=3)
+    df['Date'] = to_date_key(pd.to_datetime(df['Date (MM/DD/YYYY)'], format='%m/%d/%Y'))
+    return df
+
+@pytest.mark.parametrize('grouping', ['Carrier Code', 'Destination Airport', 'Date'])
+def test_quantiles_within_relative_accuracy(departures, grouping):
+    result = sketch_quantiles(build_sketch(departures, grouping))
+    delays = departures.dropna(subset=[DELAY_COLUMN]).groupby(grouping)[DELAY_COLUMN]
+
+    pd.testing.assert_series_equal(result['count'], delays.size(), check_names=False)
+    for q in SKETCH_QUANTILES:
+        exact = delays.quantile(q, interpolation='lower')
+        approx = result[f'p{q * 100:g}'].reindex(exact.index)
+        bound = RELATIVE_ACCURACY * exact.abs() + MIN_MAGNITUDE
+        assert ((approx - exact).abs() <= bound).all(), q
+
+def test_merged_chunks_equal_one_sketch(departures):
+    bounds = np.linspace(0, len(departures), 8).astype(int)
+    chunks = [departures.iloc[start:stop] for start, stop in zip(bounds[:-1], bounds[1:])]
+    merged = merge_sketches(*(build_sketch(chunk, 'Carrier Code') for chunk in chunks))
+
+    pd.testing.assert_series_equal(merged, build_sketch(departures, 'Carrier Code').sort_index())
+    assert merge_sketches(None, None) is None
+
+def test_streamed_sketches_match_full_frame(departures_csv):
+    df = pd.read_csv(departures_csv)
+    df['Date'] = to_date_key(pd.to_datetime(df['Date (MM/DD/YYYY)'], format='%m/%d/%Y'))
+    sketches = sketch_departures(departures_csv, chunksize=700)
+
+    for grouping, sketch in sketches.items():
+        pd.testing.assert_series_equal(sketch, build_sketch(df, grouping).sort_index(), obj=grouping)
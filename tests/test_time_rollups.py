@@ -0,0 +1,53 @@
+"""
+Time Rollups Against Direct Resampling, and the Rollup Cache Bound
+"""
+
+import numpy as np
+import pandas as pd
+
+import time_rollups
+from time_rollups import ROLLUP_CACHE_SIZE, clear_rollup_cache, month_of_year_mean, rollup_series
+
+def daily_frame(seed=0, days=800):
+    rng = np.random.default_rng(seed)
+    avg_delay = rng.normal(10, 5, days)
+    avg_delay[rng.random(days) < 0.1] = np.nan
+    return pd.DataFrame({
+        'Date': pd.date_range('2019-01-01', periods=days, freq='D'),
+        'Flight_Count': rng.integers(50, 150, days),
+        'Avg_Delay': avg_delay,
+    })
+
+def test_rollups_match_resampling():
+    df = daily_frame()
+    rollups = time_rollups.time_rollups(df)
+    by_month = df.set_index('Date').resample('MS')
+
+    pd.testing.assert_series_equal(rollup_series(rollups, 'month', 'Flight_Count', 'sum'),
+                                   by_month['Flight_Count'].sum().astype('float64'), check_names=False,
+                                   check_freq=False)
+    pd.testing.assert_series_equal(rollup_series(rollups, 'month', 'Avg_Delay', 'mean'),
+                                   by_month['Avg_Delay'].mean(), check_names=False, check_freq=False)
+    pd.testing.assert_series_equal(rollup_series(rollups, 'year', 'Avg_Delay', 'std'),
+                                   df.set_index('Date').resample('YS')['Avg_Delay'].std(),
+                                   check_names=False, check_freq=False)
+
+    weighted = (df['Avg_Delay'] * df['Flight_Count']).groupby(df['Date'].dt.to_period('M')).sum() / \
+        df['Flight_Count'].where(df['Avg_Delay'].notna()).groupby(df['Date'].dt.to_period('M')).sum()
+    np.testing.assert_allclose(rollup_series(rollups, 'month', 'Avg_Delay', 'weighted_mean'), weighted)
+
+    expected = df.groupby(df['Date'].dt.month)['Avg_Delay'].mean()
+    np.testing.assert_allclose(month_of_year_mean(rollups, 'Avg_Delay'), expected)
+
+def test_rollup_cache_is_bounded_and_clearable():
+    clear_rollup_cache()
+    frames = [daily_frame(seed) for seed in range(ROLLUP_CACHE_SIZE + 2)]
+    for df in frames:
+        time_rollups.time_rollups(df)
+    assert len(time_rollups._rollup_cache) == ROLLUP_CACHE_SIZE
+
+    # A repeat of a cached dataset is served from the cache
+    assert time_rollups.time_rollups(frames[-1].copy()) is time_rollups.time_rollups(frames[-1])
+
+    clear_rollup_cache()
+    assert not time_rollups._rollup_cache
@@ -0,0 +1,26 @@
+"""
+Web Export: Unchanged Inputs Leave Every Exported File Untouched
+"""
+
+import os
+
+from flight_data_loader import load_departures, to_date_key
+from integrated_analysis import aggregate_daily_flights, integrate_daily_flights
+from web_export import MANIFEST_NAME, export_web_data
+
+def test_repeated_export_rewrites_nothing(departures_csv, auxiliary, tmp_path, capsys):
+    flights = load_departures(departures_csv, use_cache=False)
+    flights['Date'] = to_date_key(flights['Date (MM/DD/YYYY)'])
+    daily = integrate_daily_flights(aggregate_daily_flights(flights), auxiliary)
+    output_dir = str(tmp_path / 'site_data')
+
+    export_web_data(daily, flights, output_dir)
+    files = sorted(os.listdir(output_dir))
+    before = {name: os.stat(os.path.join(output_dir, name)).st_mtime_ns for name in files}
+    capsys.readouterr()
+
+    export_web_data(daily, flights, output_dir)
+    out = capsys.readouterr().out
+    assert "0 rewritten" in out and "(unchanged)" in out
+    assert MANIFEST_NAME in files
+    assert {name: os.stat(os.path.join(output_dir, name)).st_mtime_ns for name in files} == before
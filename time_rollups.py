@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Multi-Resolution Time-Series Rollups of the Integrated Daily Dataset
+"""
+
+import pandas as pd
+import numpy as np
+from collections import OrderedDict
+import warnings
+warnings.filterwarnings('ignore')
+
+# Period frequency per resolution
+ROLLUP_RESOLUTIONS = {
+    'day': 'D',
+    'week': 'W',
+    'month': 'M',
+    'year': 'Y',
+}
+
+# 'additive' measures are daily totals (sum is meaningful); 'mean' measures are
+# daily averages or levels, which also get a Flight_Count-weighted mean
+ROLLUP_MEASURES = {
+    'Flight_Count': 'additive',
+    'Travelers_Total': 'additive',
+    'Avg_Delay': 'mean',
+    'Weather_Delay': 'mean',
+    'GDP_Growth': 'mean',
+    'Unemployment_Rate': 'mean',
+    'Consumer_Confidence': 'mean',
+}
+WEIGHT_COLUMN = 'Flight_Count'
+
+# Rollups of the most recently used datasets, least recently used evicted first
+ROLLUP_CACHE_SIZE = 4
+_rollup_cache = OrderedDict()
+
+def _daily_stats(df, measures):
+    """Additive per-day statistics, so every coarser resolution is an exact sum"""
+    stats = {}
+    weight = df[WEIGHT_COLUMN].astype('float64').fillna(0.0)
+    for measure in measures:
+        values = df[measure].astype('float64')
+        present = values.notna()
+        filled = values.fillna(0.0)
+        stats[(measure, 'count')] = present.astype('int64')
+        stats[(measure, 'sum')] = filled
+        stats[(measure, 'sumsq')] = filled * filled
+        if ROLLUP_MEASURES[measure] == 'mean':
+            stats[(measure, 'wsum')] = filled * weight
+            stats[(measure, 'weight')] = weight.where(present, 0.0)
+    return pd.DataFrame(stats, index=df.index)
+
+def build_time_rollups(df, measures=None):
+    """Materialize day, week, month and year rollups of the integrated dataset"""
+    measures = [m for m in (measures or ROLLUP_MEASURES) if m in df.columns]
+    stats = _daily_stats(df, measures)
+    dates = pd.DatetimeIndex(df['Date'])
+
+    rollups = {}
+    for resolution, freq in ROLLUP_RESOLUTIONS.items():
+        rollups[resolution] = stats.groupby(dates.to_period(freq)).sum().sort_index()
+    return rollups
+
+def time_rollups(df):
+    """Rollups for an integrated frame, built once per distinct dataset in this process"""
+    measures = [m for m in ROLLUP_MEASURES if m in df.columns]
+    key = (tuple(measures), len(df),
+           int(pd.util.hash_pandas_object(df[['Date'] + measures], index=False).sum()))
+    if key in _rollup_cache:
+        _rollup_cache.move_to_end(key)
+        return _rollup_cache[key]
+
+    rollups = _rollup_cache[key] = build_time_rollups(df, measures)
+    while len(_rollup_cache) > ROLLUP_CACHE_SIZE:
+        _rollup_cache.popitem(last=False)
+    return rollups
+
+def clear_rollup_cache():
+    """Forget every cached rollup, e.g. between benchmark repeats"""
+    _rollup_cache.clear()
+
+def _statistic(table, measure, stat):
+    count = table[(measure, 'count')]
+    total = table[(measure, 'sum')]
+    if stat == 'sum':
+        return total
+    if stat == 'count':
+        return count
+    if stat == 'mean':
+        return total / count.where(count > 0)
+    if stat == 'std':
+        variance = (table[(measure, 'sumsq')] - total * total / count) / (count - 1).where(count > 1)
+        return np.sqrt(variance.clip(lower=0))
+    if stat == 'weighted_mean':
+        if (measure, 'wsum') not in table.columns:
+            raise ValueError(f"'{measure}' is additive - use 'sum' or 'mean'")
+        weight = table[(measure, 'weight')]
+        return table[(measure, 'wsum')] / weight.where(weight > 0)
+    raise ValueError(f"Unknown rollup statistic '{stat}'")
+
+def rollup_series(rollups, resolution, measure, stat='mean', start=None, end=None):
+    """One measure at a resolution, indexed by period start and optionally date-limited"""
+    table = rollups[resolution]
+    if start is not None:
+        table = table[table.index.end_time >= pd.Timestamp(start)]
+    if end is not None:
+        table = table[table.index.start_time <= pd.Timestamp(end)]
+
+    # Periods whose days all lack the measure are dropped, like a groupby after dropna
+    present = table[(measure, 'count')] > 0 if stat != 'sum' else slice(None)
+    series = _statistic(table, measure, stat)[present]
+    series.index = series.index.start_time
+    series.index.name = 'Date'
+    return series.rename(measure)
+
+def rollup_frame(rollups, resolution, measures, start=None, end=None):
+    """Several {measure: stat} series at one resolution side by side"""
+    return pd.DataFrame({measure: rollup_series(rollups, resolution, measure, stat, start, end)
+                         for measure, stat in measures.items()})
+
+def month_of_year_mean(rollups, measure):
+    """Average daily value per calendar month across all years"""
+    table = rollups['month']
+    by_month = table[[(measure, 'sum'), (measure, 'count')]].groupby(table.index.month).sum()
+    return by_month[(measure, 'sum')] / by_month[(measure, 'count')].where(by_month[(measure, 'count')] > 0)
@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""
+Compact Per-Year Data Export for the Website Charts
+"""
+
+import pandas as pd
+import numpy as np
+import gzip
+import json
+import os
+from flight_data_loader import DEPARTURES_CSV, load_integrated_dataset
+from analysis_engine import collect, scan_departures
+from time_rollups import month_of_year_mean, rollup_frame, time_rollups
+from correlation_engine import pairwise_correlation
+import warnings
+warnings.filterwarnings('ignore')
+
+WEB_DATA_DIR = 'site_data'
+MANIFEST_NAME = 'manifest.json'
+EXPORT_FORMAT_VERSION = 1
+
+DATE_COLUMN = 'Date (MM/DD/YYYY)'
+DELAY_COLUMN = 'Departure delay (Minutes)'
+EXPORT_DEPARTURE_COLUMNS = [DATE_COLUMN, 'Carrier Code', 'Destination Airport', DELAY_COLUMN]
+
+# Daily columns shipped to the page; everything else stays in the CSV
+DAILY_EXPORT_COLUMNS = ['Flight_Count', 'Avg_Delay', 'Weather_Delay', 'Precipitation',
+                        'Temperature_High', 'Travelers_Total']
+CORRELATION_COLUMNS = ['Flight_Count', 'GDP_Growth', 'Unemployment_Rate', 'Consumer_Confidence']
+CORRELATION_LABELS = ['Flights', 'GDP', 'Unemployment', 'Confidence']
+
+PRECIPITATION_BINS = [0, 0.01, 0.1, 0.5, np.inf]
+PRECIPITATION_LABELS = ['None', 'Light', 'Moderate', 'Heavy']
+
+# Flights later than this count as delayed in the carrier and destination tables
+ON_TIME_MINUTES = 15
+
+RECOVERY_MILESTONES = [
+    ('2020-03-01', 'COVID Declaration'),
+    ('2020-04-01', 'Lockdown Peak'),
+    ('2021-07-01', 'Vaccination Rollout'),
+    ('2022-01-01', 'Recovery Phase'),
+]
+
+def _columns(frame, decimals=2):
+    """Column-oriented JSON lists: rounded floats, ISO dates and null for missing values"""
+    columns = {}
+    for name, values in frame.items():
+        if pd.api.types.is_datetime64_any_dtype(values):
+            values = values.dt.strftime('%Y-%m-%d')
+        elif pd.api.types.is_float_dtype(values):
+            values = values.round(decimals)
+        columns[str(name)] = values.astype(object).where(values.notna(), None).tolist()
+    return columns
+
+def _number(value, decimals=1):
+    """A rounded float for the JSON, or None when it is missing"""
+    return None if value is None or pd.isna(value) else round(float(value), decimals)
+
+def _json_bytes(payload):
+    """Minified JSON as bytes"""
+    return json.dumps(payload, separators=(',', ':'), allow_nan=False).encode()
+
+def _write_gzip_json(path, payload):
+    """Write minified, gzipped JSON, leaving the file untouched when its content is unchanged"""
+    # mtime=0 keeps the bytes reproducible, so unchanged years are not re-deployed
+    return _write_if_changed(path, gzip.compress(_json_bytes(payload), compresslevel=9, mtime=0))
+
+def _write_if_changed(path, body):
+    """Replace a file with new bytes unless it already holds them; returns (size, changed)"""
+    if os.path.exists(path):
+        with open(path, 'rb') as f:
+            if f.read() == body:
+                return len(body), False
+    with open(path + '.tmp', 'wb') as f:
+        f.write(body)
+    os.replace(path + '.tmp', path)
+    return len(body), True
+
+def _weather_buckets(daily):
+    """Days, flights and mean delay by weather condition and by precipitation level"""
+    precipitation = pd.cut(daily['Precipitation'], bins=PRECIPITATION_BINS, labels=PRECIPITATION_LABELS,
+                           include_lowest=True)
+    by_condition = daily.groupby('Weather_Condition').agg(
+        Days=('Flight_Count', 'size'), Flights=('Flight_Count', 'sum'), Avg_Delay=('Avg_Delay', 'mean'))
+    by_precipitation = daily.groupby(precipitation, observed=False).agg(
+        Days=('Flight_Count', 'size'), Flights=('Flight_Count', 'sum'), Avg_Delay=('Avg_Delay', 'mean'))
+    return {
+        'condition': _columns(by_condition.rename_axis('Condition').reset_index()),
+        'precipitation': _columns(by_precipitation.rename_axis('Level').reset_index()),
+    }
+
+def _departure_tables(departures):
+    """Flights, mean delay and on-time share per carrier and per destination for each year"""
+    if departures is None:
+        return {}
+    delay = departures[DELAY_COLUMN]
+    on_time = (delay <= ON_TIME_MINUTES).where(delay.notna()) * 100
+
+    tables = {}
+    for key, label, column in [('carriers', 'Carrier', 'Carrier Code'),
+                               ('destinations', 'Destination', 'Destination Airport')]:
+        frame = pd.DataFrame({'Year': departures[DATE_COLUMN].dt.year, label: departures[column],
+                              'Delay': delay, 'On_Time': on_time})
+        summary = frame.groupby(['Year', label], observed=True).agg(
+            Flights=('Delay', 'size'), Avg_Delay=('Delay', 'mean'), On_Time_Pct=('On_Time', 'mean'))
+        for year, table in summary.groupby(level='Year'):
+            table = table.droplevel('Year').sort_values('Flights', ascending=False).reset_index()
+            tables.setdefault(int(year), {})[key] = _columns(table)
+    return tables
+
+def year_payloads(daily, departures=None):
+    """One self-contained payload per calendar year for the charts that zoom into it"""
+    departure_tables = _departure_tables(departures)
+    rollups = time_rollups(daily)
+    monthly = rollup_frame(rollups, 'month', {'Flight_Count': 'mean', 'Avg_Delay': 'mean'})
+
+    payloads = {}
+    for year, days in daily.groupby(daily['Date'].dt.year):
+        year = int(year)
+        months = monthly[monthly.index.year == year]
+        payloads[year] = {
+            'year': year,
+            'daily': _columns(days[['Date'] + DAILY_EXPORT_COLUMNS]),
+            'monthly': _columns(months.rename_axis('Date').reset_index()),
+            'weather': _weather_buckets(days),
+            **departure_tables.get(year, {}),
+        }
+    return payloads
+
+def web_insights(daily):
+    """Headline figures and small chart series for the page, computed from the daily data"""
+    rollups = time_rollups(daily)
+    pre_covid = daily[daily['Year'] <= 2019]['Flight_Count'].mean()
+    covid_period = daily[daily['COVID_Period'] == True]['Flight_Count'].mean()
+    post_covid = daily[daily['Year'] >= 2022]['Flight_Count'].mean()
+    recent = daily[daily['Year'] >= 2023]['Flight_Count'].mean()
+
+    # Months from the pandemic trough until daily flights were back at the pre-COVID average
+    monthly_flights = rollup_frame(rollups, 'month', {'Flight_Count': 'mean'})['Flight_Count'].dropna()
+    pandemic = monthly_flights[monthly_flights.index >= '2020-03-01']
+    time_to_recover = None
+    if not pandemic.empty:
+        trough = pandemic.idxmin()
+        recovered = pandemic[(pandemic.index > trough) & (pandemic >= pre_covid)]
+        if not recovered.empty:
+            time_to_recover = ((recovered.index[0].year - trough.year) * 12 +
+                               recovered.index[0].month - trough.month)
+
+    correlations = pairwise_correlation(daily, CORRELATION_COLUMNS + ['Avg_Delay'])['r']
+    volume_terciles = pd.qcut(daily['Flight_Count'], 3, labels=['Low Volume', 'Medium Volume', 'High Volume'],
+                              duplicates='drop')
+    tercile_delays = daily.groupby(volume_terciles, observed=False)['Avg_Delay'].mean()
+    peak_efficiency = daily[daily['Flight_Count'] > daily['Flight_Count'].quantile(0.8)]['Avg_Delay'].mean()
+    low_efficiency = daily[daily['Flight_Count'] < daily['Flight_Count'].quantile(0.2)]['Avg_Delay'].mean()
+
+    seasonal_pattern = month_of_year_mean(rollups, 'Flight_Count')
+    days = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+    weekly_pattern = daily.groupby('DayOfWeek')['Flight_Count'].mean()
+
+    milestones = []
+    for date, label in RECOVERY_MILESTONES:
+        month = monthly_flights[monthly_flights.index == pd.Timestamp(date)]
+        if not month.empty:
+            milestones.append({'date': date, 'event': label, 'value': _number(month.iloc[0] / pre_covid * 100)})
+
+    return {
+        'covidImpact': {
+            'maxDrop': _number((covid_period - pre_covid) / pre_covid * 100),
+            'recoveryLevel': _number(recent / pre_covid * 100),
+            'timeToRecover': time_to_recover,
+            'periodFlights': [_number(pre_covid), _number(covid_period), _number(post_covid)],
+            'milestones': milestones,
+        },
+        'economicCorrelation': {
+            'gdpCorrelation': _number(correlations.loc['GDP_Growth', 'Flight_Count'], 3),
+            'unemploymentCorrelation': _number(correlations.loc['Unemployment_Rate', 'Flight_Count'], 3),
+            'consumerConfidenceCorrelation': _number(correlations.loc['Consumer_Confidence', 'Flight_Count'], 3),
+            'labels': CORRELATION_LABELS,
+            'matrix': [[_number(value, 3) for value in row]
+                       for row in correlations.loc[CORRELATION_COLUMNS, CORRELATION_COLUMNS].to_numpy()],
+        },
+        'operationalEfficiency': {
+            'congestionPenalty': _number(peak_efficiency - low_efficiency),
+            'volumeDelayCorrelation': _number(correlations.loc['Flight_Count', 'Avg_Delay'], 3),
+            'peakHourDelays': _number(peak_efficiency),
+            'volumeLabels': [str(label) for label in tercile_delays.index],
+            'volumeDelays': [_number(value) for value in tercile_delays],
+        },
+        'temporalPatterns': {
+            'seasonalVariation': _number((seasonal_pattern.max() - seasonal_pattern.min()) /
+                                         seasonal_pattern.mean() * 100),
+            'peakMonth': pd.Timestamp(2000, int(seasonal_pattern.idxmax()), 1).strftime('%B'),
+            'busiestDay': days[int(weekly_pattern.idxmax())],
+            'monthlyAverages': [_number(seasonal_pattern.get(month)) for month in range(1, 13)],
+        },
+    }
+
+def load_export_departures(path=DEPARTURES_CSV):
+    """Departures projected to the carrier and destination columns, or None without the file"""
+    if not os.path.exists(path):
+        print(f"{path} not found - carrier and destination tables skipped")
+        return None
+    return collect(scan_departures(columns=EXPORT_DEPARTURE_COLUMNS, path=path))
+
+def export_web_data(daily=None, departures=None, output_dir=WEB_DATA_DIR):
+    """Write the page manifest and one gzipped JSON file per year"""
+    if daily is None:
+        daily = load_integrated_dataset()
+    if departures is None:
+        departures = load_export_departures()
+    os.makedirs(output_dir, exist_ok=True)
+
+    years = {}
+    written = 0
+    for year, payload in year_payloads(daily, departures).items():
+        name = f'{year}.json.gz'
+        size, changed = _write_gzip_json(os.path.join(output_dir, name), payload)
+        years[str(year)] = {'file': name, 'bytes': size, 'days': len(payload['daily']['Date'])}
+        written += changed
+
+    # The manifest is the page's single blocking fetch: insights plus the monthly
+    # overview series, small enough to draw the first charts before any year loads.
+    # It holds no timestamp, so an unchanged export leaves it byte-identical.
+    monthly = rollup_frame(time_rollups(daily), 'month', {'Flight_Count': 'mean', 'Avg_Delay': 'mean'})
+    manifest = {
+        'format_version': EXPORT_FORMAT_VERSION,
+        'range': [daily['Date'].min().strftime('%Y-%m-%d'), daily['Date'].max().strftime('%Y-%m-%d')],
+        'insights': web_insights(daily),
+        'monthly': _columns(monthly.rename_axis('Date').reset_index()),
+        'years': years,
+    }
+    manifest_size, manifest_changed = _write_if_changed(os.path.join(output_dir, MANIFEST_NAME),
+                                                        _json_bytes(manifest))
+
+    total = sum(entry['bytes'] for entry in years.values())
+    print(f"Web export: {len(years)} yearly files in {output_dir}/ ({total / 1024:,.1f} KB gzipped, "
+          f"{written} rewritten), manifest {manifest_size / 1024:,.1f} KB "
+          f"({'rewritten' if manifest_changed else 'unchanged'})")
+    return manifest
+
+if __name__ == "__main__":
+    export_web_data()